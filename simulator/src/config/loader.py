@@ -2,8 +2,8 @@
 
 import yaml
 from pathlib import Path
-from typing import Any, Dict
-from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -43,6 +43,41 @@ class EngineConfig:
     idle_rpm: int
 
 
+@dataclass
+class EdgeFilterConfig:
+    """Edge pre-filter configuration."""
+
+    enabled: bool = False
+    threshold: float = 4.0
+    pre_context: int = 10
+    post_context: int = 10
+    heartbeat_hz: float = 1.0
+    window: int = 100
+    warmup: int = 20
+    model_path: Optional[str] = None  # trained RCF model: score with it instead of z-scores
+
+
+@dataclass
+class SensorGroupConfig:
+    """Per-sensor-group sampling configuration."""
+
+    rate_hz: float
+    topic: Optional[str] = None
+    batch_size: int = 1
+
+
+@dataclass
+class TrackConfig:
+    """Lap profile configuration (see src.telemetry.track)."""
+
+    top_speed_kph: float = 285.0
+    pace_variation: float = 0.01
+    intensity_variation: float = 0.05
+    pit_every_laps: int = 10  # 0 = never stop
+    pit_stop_sec: float = 40.0
+    sectors: List[Dict[str, float]] = field(default_factory=list)  # empty = built-in circuit
+
+
 @dataclass
 class SimulatorConfig:
     """Complete simulator configuration."""
@@ -51,6 +86,9 @@ class SimulatorConfig:
     iot: IoTConfig
     brake: BrakeConfig
     engine: EngineConfig
+    edge_filter: Optional[EdgeFilterConfig] = None
+    sensor_groups: Dict[str, SensorGroupConfig] = field(default_factory=dict)
+    track: Optional[TrackConfig] = None
 
 
 def load_config(config_path: str) -> SimulatorConfig:
@@ -72,4 +110,10 @@ def load_config(config_path: str) -> SimulatorConfig:
         iot=IoTConfig(**data["iot"]),
         brake=BrakeConfig(**data["brake"]),
         engine=EngineConfig(**data["engine"]),
+        edge_filter=EdgeFilterConfig(**data["edge_filter"]) if "edge_filter" in data else None,
+        sensor_groups={
+            name: SensorGroupConfig(**group)
+            for name, group in (data.get("sensor_groups") or {}).items()
+        },
+        track=TrackConfig(**data["track"]) if "track" in data else None,
     )
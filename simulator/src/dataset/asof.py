@@ -0,0 +1,150 @@
+"""
+As-Of Join for Multi-Rate Sensor Groups
+
+When sensor groups are sampled at different rates (see
+src.telemetry.scheduler), each group lands as its own rows. These helpers
+re-align them: every row of the base group (usually the fastest, brake) gets
+the latest values of the other groups at or before its timestamp, within the
+same vehicle and session.
+"""
+
+from typing import Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from ..telemetry.schema import BRAKE_FEATURES, ENGINE_FEATURES
+
+DEFAULT_GROUPS: Mapping[str, Sequence[str]] = {
+    "brake": BRAKE_FEATURES,
+    "engine": ENGINE_FEATURES,
+}
+
+
+def _group_codes(
+    left: pa.Table, right: pa.Table, by: Sequence[str]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Integer codes for the by-key of each row, shared between both tables."""
+
+    def keys(table: pa.Table) -> np.ndarray:
+        joined = None
+        for name in by:
+            part = table[name].cast(pa.string()).fill_null("").to_numpy(zero_copy_only=False)
+            joined = part.astype(object) if joined is None else joined + "\x1f" + part
+        return joined
+
+    if not by:
+        return np.zeros(left.num_rows, dtype=np.int64), np.zeros(right.num_rows, dtype=np.int64)
+
+    _, codes = np.unique(np.concatenate([keys(left), keys(right)]), return_inverse=True)
+    return codes[: left.num_rows].astype(np.int64), codes[left.num_rows :].astype(np.int64)
+
+
+def asof_join(
+    left: pa.Table,
+    right: pa.Table,
+    on: str = "timestamp",
+    by: Sequence[str] = ("vehicle_id", "session_id"),
+    right_columns: Optional[Sequence[str]] = None,
+    tolerance_ms: Optional[int] = None,
+) -> pa.Table:
+    """
+    Attach the latest right row at or before each left row.
+
+    Args:
+        left: Base rows (output has one row per left row, in left order)
+        right: Rows to look up
+        on: Integer time column present in both tables
+        by: Columns that must match exactly
+        right_columns: Right columns to attach (default: all not in left)
+        tolerance_ms: Maximum age of the matched right row (None = unbounded)
+
+    Returns:
+        left with right_columns appended (null where no match)
+    """
+    if right_columns is None:
+        right_columns = [name for name in right.column_names if name not in left.column_names]
+
+    left_codes, right_codes = _group_codes(left, right, by)
+    left_ts = left[on].to_numpy(zero_copy_only=False).astype(np.int64)
+    right_ts = right[on].to_numpy(zero_copy_only=False).astype(np.int64)
+
+    if right.num_rows == 0:
+        indices = pa.nulls(left.num_rows, pa.int64())
+    else:
+        # Composite key: group code in the high part, time offset in the low part
+        origin = min(left_ts.min(initial=0), right_ts.min())
+        span = max(left_ts.max(initial=0), right_ts.max()) - origin + 1
+        right_key = right_codes * span + (right_ts - origin)
+        left_key = left_codes * span + (left_ts - origin)
+
+        order = np.argsort(right_key, kind="stable")
+        position = np.searchsorted(right_key[order], left_key, side="right") - 1
+        matched = order[np.maximum(position, 0)]
+
+        valid = (position >= 0) & (right_codes[matched] == left_codes)
+        if tolerance_ms is not None:
+            valid &= left_ts - right_ts[matched] <= tolerance_ms
+        indices = pa.array(matched, mask=~valid)
+
+    result = left
+    for name in right_columns:
+        result = result.append_column(name, pc.take(right[name], indices))
+    return result
+
+
+def has_group_rows(table: pa.Table, groups: Mapping[str, Sequence[str]] = DEFAULT_GROUPS) -> bool:
+    """
+    Whether a table holds per-group rows (some group's channels null) to re-align.
+
+    Args:
+        table: Telemetry rows
+        groups: Group name → channel columns
+
+    Returns:
+        True when every group's first channel is present and at least one has nulls
+    """
+    first_channels = [columns[0] for columns in groups.values()]
+    names = table.schema.names
+    return all(name in names for name in first_channels) and any(
+        table.column(name).null_count for name in first_channels
+    )
+
+
+def align_groups(
+    table: pa.Table,
+    groups: Mapping[str, Sequence[str]] = DEFAULT_GROUPS,
+    base: str = "brake",
+    on: str = "timestamp",
+    by: Sequence[str] = ("vehicle_id", "session_id"),
+    tolerance_ms: Optional[int] = None,
+) -> pa.Table:
+    """
+    Re-align mixed group rows into full telemetry rows at the base group's cadence.
+
+    A row belongs to a group when that group's first channel is non-null, so
+    this works on Glue/Parquet data where the sensor_group field is dropped.
+
+    Args:
+        table: Rows from all groups (e.g. read back from the data lake)
+        groups: Group name → channel columns
+        base: Group whose rows define the output timeline
+        on: Time column
+        by: Columns that must match exactly
+        tolerance_ms: Maximum age of attached values
+
+    Returns:
+        One row per base-group row, with every group's channels
+    """
+
+    def rows_of(group: str) -> pa.Table:
+        columns = groups[group]
+        present = table.filter(pc.is_valid(table[columns[0]]))
+        return present.select([*by, on, *columns]).sort_by(on)
+
+    result = rows_of(base)
+    for group, columns in groups.items():
+        if group != base:
+            result = asof_join(result, rows_of(group), on, by, columns, tolerance_ms)
+    return result
@@ -0,0 +1,582 @@
+"""
+QoS1 Redelivery Deduplication
+
+IoTPublisher publishes with QoS 1 (at least once) and retries timed-out
+publishes, so the same sample can reach the data lake more than once. A
+sample is identified by (vehicle_id, session_id, timestamp), plus
+sensor_group for multi-rate group rows.
+
+- Deduplicator: streaming filter in bounded memory. Keys go into a ring of
+  Bloom filters, one per time bucket of the sample timestamp; buckets older
+  than the window are recycled. A redelivery carries its original timestamp,
+  so it is caught as long as it arrives within the window; false positives
+  (unique samples dropped) occur at the configured rate. A sample far ahead
+  of the window (e.g. a bad device clock) is passed through as an outlier
+  and does not move the window, unless enough of them arrive in a row
+- drop_sorted_duplicates: exact pass for a table already sorted by key
+  (e.g. one hour partition in the training pipeline)
+- CLI: reports duplicate rates per vehicle and optionally writes a
+  deduplicated copy of the dataset (same partition layout)
+
+Usage:
+    python -m src.dataset.dedup ./data/raw/telemetry --output ./data/compacted --fp-rate 1e-4
+"""
+
+import argparse
+import hashlib
+import math
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import structlog
+
+from .partitions import PathLike, is_parquet, list_data_files
+
+logger = structlog.get_logger(__name__)
+
+DEDUP_KEY_COLUMNS: Tuple[str, ...] = ("vehicle_id", "session_id", "timestamp")
+
+# Part of the key when present: group rows of one sample share their timestamp
+GROUP_COLUMN = "sensor_group"
+
+# String hashes kept before the cache is reset (session ids grow without bound)
+_MAX_CACHED_STRINGS = 100_000
+
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MASK64 = (1 << 64) - 1
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer over a uint64 array (wrapping arithmetic)."""
+    values = values ^ (values >> np.uint64(30))
+    values = values * _MIX_1
+    values = values ^ (values >> np.uint64(27))
+    values = values * _MIX_2
+    return values ^ (values >> np.uint64(31))
+
+
+def _mix64_int(value: int) -> int:
+    """Scalar _mix64 (same results, without numpy call overhead)."""
+    value ^= value >> 30
+    value = (value * 0xBF58476D1CE4E5B9) & _MASK64
+    value ^= value >> 27
+    value = (value * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+def _hash_string(value: Any) -> int:
+    data = b"" if value is None else str(value).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def bloom_parameters(capacity: int, fp_rate: float) -> Tuple[int, int]:
+    """
+    Optimal Bloom filter size for a capacity and false-positive rate.
+
+    Args:
+        capacity: Keys expected in the filter
+        fp_rate: Target false-positive probability at capacity
+
+    Returns:
+        (number of bits, number of hash functions)
+
+    Raises:
+        ValueError: If fp_rate is not in (0, 1)
+    """
+    if not 0 < fp_rate < 1:
+        raise ValueError(f"fp_rate must be in (0, 1), got {fp_rate}")
+    capacity = max(1, capacity)
+    num_bits = math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)
+    num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+    return num_bits, num_hashes
+
+
+class BloomFilter:
+    """Bit-packed Bloom filter over uint64 keys (double hashing)."""
+
+    def __init__(self, capacity: int, fp_rate: float):
+        self.capacity = capacity
+        self.num_bits, self.num_hashes = bloom_parameters(capacity, fp_rate)
+        self._buffer = bytearray((self.num_bits + 7) // 8)  # scalar path indexes this directly
+        self.bits = np.frombuffer(self._buffer, dtype=np.uint8)
+        self.count = 0
+        self._offsets = np.arange(self.num_hashes, dtype=np.uint64)
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def clear(self) -> None:
+        self.bits[:] = 0
+        self.count = 0
+
+    def _positions(self, keys: np.ndarray) -> np.ndarray:
+        step = _mix64(keys ^ _GOLDEN) | np.uint64(1)
+        return (keys[:, None] + self._offsets * step[:, None]) % np.uint64(self.num_bits)
+
+    def contains(self, keys: np.ndarray) -> np.ndarray:
+        """Membership mask (no false negatives)."""
+        positions = self._positions(keys)
+        bits = self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)
+        return np.all(bits & 1, axis=1)
+
+    def test_and_add(self, key: int) -> bool:
+        """Scalar contains + add; returns whether the key was already present."""
+        step = _mix64_int(key ^ 0x9E3779B97F4A7C15) | 1
+        bits = self._buffer
+        present = True
+        for index in range(self.num_hashes):
+            position = ((key + index * step) & _MASK64) % self.num_bits
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                present = False
+                bits[byte] |= mask
+        self.count += not present
+        return present
+
+    def add(self, keys: np.ndarray) -> None:
+        positions = self._positions(keys).ravel()
+        masks = np.left_shift(1, (positions & np.uint64(7)).astype(np.uint8)).astype(np.uint8)
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3), masks)
+        self.count += len(keys)
+
+
+@dataclass
+class DedupStats:
+    """Duplicate counters, overall and per vehicle."""
+
+    rows: int = 0
+    duplicates: int = 0
+    late: int = 0  # older than the window: passed through unchecked
+    outliers: int = 0  # too far ahead of the window: passed through unchecked
+    skipped_files: int = 0  # non-Parquet objects not read by deduplicate_dataset
+    vehicle_rows: Dict[str, int] = field(default_factory=dict)
+    vehicle_duplicates: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def duplicate_rate(self) -> float:
+        return self.duplicates / self.rows if self.rows else 0.0
+
+    def vehicle_rates(self) -> Dict[str, float]:
+        """Duplicate rate per vehicle."""
+        return {
+            vehicle: self.vehicle_duplicates.get(vehicle, 0) / rows
+            for vehicle, rows in sorted(self.vehicle_rows.items())
+            if rows
+        }
+
+
+class Deduplicator:
+    """
+    Time-windowed Bloom filter deduplication.
+
+    Memory is generations × Bloom filter(capacity / generations, fp_rate),
+    independent of stream length. Keys are checked only against the filter
+    of their own time bucket, so the false-positive rate stays at fp_rate as
+    long as no bucket receives more than its share of the capacity.
+
+    A row more than max_ahead_sec past the newest bucket would expire the
+    whole window, so it is counted as an outlier instead and the window
+    stays put. After confirm_jump such rows in a row the jump is taken as
+    real (e.g. a new session after a gap) and the window moves.
+
+    Usage:
+        dedup = Deduplicator(window_sec=600, capacity=1_000_000, fp_rate=1e-4)
+        table = dedup.filter_table(table)            # batches, in arrival order
+        if not dedup.is_duplicate(record): sink(record)
+        print(dedup.stats.duplicate_rate)
+    """
+
+    def __init__(
+        self,
+        window_sec: float = 600.0,
+        capacity: int = 1_000_000,
+        fp_rate: float = 1e-4,
+        generations: int = 4,
+        max_ahead_sec: Optional[float] = None,
+        confirm_jump: int = 100,
+    ):
+        """
+        Initialize deduplicator.
+
+        Args:
+            window_sec: How far behind the newest timestamp a redelivery is still caught
+            capacity: Samples expected per window (all vehicles)
+            fp_rate: False-positive (unique sample dropped) probability
+            generations: Time buckets per window; memory is released one bucket at a time
+            max_ahead_sec: How far past the newest timestamp one row may move the
+                window (default: window_sec); rows further ahead are outliers
+            confirm_jump: Consecutive outliers after which the window moves to them
+        """
+        self.window_sec = window_sec
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.generations = max(1, generations)
+        self.bucket_ms = max(1, math.ceil(window_sec * 1000 / self.generations))
+        ahead_sec = window_sec if max_ahead_sec is None else max_ahead_sec
+        self.max_ahead_buckets = max(1, math.ceil(ahead_sec * 1000 / self.bucket_ms))
+        self.confirm_jump = max(1, confirm_jump)
+        self.stats = DedupStats()
+
+        self._filters: Dict[int, BloomFilter] = {}
+        self._spare: Optional[BloomFilter] = None
+        self._watermark: Optional[int] = None  # newest bucket seen
+        self._ahead_streak = 0  # consecutive outliers
+        self._strings: Dict[Any, int] = {}
+        self._bucket_capacity = math.ceil(capacity / self.generations)
+        bits, _ = bloom_parameters(self._bucket_capacity, fp_rate)
+        logger.info(
+            "dedup_initialized",
+            window_sec=window_sec,
+            fp_rate=fp_rate,
+            memory_kb=self.generations * ((bits + 7) // 8) // 1024,
+        )
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(f.nbytes for f in self._filters.values())
+
+    def keep_mask(self, table: Union[pa.Table, pa.RecordBatch]) -> np.ndarray:
+        """
+        Check a batch of rows in arrival order and record them.
+
+        Args:
+            table: Rows with the key columns (and sensor_group when present)
+
+        Returns:
+            Boolean mask, True for rows seen for the first time
+        """
+        if table.num_rows == 0:
+            return np.ones(0, dtype=bool)
+        vehicles = pc.dictionary_encode(table.column("vehicle_id"))
+        if isinstance(vehicles, pa.ChunkedArray):
+            vehicles = vehicles.combine_chunks()
+        vehicle_codes = vehicles.indices.to_numpy(zero_copy_only=False)
+        vehicle_keys = self._string_hashes(vehicles.dictionary.to_pylist())[vehicle_codes]
+
+        keys = _mix64(vehicle_keys ^ self._column_hashes(table.column("session_id")))
+        if GROUP_COLUMN in table.column_names:
+            keys = _mix64(keys ^ self._column_hashes(table.column(GROUP_COLUMN)))
+        timestamps = _as_milliseconds(table.column("timestamp"))
+        keys = _mix64(keys + timestamps.view(np.uint64))
+
+        duplicate = self._check(keys, timestamps)
+        names = vehicles.dictionary.to_pylist()
+        rows = np.bincount(vehicle_codes, minlength=len(names))
+        duplicates = np.bincount(vehicle_codes[duplicate], minlength=len(names))
+        for name, count, dups in zip(names, rows.tolist(), duplicates.tolist()):
+            self.stats.vehicle_rows[name] = self.stats.vehicle_rows.get(name, 0) + count
+            if dups:
+                self.stats.vehicle_duplicates[name] = (
+                    self.stats.vehicle_duplicates.get(name, 0) + dups
+                )
+        return ~duplicate
+
+    def filter_table(self, table: pa.Table) -> pa.Table:
+        """Rows of table not seen before (see keep_mask)."""
+        return table.filter(pa.array(self.keep_mask(table)))
+
+    def is_duplicate(self, record: Mapping[str, Any]) -> bool:
+        """
+        Check and record one telemetry record (e.g. in a sink).
+
+        Args:
+            record: Telemetry message
+
+        Returns:
+            True if the record was seen before
+        """
+        vehicle_id = record.get("vehicle_id")
+        group = record.get(GROUP_COLUMN)
+        timestamp = round(record["timestamp"])
+        key = self._string_hash(vehicle_id) ^ self._string_hash(record.get("session_id"))
+        key = _mix64_int(key)
+        if group is not None:
+            key = _mix64_int(key ^ self._string_hash(group))
+        key = _mix64_int((key + timestamp) & _MASK64)  # same key as keep_mask
+
+        bucket = timestamp // self.bucket_ms
+        self.stats.rows += 1
+        duplicate = False
+        if self._is_outlier(bucket, self._watermark):
+            self.stats.outliers += 1
+        else:
+            self._advance(bucket)
+            if bucket <= self._watermark - self.generations:
+                self.stats.late += 1
+            else:
+                bloom = self._filter(bucket)
+                duplicate = bloom.test_and_add(key)
+                self.stats.duplicates += duplicate
+                self._check_capacity(bloom, bucket, added=not duplicate)
+
+        vehicle = str(vehicle_id)
+        self.stats.vehicle_rows[vehicle] = self.stats.vehicle_rows.get(vehicle, 0) + 1
+        if duplicate:
+            self.stats.vehicle_duplicates[vehicle] = (
+                self.stats.vehicle_duplicates.get(vehicle, 0) + 1
+            )
+        return duplicate
+
+    def _string_hash(self, value: Any) -> int:
+        cached = self._strings.get(value)
+        if cached is None:
+            if len(self._strings) >= _MAX_CACHED_STRINGS:
+                self._strings.clear()
+            cached = self._strings[value] = _hash_string(value)
+        return cached
+
+    def _string_hashes(self, values: Sequence[Any]) -> np.ndarray:
+        return np.array([self._string_hash(value) for value in values], dtype=np.uint64)
+
+    def _column_hashes(self, column: Union[pa.Array, pa.ChunkedArray]) -> np.ndarray:
+        encoded = pc.dictionary_encode(column)
+        if isinstance(encoded, pa.ChunkedArray):
+            encoded = encoded.combine_chunks()
+        codes = encoded.indices.fill_null(len(encoded.dictionary)).to_numpy(zero_copy_only=False)
+        hashes = self._string_hashes(encoded.dictionary.to_pylist() + [None])
+        return hashes[codes]
+
+    def _check(self, keys: np.ndarray, timestamps: np.ndarray) -> np.ndarray:
+        """
+        Duplicate mask for one batch; inserts the new keys.
+
+        Repeats within the batch are found exactly. The other rows are checked
+        bucket by bucket in time order, so a batch may span more than the window.
+        """
+        duplicate = np.ones(len(keys), dtype=bool)
+        _, first = np.unique(keys, return_index=True)
+        duplicate[first] = False
+
+        buckets = timestamps // self.bucket_ms
+        late = np.zeros(len(keys), dtype=bool)
+        outlier = np.zeros(len(keys), dtype=bool)
+        if self._watermark is not None:
+            late = ~duplicate & (buckets <= self._watermark - self.generations)
+        candidates = np.flatnonzero(~duplicate & ~late)
+
+        if self._watermark is not None and len(candidates):
+            if (buckets[candidates] > self._watermark + self.max_ahead_buckets).any():
+                # Rare: replay in arrival order, the window moving with the accepted rows
+                watermark = self._watermark
+                for row in candidates.tolist():
+                    bucket = int(buckets[row])
+                    if self._is_outlier(bucket, watermark):
+                        outlier[row] = True
+                    else:
+                        watermark = max(watermark, bucket)
+                candidates = candidates[~outlier[candidates]]
+            else:
+                self._ahead_streak = 0
+
+        candidate_buckets = buckets[candidates]
+        for bucket in np.unique(candidate_buckets).tolist():
+            rows = candidates[candidate_buckets == bucket]
+            self._advance(bucket)
+            bloom = self._filter(bucket)
+            seen = bloom.contains(keys[rows])
+            duplicate[rows[seen]] = True
+            bloom.add(keys[rows[~seen]])
+            self._check_capacity(bloom, bucket, added=int((~seen).sum()))
+
+        self.stats.rows += len(keys)
+        self.stats.duplicates += int(duplicate.sum())
+        self.stats.late += int(late.sum())
+        self.stats.outliers += int(outlier.sum())
+        return duplicate
+
+    def _check_capacity(self, bloom: BloomFilter, bucket: int, added: int) -> None:
+        """Warn once when a bucket fills past its capacity (false positives rise)."""
+        if added and bloom.count > bloom.capacity >= bloom.count - added:
+            logger.warning(
+                "dedup_bucket_over_capacity",
+                bucket_ms=bucket * self.bucket_ms,
+                capacity=bloom.capacity,
+            )
+
+    def _is_outlier(self, bucket: int, watermark: Optional[int]) -> bool:
+        """Whether a row is too far ahead of watermark; tracks consecutive outliers."""
+        if watermark is None or bucket <= watermark + self.max_ahead_buckets:
+            self._ahead_streak = 0
+            return False
+        self._ahead_streak += 1
+        if self._ahead_streak >= self.confirm_jump:
+            self._ahead_streak = 0  # sustained jump: let the window move
+            return False
+        return True
+
+    def _advance(self, bucket: int) -> None:
+        """Move the window forward to bucket, recycling expired filters."""
+        if self._watermark is not None and bucket <= self._watermark:
+            return
+        self._watermark = bucket
+        oldest = bucket - self.generations + 1
+        for expired in [b for b in self._filters if b < oldest]:
+            self._spare = self._filters.pop(expired)
+
+    def _filter(self, bucket: int) -> BloomFilter:
+        bloom = self._filters.get(bucket)
+        if bloom is None:
+            if self._spare is not None:
+                bloom, self._spare = self._spare, None
+                bloom.clear()
+            else:
+                bloom = BloomFilter(self._bucket_capacity, self.fp_rate)
+            self._filters[bucket] = bloom
+        return bloom
+
+
+def _as_milliseconds(column: Union[pa.Array, pa.ChunkedArray]) -> np.ndarray:
+    """Timestamp column as int64 epoch milliseconds."""
+    if pa.types.is_timestamp(column.type):
+        column = pc.cast(column, pa.timestamp("ms")).cast(pa.int64())
+    elif pa.types.is_floating(column.type):
+        column = pc.cast(pc.round(column), pa.int64())
+    return column.to_numpy(zero_copy_only=False).astype(np.int64, copy=False)
+
+
+def drop_sorted_duplicates(
+    table: pa.Table, columns: Sequence[str] = DEDUP_KEY_COLUMNS
+) -> Tuple[pa.Table, int]:
+    """
+    Exact deduplication of a table sorted by columns (first row of each run kept).
+
+    Args:
+        table: Table sorted by the key columns
+        columns: Key columns
+
+    Returns:
+        (deduplicated table, number of rows dropped)
+    """
+    if table.num_rows < 2:
+        return table, 0
+    duplicate = np.zeros(table.num_rows, dtype=bool)
+    same = []
+    for name in columns:
+        values = table[name].to_numpy(zero_copy_only=False)
+        same.append(values[1:] == values[:-1])
+    duplicate[1:] = np.logical_and.reduce(same)
+    return table.filter(pa.array(~duplicate)), int(duplicate.sum())
+
+
+def deduplicate_dataset(
+    source: PathLike,
+    deduplicator: Deduplicator,
+    output_dir: Optional[PathLike] = None,
+    batch_size: int = 65536,
+) -> DedupStats:
+    """
+    Stream a partitioned Parquet dataset through a Deduplicator.
+
+    Files are read in partition order (Firehose writes each file in arrival
+    order), so redeliveries landing in a later hour are caught too. Objects
+    that are not Parquet (Firehose gzip JSON output) are skipped and logged.
+
+    Args:
+        source: Dataset root (e.g. a local copy of raw/telemetry)
+        deduplicator: Filter state (reusable across calls)
+        output_dir: Write deduplicated files here, same relative paths (default: report only)
+        batch_size: Rows per streamed Arrow batch
+
+    Returns:
+        The deduplicator's stats
+    """
+    start_time = time.time()
+    root = Path(source)
+    files = list_data_files(root)
+    for path in files:
+        if not is_parquet(path):
+            logger.warning("dedup_file_skipped", file=str(path), reason="not parquet")
+            deduplicator.stats.skipped_files += 1
+            continue
+        parquet = pq.ParquetFile(path)
+        writer = None
+        if output_dir is not None:
+            relative = path.relative_to(root) if root.is_dir() else Path(path.name)
+            target = Path(output_dir) / relative
+            target.parent.mkdir(parents=True, exist_ok=True)
+            writer = pq.ParquetWriter(target, parquet.schema_arrow)
+        try:
+            for batch in parquet.iter_batches(batch_size=batch_size):
+                mask = deduplicator.keep_mask(batch)
+                if writer is not None and mask.any():
+                    writer.write_batch(batch.filter(pa.array(mask)))
+        finally:
+            if writer is not None:
+                writer.close()
+
+    stats = deduplicator.stats
+    logger.info(
+        "dedup_dataset_done",
+        files=len(files),
+        skipped_files=stats.skipped_files,
+        rows=stats.rows,
+        duplicates=stats.duplicates,
+        duplicate_rate=f"{stats.duplicate_rate:.4%}",
+        late=stats.late,
+        outliers=stats.outliers,
+        memory_kb=deduplicator.memory_bytes // 1024,
+        elapsed=f"{time.time() - start_time:.1f}s",
+    )
+    return stats
+
+
+def format_stats(stats: DedupStats) -> str:
+    """Render duplicate rates per vehicle as a text table."""
+    lines = [f"{'vehicle':<24} {'rows':>12} {'duplicates':>11} {'rate':>9}"]
+    rates = stats.vehicle_rates()
+    for vehicle, rate in rates.items():
+        lines.append(
+            f"{vehicle:<24} {stats.vehicle_rows[vehicle]:>12} "
+            f"{stats.vehicle_duplicates.get(vehicle, 0):>11} {rate:>9.4%}"
+        )
+    lines.append(
+        f"{'total':<24} {stats.rows:>12} {stats.duplicates:>11} {stats.duplicate_rate:>9.4%}"
+    )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Find and drop QoS1 telemetry redeliveries")
+    parser.add_argument("source", type=str, help="Partitioned Parquet dataset root")
+    parser.add_argument("--output", type=str, default=None, help="Write a deduplicated copy")
+    parser.add_argument("--window-sec", type=float, default=600.0, help="Redelivery window")
+    parser.add_argument("--capacity", type=int, default=1_000_000, help="Samples per window")
+    parser.add_argument("--fp-rate", type=float, default=1e-4, help="False-positive rate")
+    parser.add_argument("--generations", type=int, default=4, help="Time buckets per window")
+    parser.add_argument(
+        "--max-ahead-sec",
+        type=float,
+        default=None,
+        help="Rows further past the newest timestamp are outliers (default: --window-sec)",
+    )
+    args = parser.parse_args()
+
+    deduplicator = Deduplicator(
+        args.window_sec,
+        args.capacity,
+        args.fp_rate,
+        args.generations,
+        max_ahead_sec=args.max_ahead_sec,
+    )
+    stats = deduplicate_dataset(args.source, deduplicator, args.output)
+    print(format_stats(stats))
+    if stats.late:
+        print(f"\n{stats.late} rows arrived more than {args.window_sec:g}s late (not checked)")
+    if stats.outliers:
+        print(f"{stats.outliers} rows were too far ahead of the window (not checked)")
+    if stats.skipped_files:
+        print(f"{stats.skipped_files} files are not Parquet (e.g. gzip JSON) and were skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,455 @@
+"""
+Telemetry Time-Range and Session Index
+
+Maps (vehicle_id, session_id) to the files and Parquet row groups holding
+their samples, with the time range covered by each segment. The index lives
+next to the partitions in <root>/_index/segments.parquet and is updated
+incrementally: only new or modified files are re-read. The size and mtime of
+every file seen (including empty Parquet files and skipped non-Parquet files,
+which have no segments) are kept in <root>/_index/files.parquet.
+
+A window query then reads just the matching row groups instead of scanning
+whole hour= partitions.
+"""
+
+import argparse
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import structlog
+
+from .partitions import PathLike, is_parquet, list_data_files
+
+logger = structlog.get_logger(__name__)
+
+INDEX_DIR = "_index"
+INDEX_FILE = "segments.parquet"
+FILES_FILE = "files.parquet"
+
+INDEX_SCHEMA = pa.schema(
+    [
+        ("vehicle_id", pa.string()),
+        ("session_id", pa.string()),
+        ("file", pa.string()),
+        ("file_size", pa.int64()),
+        ("file_mtime_ns", pa.int64()),
+        ("row_group", pa.int32()),
+        ("row_offset", pa.int64()),
+        ("num_rows", pa.int64()),
+        ("min_timestamp", pa.int64()),
+        ("max_timestamp", pa.int64()),
+    ]
+)
+
+FILES_SCHEMA = pa.schema(
+    [
+        ("file", pa.string()),
+        ("file_size", pa.int64()),
+        ("file_mtime_ns", pa.int64()),
+        ("indexed", pa.bool_()),  # False for non-Parquet files (recorded, not read)
+    ]
+)
+
+SessionKey = Tuple[str, str]
+
+
+@dataclass(frozen=True)
+class Segment:
+    """Samples of one (vehicle, session) inside one Parquet row group."""
+
+    vehicle_id: str
+    session_id: str
+    file: str  # relative to the dataset root
+    file_size: int
+    file_mtime_ns: int
+    row_group: int
+    row_offset: int  # first row of the row group within the file
+    num_rows: int  # rows of this session within the row group
+    min_timestamp: int
+    max_timestamp: int
+
+
+@dataclass
+class SessionSummary:
+    """Time range and size of one recorded session."""
+
+    vehicle_id: str
+    session_id: str
+    start_timestamp: int
+    end_timestamp: int
+    rows: int
+    files: int
+
+
+@dataclass
+class IndexUpdate:
+    """Result of an incremental index update."""
+
+    added_files: int = 0
+    removed_files: int = 0
+    unchanged_files: int = 0
+    skipped_files: int = 0  # new or modified non-Parquet files (not indexed)
+    segments: int = 0
+    elapsed_sec: float = 0.0
+
+
+def index_file(root: Path, path: Path) -> List[Segment]:
+    """
+    Build segments for one Parquet file.
+
+    Only the key columns are read, one row group at a time.
+
+    Args:
+        root: Dataset root
+        path: Data file
+
+    Returns:
+        One segment per (vehicle, session, row group)
+    """
+    stat = path.stat()
+    relative = path.relative_to(root).as_posix()
+    parquet = pq.ParquetFile(path)
+
+    segments = []
+    row_offset = 0
+    for row_group in range(parquet.num_row_groups):
+        table = parquet.read_row_group(
+            row_group, columns=["vehicle_id", "session_id", "timestamp"]
+        )
+        grouped = table.group_by(["vehicle_id", "session_id"]).aggregate(
+            [("timestamp", "min"), ("timestamp", "max"), ("timestamp", "count")]
+        )
+        for row in grouped.to_pylist():
+            segments.append(
+                Segment(
+                    vehicle_id=row["vehicle_id"],
+                    session_id=row["session_id"],
+                    file=relative,
+                    file_size=stat.st_size,
+                    file_mtime_ns=stat.st_mtime_ns,
+                    row_group=row_group,
+                    row_offset=row_offset,
+                    num_rows=row["timestamp_count"],
+                    min_timestamp=row["timestamp_min"],
+                    max_timestamp=row["timestamp_max"],
+                )
+            )
+        row_offset += table.num_rows
+
+    return segments
+
+
+class TelemetryIndex:
+    """
+    Session/time-range index over a local partitioned telemetry dataset.
+
+    Usage:
+        index = TelemetryIndex("data/raw/telemetry")
+        index.update()
+        index.save()
+        window = index.read_window("GT3-RACER-01", start_ms=t0, end_ms=t1)
+    """
+
+    def __init__(self, root: PathLike):
+        """
+        Initialize index, loading the stored index if present.
+
+        Args:
+            root: Dataset root directory
+        """
+        self.root = Path(root)
+        self.path = self.root / INDEX_DIR / INDEX_FILE
+        self.files_path = self.root / INDEX_DIR / FILES_FILE
+
+        self._by_session: Dict[SessionKey, List[Segment]] = {}
+        self._starts: Dict[SessionKey, List[int]] = {}
+        # file -> (size, mtime_ns, indexed); independent of segments, so files
+        # without any (empty or non-Parquet) are not re-read on every update
+        self._files: Dict[str, Tuple[int, int, bool]] = {}
+
+        if self.path.exists():
+            self._load()
+
+    def update(self) -> IndexUpdate:
+        """
+        Index new or modified files and forget deleted ones.
+
+        Parquet is detected from the magic bytes (Firehose objects have no
+        extension); other files (e.g. gzip JSON output) are recorded but not indexed.
+
+        Returns:
+            IndexUpdate with file counts
+        """
+        start_time = time.time()
+        result = IndexUpdate()
+
+        current: Dict[str, Path] = {
+            path.relative_to(self.root).as_posix(): path
+            for path in list_data_files(self.root)
+        }
+
+        stale: Set[str] = set()
+        new_segments: List[Segment] = []
+        files: Dict[str, Tuple[int, int, bool]] = {}
+        for relative, path in current.items():
+            stat = path.stat()
+            known = self._files.get(relative)
+            if known is not None and known[:2] == (stat.st_size, stat.st_mtime_ns):
+                files[relative] = known
+                result.unchanged_files += 1
+                continue
+            if known is not None:
+                stale.add(relative)
+            indexed = is_parquet(path)
+            files[relative] = (stat.st_size, stat.st_mtime_ns, indexed)
+            if not indexed:
+                logger.warning("index_file_skipped", file=relative, reason="not parquet")
+                result.skipped_files += 1
+                continue
+            new_segments.extend(index_file(self.root, path))
+            result.added_files += 1
+
+        removed = set(self._files) - set(current)
+        stale |= removed
+        result.removed_files = len(removed)
+
+        segments = [s for s in self.segments() if s.file not in stale] + new_segments
+        self._rebuild(segments, files)
+
+        result.segments = sum(len(s) for s in self._by_session.values())
+        result.elapsed_sec = time.time() - start_time
+        logger.info(
+            "index_updated",
+            root=str(self.root),
+            added=result.added_files,
+            removed=result.removed_files,
+            unchanged=result.unchanged_files,
+            skipped=result.skipped_files,
+            segments=result.segments,
+            elapsed=f"{result.elapsed_sec:.2f}s",
+        )
+        return result
+
+    def save(self) -> None:
+        """Persist the index atomically."""
+        rows = [segment.__dict__ for segment in self.segments()]
+        file_rows = [
+            {"file": file, "file_size": size, "file_mtime_ns": mtime_ns, "indexed": indexed}
+            for file, (size, mtime_ns, indexed) in sorted(self._files.items())
+        ]
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        for path, table in (
+            (self.files_path, pa.Table.from_pylist(file_rows, schema=FILES_SCHEMA)),
+            (self.path, pa.Table.from_pylist(rows, schema=INDEX_SCHEMA)),
+        ):
+            tmp_path = path.with_suffix(".tmp")
+            pq.write_table(table, tmp_path)
+            tmp_path.replace(path)
+
+    def sessions(self, vehicle_id: Optional[str] = None) -> List[SessionSummary]:
+        """
+        List indexed sessions.
+
+        Args:
+            vehicle_id: Restrict to one vehicle
+
+        Returns:
+            Sessions ordered by start time
+        """
+        summaries = []
+        for (vehicle, session), segments in self._by_session.items():
+            if vehicle_id is not None and vehicle != vehicle_id:
+                continue
+            summaries.append(
+                SessionSummary(
+                    vehicle_id=vehicle,
+                    session_id=session,
+                    start_timestamp=min(s.min_timestamp for s in segments),
+                    end_timestamp=max(s.max_timestamp for s in segments),
+                    rows=sum(s.num_rows for s in segments),
+                    files=len({s.file for s in segments}),
+                )
+            )
+        return sorted(summaries, key=lambda s: s.start_timestamp)
+
+    def segments(
+        self,
+        vehicle_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+    ) -> List[Segment]:
+        """
+        Find segments overlapping a time window.
+
+        Args:
+            vehicle_id: Restrict to one vehicle
+            session_id: Restrict to one session
+            start_ms: Window start (inclusive, epoch ms)
+            end_ms: Window end (inclusive, epoch ms)
+
+        Returns:
+            Matching segments ordered by (vehicle, session, time)
+        """
+        matches = []
+        for key, segments in self._by_session.items():
+            if vehicle_id is not None and key[0] != vehicle_id:
+                continue
+            if session_id is not None and key[1] != session_id:
+                continue
+
+            # Segments are sorted by min_timestamp: skip those starting after the window
+            stop = len(segments) if end_ms is None else bisect_right(self._starts[key], end_ms)
+            for segment in segments[:stop]:
+                if start_ms is None or segment.max_timestamp >= start_ms:
+                    matches.append(segment)
+
+        return matches
+
+    def read_window(
+        self,
+        vehicle_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pa.Table:
+        """
+        Read samples for a window, touching only the indexed row groups.
+
+        Args:
+            vehicle_id: Restrict to one vehicle
+            session_id: Restrict to one session
+            start_ms: Window start (inclusive, epoch ms)
+            end_ms: Window end (inclusive, epoch ms)
+            columns: Columns to return (default: all)
+
+        Returns:
+            Arrow table sorted by timestamp
+        """
+        row_groups: Dict[str, Set[int]] = {}
+        for segment in self.segments(vehicle_id, session_id, start_ms, end_ms):
+            row_groups.setdefault(segment.file, set()).add(segment.row_group)
+
+        read_columns = None
+        if columns is not None:
+            read_columns = list(dict.fromkeys([*columns, "vehicle_id", "session_id", "timestamp"]))
+
+        tables = []
+        for relative, groups in sorted(row_groups.items()):
+            parquet = pq.ParquetFile(self.root / relative)
+            table = parquet.read_row_groups(sorted(groups), columns=read_columns)
+            tables.append(self._filter(table, vehicle_id, session_id, start_ms, end_ms))
+
+        if not tables:
+            return pa.table({})
+
+        result = pa.concat_tables(tables).sort_by("timestamp")
+        return result.select(list(columns)) if columns is not None else result
+
+    def drill_down(
+        self,
+        vehicle_id: str,
+        timestamp_ms: int,
+        radius_ms: int = 5000,
+        session_id: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pa.Table:
+        """
+        Read the samples around an anomaly.
+
+        Args:
+            vehicle_id: Vehicle that raised the anomaly
+            timestamp_ms: Anomaly timestamp (epoch ms)
+            radius_ms: Milliseconds before and after the anomaly
+            session_id: Restrict to one session
+            columns: Columns to return (default: all)
+
+        Returns:
+            Arrow table sorted by timestamp
+        """
+        return self.read_window(
+            vehicle_id,
+            session_id,
+            timestamp_ms - radius_ms,
+            timestamp_ms + radius_ms,
+            columns,
+        )
+
+    @staticmethod
+    def _filter(
+        table: pa.Table,
+        vehicle_id: Optional[str],
+        session_id: Optional[str],
+        start_ms: Optional[int],
+        end_ms: Optional[int],
+    ) -> pa.Table:
+        mask = None
+        conditions = []
+        if vehicle_id is not None:
+            conditions.append(pc.equal(table["vehicle_id"], vehicle_id))
+        if session_id is not None:
+            conditions.append(pc.equal(table["session_id"], session_id))
+        if start_ms is not None:
+            conditions.append(pc.greater_equal(table["timestamp"], start_ms))
+        if end_ms is not None:
+            conditions.append(pc.less_equal(table["timestamp"], end_ms))
+
+        for condition in conditions:
+            mask = condition if mask is None else pc.and_(mask, condition)
+        return table if mask is None else table.filter(mask)
+
+    def _rebuild(self, segments: List[Segment], files: Dict[str, Tuple[int, int, bool]]) -> None:
+        by_session: Dict[SessionKey, List[Segment]] = {}
+        for segment in segments:
+            by_session.setdefault((segment.vehicle_id, segment.session_id), []).append(segment)
+
+        for key in by_session:
+            by_session[key].sort(key=lambda s: (s.min_timestamp, s.file, s.row_group))
+
+        self._by_session = by_session
+        self._starts = {key: [s.min_timestamp for s in segs] for key, segs in by_session.items()}
+        self._files = files
+
+    def _load(self) -> None:
+        rows = pq.read_table(self.path, schema=INDEX_SCHEMA).to_pylist()
+        segments = [Segment(**row) for row in rows]
+        if self.files_path.exists():
+            rows = pq.read_table(self.files_path, schema=FILES_SCHEMA).to_pylist()
+            files = {
+                row["file"]: (row["file_size"], row["file_mtime_ns"], row["indexed"])
+                for row in rows
+            }
+        else:
+            # Index written before files.parquet existed: derive stats from segments
+            files = {s.file: (s.file_size, s.file_mtime_ns, True) for s in segments}
+        self._rebuild(segments, files)
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Build or update the telemetry session index")
+    parser.add_argument("root", type=str, help="Partitioned dataset root")
+    args = parser.parse_args()
+
+    index = TelemetryIndex(args.root)
+    index.update()
+    index.save()
+
+    for session in index.sessions():
+        print(
+            f"{session.vehicle_id}  {session.session_id}  "
+            f"{session.start_timestamp}..{session.end_timestamp}  "
+            f"rows={session.rows} files={session.files}"
+        )
+
+
+if __name__ == "__main__":
+    main()
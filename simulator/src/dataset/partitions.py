@@ -0,0 +1,79 @@
+"""
+Local Telemetry Dataset Layout
+
+Helpers for a local mirror of the Firehose output:
+
+    raw/telemetry/year=YYYY/month=MM/day=DD/hour=HH/<object>
+
+Firehose writes objects without a file extension, so every regular file
+below the root is treated as a data file except hidden and underscore
+prefixed entries (e.g. _SUCCESS, .crc), matching the pyarrow convention.
+The format of an object is detected from its leading magic bytes instead.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Union
+
+from ..telemetry.schema import PARTITION_KEYS
+
+PathLike = Union[str, Path]
+
+PARQUET_MAGIC = b"PAR1"
+
+
+def list_data_files(root: PathLike) -> List[Path]:
+    """
+    List data files under a partitioned dataset root.
+
+    Args:
+        root: Dataset root directory (or a single file)
+
+    Returns:
+        Sorted list of file paths (lexicographic = chronological for Hive partitions)
+    """
+    root_path = Path(root)
+    if root_path.is_file():
+        return [root_path]
+
+    files = []
+    for path in root_path.rglob("*"):
+        if not path.is_file():
+            continue
+        relative = path.relative_to(root_path)
+        if any(part.startswith((".", "_")) for part in relative.parts):
+            continue
+        files.append(path)
+
+    return sorted(files)
+
+
+def is_parquet(path: PathLike) -> bool:
+    """
+    Whether a data file is Parquet (Firehose JSON output is gzip or plain JSONL).
+
+    Args:
+        path: Data file
+
+    Returns:
+        True if the file starts with the Parquet magic bytes
+    """
+    with open(path, "rb") as f:
+        return f.read(len(PARQUET_MAGIC)) == PARQUET_MAGIC
+
+
+def parse_partition(path: PathLike) -> Dict[str, int]:
+    """
+    Extract Hive partition values from a file path.
+
+    Args:
+        path: Data file path containing key=value directories
+
+    Returns:
+        Partition values keyed by PARTITION_KEYS (missing keys are omitted)
+    """
+    values: Dict[str, int] = {}
+    for part in Path(path).parts:
+        key, sep, value = part.partition("=")
+        if sep and key in PARTITION_KEYS:
+            values[key] = int(value)
+    return values
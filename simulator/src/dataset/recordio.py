@@ -0,0 +1,544 @@
+"""
+RecordIO-protobuf Training Set Writer
+
+Converts telemetry feature rows from the partitioned Parquet dataset into
+sharded RecordIO-protobuf files, the fastest input format for the SageMaker
+Random Cut Forest container.
+
+Format:
+- RecordIO framing: uint32 magic (0xCED7230A), uint32 length, payload, 4-byte padding
+- Payload: aialgs.data.Record with features["values"] = Float32Tensor | Float64Tensor
+
+Every record has the same width, so the protobuf prefix is encoded once per
+batch and each batch is framed with a single vectorized numpy copy.
+"""
+
+import argparse
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple, Union, cast
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+import structlog
+
+from ..telemetry.schema import FEATURE_COLUMNS, KEY_COLUMNS
+from .asof import DEFAULT_GROUPS, align_groups
+from .partitions import PathLike, list_data_files
+
+logger = structlog.get_logger(__name__)
+
+RECORDIO_MAGIC = 0xCED7230A
+_LENGTH_MASK = (1 << 29) - 1
+
+# Protobuf wire types
+_VARINT = 0
+_FIXED64 = 1
+_LENGTH_DELIMITED = 2
+_FIXED32 = 5
+
+# aialgs.data.Value oneof field numbers
+_FLOAT32_TENSOR = 2
+_FLOAT64_TENSOR = 3
+
+FEATURES_KEY = "values"
+
+
+def _varint(value: int) -> bytes:
+    """Encode an unsigned protobuf varint."""
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _length_delimited_header(field_number: int, length: int) -> bytes:
+    """Encode tag + length for a length-delimited field."""
+    return _varint((field_number << 3) | _LENGTH_DELIMITED) + _varint(length)
+
+
+def record_prefix(width: int, dtype: np.dtype) -> bytes:
+    """
+    Encode the constant protobuf bytes preceding the packed feature values.
+
+    Args:
+        width: Number of features per record
+        dtype: float32 or float64
+
+    Returns:
+        Record bytes up to (not including) the packed values
+    """
+    dtype = np.dtype(dtype)
+    if dtype == np.float32:
+        tensor_field = _FLOAT32_TENSOR
+    elif dtype == np.float64:
+        tensor_field = _FLOAT64_TENSOR
+    else:
+        raise ValueError(f"Unsupported tensor dtype: {dtype}")
+
+    values_len = width * dtype.itemsize
+    key = FEATURES_KEY.encode("utf-8")
+
+    # Float32Tensor/Float64Tensor { repeated values = 1 [packed = true] }
+    tensor_header = _length_delimited_header(1, values_len)
+    tensor_len = len(tensor_header) + values_len
+    # Value { oneof value { ... tensor = 2 | 3 } }
+    value_header = _length_delimited_header(tensor_field, tensor_len)
+    value_len = len(value_header) + tensor_len
+    # map<string, Value> entry { key = 1; value = 2 }
+    key_part = _length_delimited_header(1, len(key)) + key
+    entry_value_header = _length_delimited_header(2, value_len)
+    entry_len = len(key_part) + len(entry_value_header) + value_len
+
+    # Record { map<string, Value> features = 1 }
+    return (
+        _length_delimited_header(1, entry_len)
+        + key_part
+        + entry_value_header
+        + value_header
+        + tensor_header
+    )
+
+
+def encode_dense_batch(rows: np.ndarray, dtype: np.dtype = np.float32) -> bytes:
+    """
+    Encode a 2-D feature matrix as framed RecordIO-protobuf records.
+
+    Args:
+        rows: Array of shape (n_records, n_features)
+        dtype: Tensor dtype written to the records
+
+    Returns:
+        Concatenated RecordIO frames
+    """
+    dtype = np.dtype(dtype).newbyteorder("<")
+    rows = np.ascontiguousarray(rows, dtype=dtype)
+    if rows.ndim != 2:
+        raise ValueError(f"Expected 2-D feature matrix, got shape {rows.shape}")
+
+    n_records, width = rows.shape
+    prefix = record_prefix(width, dtype)
+    payload_len = len(prefix) + width * dtype.itemsize
+    padding = (4 - (payload_len & 0x3)) & 0x3
+    header = struct.pack("<II", RECORDIO_MAGIC, payload_len)
+    frame_len = len(header) + payload_len + padding
+
+    frames = np.zeros((n_records, frame_len), dtype=np.uint8)
+    fixed = np.frombuffer(header + prefix, dtype=np.uint8)
+    frames[:, : len(fixed)] = fixed
+    frames[:, len(fixed) : len(fixed) + width * dtype.itemsize] = rows.view(np.uint8).reshape(
+        n_records, -1
+    )
+    return frames.tobytes()
+
+
+def iter_recordio(stream: BinaryIO) -> Iterator[bytes]:
+    """
+    Iterate over RecordIO payloads.
+
+    Args:
+        stream: Binary file object positioned at a record boundary
+
+    Yields:
+        Raw record payloads
+
+    Raises:
+        ValueError: On bad magic, multi-part records or truncated data
+    """
+    while True:
+        header = stream.read(8)
+        if not header:
+            return
+        if len(header) < 8:
+            raise ValueError("Truncated RecordIO header")
+
+        magic, length_word = struct.unpack("<II", header)
+        if magic != RECORDIO_MAGIC:
+            raise ValueError(f"Invalid RecordIO magic: {magic:#x}")
+        if length_word >> 29:
+            raise ValueError("Multi-part RecordIO records are not supported")
+
+        length = length_word & _LENGTH_MASK
+        payload = stream.read(length)
+        if len(payload) < length:
+            raise ValueError("Truncated RecordIO payload")
+
+        stream.read((4 - (length & 0x3)) & 0x3)
+        yield payload
+
+
+def _iter_fields(buf: bytes) -> Iterator[Tuple[int, int, Union[int, bytes]]]:
+    """Iterate (field_number, wire_type, value) over a protobuf message."""
+    pos = 0
+
+    def read_varint() -> int:
+        nonlocal pos
+        result = 0
+        shift = 0
+        while True:
+            byte = buf[pos]
+            pos += 1
+            result |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return result
+            shift += 7
+
+    while pos < len(buf):
+        tag = read_varint()
+        field_number, wire_type = tag >> 3, tag & 0x7
+        value: Union[int, bytes]
+        if wire_type == _VARINT:
+            value = read_varint()
+        elif wire_type == _LENGTH_DELIMITED:
+            length = read_varint()
+            value = buf[pos : pos + length]
+            pos += length
+        elif wire_type == _FIXED64:
+            value = buf[pos : pos + 8]
+            pos += 8
+        elif wire_type == _FIXED32:
+            value = buf[pos : pos + 4]
+            pos += 4
+        else:
+            raise ValueError(f"Unsupported protobuf wire type: {wire_type}")
+        yield field_number, wire_type, value
+
+
+def _decode_tensor(value: bytes) -> np.ndarray:
+    """Decode an aialgs.data.Value holding a dense float tensor."""
+    for value_field, _, tensor in _iter_fields(value):
+        if value_field == _FLOAT32_TENSOR:
+            dtype = np.dtype("<f4")
+        elif value_field == _FLOAT64_TENSOR:
+            dtype = np.dtype("<f8")
+        else:
+            raise ValueError(f"Unsupported Value field: {value_field}")
+
+        for tensor_field, wire_type, packed in _iter_fields(cast(bytes, tensor)):
+            if tensor_field == 1 and wire_type == _LENGTH_DELIMITED:
+                return np.frombuffer(cast(bytes, packed), dtype=dtype)
+        return np.empty(0, dtype=dtype)
+
+    return np.empty(0, dtype=np.float32)
+
+
+def decode_record(payload: bytes) -> Dict[str, np.ndarray]:
+    """
+    Decode the features map of an aialgs.data.Record.
+
+    Args:
+        payload: Record protobuf bytes
+
+    Returns:
+        Feature tensors keyed by map key
+    """
+    features: Dict[str, np.ndarray] = {}
+
+    for field_number, _, entry in _iter_fields(payload):
+        if field_number != 1:  # only Record.features is used by RCF
+            continue
+
+        key = ""
+        tensor = np.empty(0, dtype=np.float32)
+        for entry_field, _, entry_value in _iter_fields(cast(bytes, entry)):
+            if entry_field == 1:
+                key = cast(bytes, entry_value).decode("utf-8")
+            elif entry_field == 2:
+                tensor = _decode_tensor(cast(bytes, entry_value))
+        features[key] = tensor
+
+    return features
+
+
+def read_dense_records(path: PathLike) -> Iterator[np.ndarray]:
+    """
+    Read feature vectors back from a RecordIO-protobuf file.
+
+    Args:
+        path: Shard path
+
+    Yields:
+        One feature vector per record
+    """
+    with open(path, "rb") as f:
+        for payload in iter_recordio(f):
+            yield decode_record(payload)[FEATURES_KEY]
+
+
+def iter_feature_batches(
+    files: Sequence[PathLike],
+    columns: Sequence[str] = FEATURE_COLUMNS,
+    batch_size: int = 65536,
+) -> Iterator[np.ndarray]:
+    """
+    Stream feature matrices from Parquet files in bounded memory.
+
+    Files holding multi-rate group rows (each row carries one sensor group's
+    channels, the others null) are re-aligned with align_groups one file at a
+    time, so they yield full rows instead of being dropped whole. The first
+    base rows of such a file, before any row of another group, stay incomplete.
+    Rows with missing values are dropped (RCF does not accept NaN).
+
+    Args:
+        files: Parquet file paths
+        columns: Feature columns, in output order
+        batch_size: Maximum rows per Arrow record batch
+
+    Yields:
+        float64 arrays of shape (n_rows, len(columns))
+
+    Raises:
+        ValueError: If a file with group rows lacks the key columns needed to align it
+    """
+    for batch in _iter_aligned_batches(files, columns, batch_size):
+        if batch.num_rows == 0:
+            continue
+        matrix = np.column_stack(
+            [
+                batch.column(name).to_numpy(zero_copy_only=False).astype(np.float64)
+                for name in columns
+            ]
+        )
+        yield matrix[~np.isnan(matrix).any(axis=1)]
+
+
+def _iter_aligned_batches(
+    files: Sequence[PathLike], columns: Sequence[str], batch_size: int
+) -> Iterator[pa.RecordBatch]:
+    """Record batches of columns per file, group rows re-aligned into full rows."""
+    first_channels = [channels[0] for channels in DEFAULT_GROUPS.values()]
+    group_columns = [name for channels in DEFAULT_GROUPS.values() for name in channels]
+    for path in files:
+        dataset = ds.dataset(str(path), format="parquet")
+        names = dataset.schema.names
+        has_group_rows = all(name in names for name in first_channels) and any(
+            dataset.count_rows(filter=ds.field(name).is_null()) for name in first_channels
+        )
+        if not has_group_rows:
+            yield from dataset.to_batches(columns=list(columns), batch_size=batch_size)
+            continue
+
+        missing = [name for name in KEY_COLUMNS if name not in names]
+        if missing:
+            raise ValueError(f"{path} has multi-rate group rows but no {missing} to align them")
+        # One file (an hour or less of one delivery stream) is aligned in memory
+        table = dataset.to_table(columns=[*KEY_COLUMNS, *group_columns])
+        yield from align_groups(table).select(list(columns)).to_batches(max_chunksize=batch_size)
+
+
+@dataclass
+class Shard:
+    """A written RecordIO shard."""
+
+    path: Path
+    records: int
+
+
+class ShardedRecordIOWriter:
+    """
+    Writes feature matrices into fixed-size RecordIO-protobuf shards.
+
+    Usage:
+        with ShardedRecordIOWriter("out/", records_per_shard=100_000) as writer:
+            writer.write(matrix)
+    """
+
+    def __init__(
+        self,
+        output_dir: PathLike,
+        records_per_shard: int = 100_000,
+        dtype: np.dtype = np.float32,
+        prefix: str = "part",
+    ):
+        """
+        Initialize shard writer.
+
+        Args:
+            output_dir: Directory receiving the shards
+            records_per_shard: Maximum records per shard file
+            dtype: Tensor dtype (float32 halves the file size)
+            prefix: Shard file name prefix
+        """
+        if records_per_shard <= 0:
+            raise ValueError("records_per_shard must be positive")
+
+        self.output_dir = Path(output_dir)
+        self.records_per_shard = records_per_shard
+        self.dtype = np.dtype(dtype)
+        self.prefix = prefix
+
+        self.shards: List[Shard] = []
+        self._file: Optional[BinaryIO] = None
+        self._current_records = 0
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def write(self, rows: np.ndarray) -> None:
+        """
+        Append records, rolling over to a new shard when the current one is full.
+
+        Args:
+            rows: Array of shape (n_records, n_features)
+        """
+        start = 0
+        while start < len(rows):
+            shard_file = self._file if self._file is not None else self._open_shard()
+            room = self.records_per_shard - self._current_records
+            chunk = rows[start : start + room]
+            shard_file.write(encode_dense_batch(chunk, self.dtype))
+            self._current_records += len(chunk)
+            self.shards[-1].records = self._current_records
+            start += len(chunk)
+
+            if self._current_records >= self.records_per_shard:
+                self._close_shard()
+
+    def close(self) -> List[Shard]:
+        """Close the open shard and return all written shards."""
+        self._close_shard()
+        return self.shards
+
+    def _open_shard(self) -> BinaryIO:
+        path = self.output_dir / f"{self.prefix}-{len(self.shards):05d}.rec"
+        shard_file = open(path, "wb")
+        self._file = shard_file
+        self._current_records = 0
+        self.shards.append(Shard(path=path, records=0))
+        return shard_file
+
+    def _close_shard(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "ShardedRecordIOWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+@dataclass
+class ConversionResult:
+    """Summary of a Parquet → RecordIO conversion."""
+
+    shards: List[Shard] = field(default_factory=list)
+    records: int = 0
+    dropped: int = 0  # incomplete rows, and group rows merged into aligned rows
+    elapsed_sec: float = 0.0
+
+
+def _convert_files(
+    files: Sequence[Path],
+    output_dir: Path,
+    prefix: str,
+    records_per_shard: int,
+    dtype: np.dtype,
+    batch_size: int,
+) -> ConversionResult:
+    """Convert one group of input files (runs inside a worker process)."""
+    result = ConversionResult()
+    with ShardedRecordIOWriter(output_dir, records_per_shard, dtype, prefix) as writer:
+        dataset = ds.dataset([str(f) for f in files], format="parquet")
+        total_rows = dataset.count_rows()
+        for matrix in iter_feature_batches(files, batch_size=batch_size):
+            writer.write(matrix)
+            result.records += len(matrix)
+    result.shards = writer.shards
+    result.dropped = total_rows - result.records
+    return result
+
+
+def convert_dataset(
+    source: PathLike,
+    output_dir: PathLike,
+    records_per_shard: int = 100_000,
+    float32: bool = True,
+    workers: int = 1,
+    batch_size: int = 65536,
+) -> ConversionResult:
+    """
+    Convert a partitioned Parquet dataset into sharded RecordIO-protobuf files.
+
+    Input files are split into contiguous groups (preserving time order within
+    each group) and each group is written by its own process.
+
+    Args:
+        source: Dataset root (e.g. a local copy of raw/telemetry)
+        output_dir: Directory receiving part-<group>-<shard>.rec files
+        records_per_shard: Maximum records per shard
+        float32: Down-cast features to float32
+        workers: Number of writer processes
+        batch_size: Rows per streamed Arrow batch
+
+    Returns:
+        ConversionResult with shard list and record counts
+    """
+    start_time = time.time()
+    files = list_data_files(source)
+    dtype = np.dtype(np.float32 if float32 else np.float64)
+    output_path = Path(output_dir)
+
+    if not files:
+        logger.warning("recordio_no_input", source=str(source))
+        return ConversionResult()
+
+    workers = max(1, min(workers, len(files)))
+    groups = [list(group) for group in np.array_split(np.array(files, dtype=object), workers)]
+    jobs = [
+        (group, output_path, f"part-{index:03d}", records_per_shard, dtype, batch_size)
+        for index, group in enumerate(groups)
+    ]
+
+    if workers == 1:
+        partials = [_convert_files(*jobs[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = list(pool.map(_convert_files, *zip(*jobs)))
+
+    result = ConversionResult()
+    for partial in partials:
+        result.shards.extend(partial.shards)
+        result.records += partial.records
+        result.dropped += partial.dropped
+    result.elapsed_sec = time.time() - start_time
+
+    logger.info(
+        "recordio_converted",
+        files=len(files),
+        shards=len(result.shards),
+        records=result.records,
+        dropped=result.dropped,
+        dtype=str(dtype),
+        elapsed=f"{result.elapsed_sec:.1f}s",
+    )
+    return result
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Convert telemetry Parquet to RecordIO-protobuf")
+    parser.add_argument("source", type=str, help="Partitioned Parquet dataset root")
+    parser.add_argument("output", type=str, help="Output directory for .rec shards")
+    parser.add_argument("--records-per-shard", type=int, default=100_000)
+    parser.add_argument("--float64", action="store_true", help="Keep float64 precision")
+    parser.add_argument("--workers", type=int, default=1, help="Parallel writer processes")
+    args = parser.parse_args()
+
+    convert_dataset(
+        args.source,
+        args.output,
+        records_per_shard=args.records_per_shard,
+        float32=not args.float64,
+        workers=args.workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
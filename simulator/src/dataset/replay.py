@@ -0,0 +1,298 @@
+"""
+Recorded Telemetry Replay
+
+Re-sends recorded samples from local Parquet or JSONL partitions through
+IoTPublisher, in timestamp order, at 1x, Nx or maximum speed.
+
+- Files are read lazily in record batches (Parquet) or line by line (JSONL),
+  so memory is bounded by batch_size × overlapping files
+- Streams are merged with a k-way heap merge on timestamp; a file is only
+  opened once the merge reaches its first timestamp
+- Each file is assumed to be time-ordered (Firehose writes in arrival order)
+- Timestamps, session ids and vehicle ids can be rewritten on the way out
+"""
+
+import gzip
+import heapq
+import itertools
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pyarrow.parquet as pq
+import structlog
+
+from .partitions import PathLike, is_parquet, list_data_files
+
+logger = structlog.get_logger(__name__)
+
+Record = Dict[str, Any]
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _open_text(path: Path) -> Any:
+    with open(path, "rb") as f:
+        head = f.read(2)
+    if head == GZIP_MAGIC:
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def iter_file(path: Path, batch_size: int = 4096) -> Iterator[Record]:
+    """
+    Stream records from one Parquet or (optionally gzipped) JSONL file.
+
+    Args:
+        path: Data file (format detected from magic bytes)
+        batch_size: Rows per Parquet record batch
+
+    Yields:
+        Telemetry records
+    """
+    if is_parquet(path):
+        parquet = pq.ParquetFile(path)
+        for batch in parquet.iter_batches(batch_size=batch_size):
+            yield from batch.to_pylist()
+        return
+
+    with _open_text(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def first_timestamp(path: Path) -> Optional[int]:
+    """
+    Smallest timestamp in a file, without reading its data pages when possible.
+
+    Args:
+        path: Data file
+
+    Returns:
+        Epoch milliseconds, or None for an empty file
+    """
+    if is_parquet(path):
+        metadata = pq.ParquetFile(path).metadata
+        column = metadata.schema.names.index("timestamp")
+        minimums = []
+        for row_group in range(metadata.num_row_groups):
+            stats = metadata.row_group(row_group).column(column).statistics
+            if stats is None or not stats.has_min_max:
+                minimums = []
+                break
+            minimums.append(stats.min)
+        if minimums:
+            return int(min(minimums))
+
+    for record in iter_file(path, batch_size=1):
+        return int(record["timestamp"])
+    return None
+
+
+class ReplaySource:
+    """
+    Time-ordered merge of recorded telemetry files.
+
+    Usage:
+        for record in ReplaySource("data/raw/telemetry", vehicles=["GT3-RACER-01"]):
+            ...
+    """
+
+    def __init__(
+        self,
+        root: PathLike,
+        vehicles: Optional[Sequence[str]] = None,
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+        batch_size: int = 4096,
+    ):
+        """
+        Initialize replay source.
+
+        Args:
+            root: Dataset root or single file
+            vehicles: Only replay these vehicle ids
+            start_ms: Skip records before this timestamp
+            end_ms: Stop after this timestamp
+            batch_size: Rows per Parquet record batch
+        """
+        self.vehicles = set(vehicles) if vehicles is not None else None
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.batch_size = batch_size
+
+        files = []
+        for path in list_data_files(root):
+            first = first_timestamp(path)
+            if first is not None:
+                files.append((first, path))
+        self.files: List[Tuple[int, Path]] = sorted(files)
+
+    def __iter__(self) -> Iterator[Record]:
+        counter = itertools.count()  # tie-breaker, records are not comparable
+        heap: List[Tuple[int, int, Record, Iterator[Record]]] = []
+        pending = iter(f for f in self.files if self.end_ms is None or f[0] <= self.end_ms)
+        next_file = next(pending, None)
+
+        def push(stream: Iterator[Record]) -> None:
+            for record in stream:
+                if self._accept(record):
+                    heapq.heappush(heap, (int(record["timestamp"]), next(counter), record, stream))
+                    return
+
+        while heap or next_file is not None:
+            # Open every file starting at or before the current merge position
+            while next_file is not None and (not heap or next_file[0] <= heap[0][0]):
+                push(iter_file(next_file[1], self.batch_size))
+                next_file = next(pending, None)
+
+            if not heap:
+                continue
+
+            timestamp, _, record, stream = heapq.heappop(heap)
+            if self.end_ms is not None and timestamp > self.end_ms:
+                return
+            yield record
+            push(stream)
+
+    def _accept(self, record: Record) -> bool:
+        if self.vehicles is not None and record.get("vehicle_id") not in self.vehicles:
+            return False
+        if self.start_ms is not None and int(record["timestamp"]) < self.start_ms:
+            return False
+        return True
+
+
+@dataclass
+class ReplayRewrite:
+    """
+    Field rewrites applied to replayed records.
+
+    Attributes:
+        rebase_to_ms: New timestamp of the first replayed record (None keeps originals);
+            later records are spaced as they are sent (original spacing / speed)
+        new_session_ids: Map each original session_id to a fresh UUID
+        vehicle_ids: Explicit vehicle_id renames
+    """
+
+    rebase_to_ms: Optional[int] = None
+    new_session_ids: bool = False
+    vehicle_ids: Dict[str, str] = field(default_factory=dict)
+
+    _sessions: Dict[str, str] = field(default_factory=dict, repr=False)
+
+    def apply(self, record: Record, offset_ms: float) -> Record:
+        """
+        Rewrite one record.
+
+        Args:
+            record: Recorded sample (not modified)
+            offset_ms: Offset from the first record in replay time
+
+        Returns:
+            Rewritten copy
+        """
+        out = dict(record)
+        if self.rebase_to_ms is not None:
+            out["timestamp"] = int(self.rebase_to_ms + offset_ms)
+        if self.new_session_ids and "session_id" in out:
+            out["session_id"] = self._sessions.setdefault(out["session_id"], str(uuid.uuid4()))
+        if out.get("vehicle_id") in self.vehicle_ids:
+            out["vehicle_id"] = self.vehicle_ids[out["vehicle_id"]]
+        return out
+
+
+@dataclass
+class ReplayStats:
+    """Replay progress counters."""
+
+    sent: int = 0
+    errors: int = 0
+    elapsed_sec: float = 0.0
+    max_lag_ms: float = 0.0  # worst delay behind the replay schedule
+
+
+class Replayer:
+    """
+    Paces a ReplaySource through a publish callable.
+
+    Usage:
+        replayer = Replayer(source, iot_publisher.publish, speed=10.0)
+        stats = replayer.run()
+    """
+
+    def __init__(
+        self,
+        source: ReplaySource,
+        publish: Callable[[Record], None],
+        speed: float = 1.0,
+        rewrite: Optional[ReplayRewrite] = None,
+    ):
+        """
+        Initialize replayer.
+
+        Args:
+            source: Time-ordered records
+            publish: Called once per record (e.g. IoTPublisher.publish)
+            speed: Replay speed multiplier (0 = as fast as possible)
+            rewrite: Field rewrites (default: send records unchanged)
+        """
+        self.source = source
+        self.publish = publish
+        self.speed = speed
+        self.rewrite = rewrite or ReplayRewrite()
+
+    def run(self, max_records: Optional[int] = None) -> ReplayStats:
+        """
+        Replay until the source is exhausted.
+
+        Args:
+            max_records: Stop after this many records
+
+        Returns:
+            ReplayStats
+        """
+        stats = ReplayStats()
+        wall_start = time.monotonic()
+        first_ms: Optional[int] = None
+
+        for record in self.source:
+            if max_records is not None and stats.sent + stats.errors >= max_records:
+                break
+
+            timestamp = int(record["timestamp"])
+            if first_ms is None:
+                first_ms = timestamp
+            offset_ms = float(timestamp - first_ms)
+
+            if self.speed > 0:
+                offset_ms /= self.speed
+                delay = wall_start + offset_ms / 1000.0 - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    stats.max_lag_ms = max(stats.max_lag_ms, -delay * 1000.0)
+
+            try:
+                self.publish(self.rewrite.apply(record, offset_ms))
+                stats.sent += 1
+            except Exception as e:
+                stats.errors += 1
+                logger.error("replay_publish_error", error=str(e))
+
+            if (stats.sent + stats.errors) % 1000 == 0:
+                elapsed = time.monotonic() - wall_start
+                logger.info(
+                    "replay_progress",
+                    sent=stats.sent,
+                    rate=f"{stats.sent / elapsed:.1f} msg/s" if elapsed > 0 else "n/a",
+                    max_lag=f"{stats.max_lag_ms:.0f}ms",
+                )
+
+        stats.elapsed_sec = time.monotonic() - wall_start
+        return stats
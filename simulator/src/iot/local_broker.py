@@ -0,0 +1,193 @@
+"""
+Local Stand-In MQTT Broker
+
+In-process replacement for an awscrt mqtt.Connection, used to load test the
+publish path without AWS IoT Core. Acknowledgements are delayed by:
+- service_time: per-message broker processing time (serialized across all
+  connections, so it models broker throughput)
+- latency + jitter: network round trip (pipelined, does not limit throughput)
+
+With a Deduplicator, the broker also acts as a local sink that counts QoS1
+redeliveries (publishes retried after a PUBACK timeout). Batched group
+envelopes are unpacked into their samples; other payloads are not checked.
+"""
+
+import heapq
+import itertools
+import json
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import structlog
+
+from ..dataset.dedup import Deduplicator
+
+logger = structlog.get_logger(__name__)
+
+
+def telemetry_samples(payload: bytes) -> List[Mapping[str, Any]]:
+    """
+    Telemetry samples carried by one message.
+
+    Args:
+        payload: Message body: a sample, or a GroupBatcher envelope
+            ({"sensor_group", "samples": [...]})
+
+    Returns:
+        The samples (empty for anything else, e.g. non-JSON or control messages)
+    """
+    try:
+        message = json.loads(payload)
+    except ValueError:
+        return []
+    if not isinstance(message, dict):
+        return []
+    if isinstance(message.get("samples"), list):
+        group = message.get("sensor_group")
+        samples = []
+        for sample in message["samples"]:
+            if isinstance(sample, dict) and "timestamp" in sample:
+                samples.append(sample if group is None else {"sensor_group": group, **sample})
+        return samples
+    return [message] if "timestamp" in message else []
+
+
+class LocalBroker:
+    """
+    Shared broker state with a single ack scheduler thread.
+
+    Usage:
+        broker = LocalBroker(latency_ms=20)
+        publisher = IoTPublisher(..., connection_factory=broker.connection)
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 20.0,
+        jitter_ms: float = 5.0,
+        service_time_ms: float = 0.0,
+        deduplicator: Optional[Deduplicator] = None,
+    ):
+        """
+        Initialize broker.
+
+        Args:
+            latency_ms: Base publish → PUBACK round trip
+            jitter_ms: Uniform random extra latency (0 to jitter_ms)
+            service_time_ms: Broker processing time per message
+            deduplicator: Count redelivered telemetry samples (see deduplicator.stats)
+        """
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.service_time = service_time_ms / 1000.0
+        self.deduplicator = deduplicator
+
+        self.messages = 0
+        self.bytes = 0
+        self.topics: Dict[str, int] = {}
+        self.unchecked = 0  # messages without telemetry samples (deduplicator set)
+
+        self._pending: List[Tuple[float, int, Future]] = []
+        self._sequence = itertools.count()
+        self._busy_until = 0.0
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def connection(self) -> "LocalConnection":
+        """Create a client connection (matches IoTPublisher connection_factory)."""
+        return LocalConnection(self)
+
+    def schedule_ack(self, topic: str, size: int, payload: Optional[bytes] = None) -> Future:
+        """
+        Accept a message and return a future resolved when it is acknowledged.
+
+        Args:
+            topic: MQTT topic
+            size: Payload size in bytes
+            payload: Message body, checked for redeliveries when a deduplicator is set
+
+        Returns:
+            Future completing with the packet id (ConnectionError once the broker is closed)
+        """
+        future: Future = Future()
+        now = time.monotonic()
+        check = self.deduplicator is not None and payload is not None
+        samples = telemetry_samples(payload) if check else []
+
+        with self._condition:
+            if self._closed:
+                future.set_exception(ConnectionError("Local broker is closed"))
+                return future
+            self.messages += 1
+            self.bytes += size
+            self.topics[topic] = self.topics.get(topic, 0) + 1
+            if self.deduplicator is not None:
+                if not samples:
+                    self.unchecked += 1
+                for sample in samples:
+                    self.deduplicator.is_duplicate(sample)
+
+            start = max(now, self._busy_until)
+            self._busy_until = start + self.service_time
+            due = self._busy_until + self.latency + random.uniform(0, self.jitter)
+
+            packet_id = next(self._sequence)
+            heapq.heappush(self._pending, (due, packet_id, future))
+            self._ensure_thread()
+            self._condition.notify()
+
+        return future
+
+    def close(self) -> None:
+        """Stop the ack scheduler; unacknowledged publishes fail with ConnectionError."""
+        with self._condition:
+            self._closed = True
+            pending, self._pending = self._pending, []
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        for _, _, future in pending:
+            future.set_exception(ConnectionError("Local broker closed before the PUBACK"))
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="local-broker", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed and (
+                    not self._pending or self._pending[0][0] > time.monotonic()
+                ):
+                    timeout = self._pending[0][0] - time.monotonic() if self._pending else None
+                    self._condition.wait(timeout=timeout)
+                if self._closed:
+                    return
+                _, packet_id, future = heapq.heappop(self._pending)
+            future.set_result(packet_id)
+
+
+class LocalConnection:
+    """Client connection with the subset of the awscrt mqtt.Connection API used here."""
+
+    def __init__(self, broker: LocalBroker):
+        self.broker = broker
+
+    def connect(self) -> Future:
+        future: Future = Future()
+        future.set_result({"session_present": False})
+        return future
+
+    def publish(self, topic: str, payload: bytes, qos: Any) -> Tuple[Future, int]:
+        future = self.broker.schedule_ack(topic, len(payload), payload)
+        return future, 0
+
+    def disconnect(self) -> Future:
+        future: Future = Future()
+        future.set_result({})
+        return future
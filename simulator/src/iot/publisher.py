@@ -6,7 +6,7 @@ Handles secure MQTT connection and message publishing to AWS IoT Core.
 
 import json
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, Optional
 from awsiot import mqtt_connection_builder
 from awscrt import mqtt
 import structlog
@@ -35,6 +35,7 @@ class IoTPublisher:
         ca_path: str,
         client_id: str,
         topic: str,
+        connection_factory: Optional[Callable[[], Any]] = None,
     ):
         """
         Initialize IoT publisher.
@@ -46,6 +47,8 @@ class IoTPublisher:
             ca_path: Path to Amazon Root CA certificate
             client_id: MQTT client ID (should match Thing name)
             topic: MQTT topic to publish to
+            connection_factory: Builds the MQTT connection (default: mTLS to IoT Core);
+                e.g. LocalBroker.connection for load tests
         """
         self.endpoint = endpoint
         self.cert_path = cert_path
@@ -53,6 +56,7 @@ class IoTPublisher:
         self.ca_path = ca_path
         self.client_id = client_id
         self.topic = topic
+        self.connection_factory = connection_factory
 
         self.mqtt_connection: Optional[mqtt.Connection] = None
         self.connected = False
@@ -71,15 +75,18 @@ class IoTPublisher:
             client_id=self.client_id,
         )
 
-        self.mqtt_connection = mqtt_connection_builder.mtls_from_path(
-            endpoint=self.endpoint,
-            cert_filepath=self.cert_path,
-            pri_key_filepath=self.private_key_path,
-            ca_filepath=self.ca_path,
-            client_id=self.client_id,
-            clean_session=False,
-            keep_alive_secs=30,
-        )
+        if self.connection_factory is not None:
+            self.mqtt_connection = self.connection_factory()
+        else:
+            self.mqtt_connection = mqtt_connection_builder.mtls_from_path(
+                endpoint=self.endpoint,
+                cert_filepath=self.cert_path,
+                pri_key_filepath=self.private_key_path,
+                ca_filepath=self.ca_path,
+                client_id=self.client_id,
+                clean_session=False,
+                keep_alive_secs=30,
+            )
 
         # Connect with timeout
         connect_future = self.mqtt_connection.connect()
@@ -89,12 +96,13 @@ class IoTPublisher:
         logger.info("iot_connected", client_id=self.client_id)
 
     @ExponentialBackoff(max_retries=3, base_delay=0.5, max_delay=10.0)
-    def publish(self, payload: Dict[str, Any]) -> None:
+    def publish(self, payload: Dict[str, Any], topic: Optional[str] = None) -> None:
         """
         Publish telemetry message to IoT Core.
 
         Args:
             payload: Telemetry data dictionary
+            topic: Override the default topic (e.g. per sensor group)
 
         Raises:
             Exception: If publish fails after retries
@@ -104,10 +112,11 @@ class IoTPublisher:
 
         # Serialize to JSON
         message = json.dumps(payload).encode("utf-8")
+        topic = topic or self.topic
 
         # Publish with QoS 1
         publish_future, _ = self.mqtt_connection.publish(
-            topic=self.topic, payload=message, qos=mqtt.QoS.AT_LEAST_ONCE
+            topic=topic, payload=message, qos=mqtt.QoS.AT_LEAST_ONCE
         )
 
         # Wait for publish confirmation
@@ -115,7 +124,7 @@ class IoTPublisher:
 
         logger.debug(
             "message_published",
-            topic=self.topic,
+            topic=topic,
             size=len(message),
             vehicle_id=payload.get("vehicle_id"),
         )
@@ -0,0 +1,382 @@
+"""
+Capacity Search Load Generator
+
+Answers "how many cars at what Hz can one simulator host drive?".
+
+Ramps the aggregate target publish rate in steps across N simulated cars
+(one thread, TelemetryGenerator and IoTPublisher per car) and measures, per
+step:
+- Achieved publish rate
+- Publish latency percentiles (IoTPublisher.publish, including PUBACK wait)
+- Backlog growth (messages scheduled but not yet sent)
+- Time spent per stage: generate and publish count the car thread's CPU
+  time, ack_wait the rest of each publish call (blocked on the PUBACK)
+
+The first step whose achieved rate or backlog growth misses the target is
+the saturation knee; the busiest stage at that step is the limiting stage
+(ack_wait means the broker or network, not the host, is the limit).
+
+Usage:
+    python -m src.loadtest --config config/default.yml --cars 10 --transport local
+"""
+
+import argparse
+import dataclasses
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import numpy as np
+import structlog
+
+from .config.loader import SimulatorConfig, load_config
+from .dataset.dedup import Deduplicator, format_stats
+from .iot.local_broker import LocalBroker
+from .iot.publisher import IoTPublisher
+from .telemetry.generator import TelemetryGenerator
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass
+class CarStepStats:
+    """Per-car measurements for one step."""
+
+    scheduled: int = 0
+    sent: int = 0
+    errors: int = 0
+    generate_sec: float = 0.0  # thread CPU time
+    publish_sec: float = 0.0  # thread CPU time (serialize and send)
+    ack_wait_sec: float = 0.0  # wall time in publish not spent on CPU
+    latencies_ms: List[float] = field(default_factory=list)
+
+
+@dataclass
+class StepResult:
+    """Aggregate measurements for one ramp step."""
+
+    target_rate: float
+    achieved_rate: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    backlog: int
+    backlog_growth: float  # msg/s
+    errors: int
+    generate_utilization: float  # busy fraction per car thread
+    publish_utilization: float
+    ack_wait_utilization: float  # fraction per car thread blocked on PUBACKs
+    saturated: bool = False
+
+    @property
+    def limiting_stage(self) -> str:
+        utilization = {
+            "generate": self.generate_utilization,
+            "publish": self.publish_utilization,
+            "ack_wait": self.ack_wait_utilization,
+        }
+        return max(utilization, key=utilization.__getitem__)
+
+
+@dataclass
+class CapacityReport:
+    """Outcome of a capacity search."""
+
+    cars: int
+    steps: List[StepResult]
+    knee: Optional[StepResult] = None
+
+    @property
+    def max_sustainable_rate(self) -> float:
+        """Achieved rate of the last unsaturated step."""
+        sustained = [s.achieved_rate for s in self.steps if not s.saturated]
+        return max(sustained) if sustained else 0.0
+
+
+def car_vehicle_id(config: SimulatorConfig, index: int) -> str:
+    """Vehicle id of the index-th simulated car."""
+    return f"{config.vehicle.vehicle_id}-{index:03d}"
+
+
+class SimulatedCar:
+    """One vehicle: its own generator, publisher and client id."""
+
+    def __init__(self, config: SimulatorConfig, index: int, publisher: IoTPublisher):
+        vehicle = dataclasses.replace(config.vehicle, vehicle_id=car_vehicle_id(config, index))
+        self.generator = TelemetryGenerator(dataclasses.replace(config, vehicle=vehicle))
+        self.publisher = publisher
+
+    def run_step(self, rate_hz: float, start: float, end: float, stats: CarStepStats) -> None:
+        """
+        Publish on a fixed schedule between start and end (perf_counter time).
+
+        Args:
+            rate_hz: Per-car target rate
+            start: Step start
+            end: Step end
+            stats: Measurements to fill in
+        """
+        interval = 1.0 / rate_hz
+        stats.scheduled = int((end - start) * rate_hz)
+
+        while stats.sent + stats.errors < stats.scheduled:
+            now = time.perf_counter()
+            if now >= end:
+                break
+            due = start + (stats.sent + stats.errors) * interval
+            if due > now:
+                time.sleep(due - now)
+
+            # Thread CPU time is work; the rest of publish() is waiting for the PUBACK
+            c0 = time.thread_time()
+            sample = self.generator.generate_sample(time.time())
+            c1, t1 = time.thread_time(), time.perf_counter()
+            try:
+                self.publisher.publish(sample)
+                stats.sent += 1
+            except Exception:
+                stats.errors += 1
+            c2, t2 = time.thread_time(), time.perf_counter()
+
+            stats.generate_sec += c1 - c0
+            stats.publish_sec += c2 - c1
+            stats.ack_wait_sec += max(0.0, (t2 - t1) - (c2 - c1))
+            stats.latencies_ms.append((t2 - t1) * 1000.0)
+
+
+class CapacitySearch:
+    """
+    Ramps aggregate rate until the publish path saturates.
+
+    Usage:
+        search = CapacitySearch(cars, start_rate=50, step_rate=50, steps=20)
+        report = search.run()
+    """
+
+    def __init__(
+        self,
+        cars: List[SimulatedCar],
+        start_rate: float = 10.0,
+        step_rate: float = 10.0,
+        steps: int = 10,
+        step_duration: float = 10.0,
+        tolerance: float = 0.05,
+        stop_at_knee: bool = True,
+    ):
+        """
+        Initialize capacity search.
+
+        Args:
+            cars: Simulated cars sharing the aggregate rate
+            start_rate: Aggregate target rate of the first step (msg/s)
+            step_rate: Aggregate rate increment per step (msg/s)
+            steps: Maximum number of steps
+            step_duration: Seconds per step
+            tolerance: Allowed shortfall (fraction of target) before a step is saturated
+            stop_at_knee: Stop after the first saturated step
+        """
+        self.cars = cars
+        self.start_rate = start_rate
+        self.step_rate = step_rate
+        self.steps = steps
+        self.step_duration = step_duration
+        self.tolerance = tolerance
+        self.stop_at_knee = stop_at_knee
+
+    def run(self) -> CapacityReport:
+        """Run the ramp and return the report."""
+        report = CapacityReport(cars=len(self.cars), steps=[])
+
+        for step in range(self.steps):
+            target = self.start_rate + step * self.step_rate
+            result = self.run_step(target)
+            report.steps.append(result)
+
+            logger.info(
+                "loadtest_step",
+                step=step,
+                target_rate=f"{result.target_rate:.1f}",
+                achieved_rate=f"{result.achieved_rate:.1f}",
+                p50_ms=f"{result.p50_ms:.1f}",
+                p99_ms=f"{result.p99_ms:.1f}",
+                backlog_growth=f"{result.backlog_growth:.1f} msg/s",
+                limiting_stage=result.limiting_stage,
+                saturated=result.saturated,
+            )
+
+            if result.saturated and report.knee is None:
+                report.knee = result
+                if self.stop_at_knee:
+                    break
+
+        return report
+
+    def run_step(self, target_rate: float) -> StepResult:
+        """
+        Drive all cars at target_rate (aggregate) for one step.
+
+        Args:
+            target_rate: Aggregate target rate (msg/s)
+
+        Returns:
+            StepResult
+        """
+        per_car_rate = target_rate / len(self.cars)
+        stats = [CarStepStats() for _ in self.cars]
+        start = time.perf_counter() + 0.05
+        end = start + self.step_duration
+
+        threads = [
+            threading.Thread(target=car.run_step, args=(per_car_rate, start, end, car_stats))
+            for car, car_stats in zip(self.cars, stats)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        elapsed = max(time.perf_counter(), end) - start
+        sent = sum(s.sent for s in stats)
+        errors = sum(s.errors for s in stats)
+        backlog = sum(s.scheduled - s.sent - s.errors for s in stats)
+        latencies = np.concatenate([np.asarray(s.latencies_ms) for s in stats] + [np.zeros(0)])
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0, 0, 0)
+
+        achieved = sent / elapsed
+        backlog_growth = backlog / self.step_duration
+        busy = self.step_duration * len(self.cars)
+
+        return StepResult(
+            target_rate=target_rate,
+            achieved_rate=achieved,
+            p50_ms=float(p50),
+            p95_ms=float(p95),
+            p99_ms=float(p99),
+            backlog=backlog,
+            backlog_growth=backlog_growth,
+            errors=errors,
+            generate_utilization=sum(s.generate_sec for s in stats) / busy,
+            publish_utilization=sum(s.publish_sec for s in stats) / busy,
+            ack_wait_utilization=sum(s.ack_wait_sec for s in stats) / busy,
+            saturated=(
+                achieved < (1 - self.tolerance) * target_rate
+                or backlog_growth > self.tolerance * target_rate
+                or errors > 0
+            ),
+        )
+
+
+def format_report(report: CapacityReport) -> str:
+    """Render the report as a text table."""
+    lines = [
+        f"{'target':>8} {'achieved':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'backlog/s':>10} {'gen %':>6} {'pub %':>6} {'ack %':>6}  stage",
+    ]
+    for step in report.steps:
+        lines.append(
+            f"{step.target_rate:8.1f} {step.achieved_rate:9.1f} {step.p50_ms:8.2f} "
+            f"{step.p95_ms:8.2f} {step.p99_ms:8.2f} {step.backlog_growth:10.1f} "
+            f"{step.generate_utilization * 100:6.1f} {step.publish_utilization * 100:6.1f} "
+            f"{step.ack_wait_utilization * 100:6.1f}  "
+            f"{step.limiting_stage}{'  <- knee' if step is report.knee else ''}"
+        )
+
+    lines.append("")
+    lines.append(f"cars: {report.cars}")
+    lines.append(f"max sustainable rate: {report.max_sustainable_rate:.1f} msg/s")
+    if report.knee is not None:
+        lines.append(
+            f"saturation knee: {report.knee.target_rate:.1f} msg/s target "
+            f"(limiting stage: {report.knee.limiting_stage})"
+        )
+    else:
+        lines.append("saturation knee: not reached")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Redline simulator capacity search")
+    parser.add_argument("--config", type=str, default="config/default.yml")
+    parser.add_argument("--cars", type=int, default=1, help="Simulated vehicles")
+    parser.add_argument("--start-rate", type=float, default=10.0, help="Aggregate msg/s")
+    parser.add_argument("--step-rate", type=float, default=10.0, help="Increment per step")
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--step-duration", type=float, default=10.0, help="Seconds per step")
+    parser.add_argument("--tolerance", type=float, default=0.05)
+    parser.add_argument(
+        "--transport",
+        choices=["local", "iot"],
+        default="local",
+        help="iot publishes as the configured thing, so it allows a single car only",
+    )
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Local broker RTT")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="Local broker jitter")
+    parser.add_argument(
+        "--service-time-ms", type=float, default=0.0, help="Local broker per-message cost"
+    )
+    parser.add_argument(
+        "--dedup", action="store_true", help="Count QoS1 redeliveries at the local broker"
+    )
+    args = parser.parse_args()
+    if args.transport == "iot" and args.cars > 1:
+        # The IoT policy only lets a client connect as its own thing name and publish to
+        # car/<thing>/telemetry, and the config holds one thing's certificate
+        parser.error("--transport iot supports --cars 1 only; use --transport local for more")
+
+    config = load_config(args.config)
+    broker = (
+        LocalBroker(
+            args.latency_ms,
+            args.jitter_ms,
+            args.service_time_ms,
+            deduplicator=Deduplicator() if args.dedup else None,
+        )
+        if args.transport == "local"
+        else None
+    )
+
+    cars = []
+    for index in range(args.cars):
+        client_id, topic = config.iot.thing_name, config.iot.topic
+        if args.cars > 1:
+            # Local broker only: each car gets its own client id and topic
+            client_id = car_vehicle_id(config, index)
+            topic = f"car/{client_id}/telemetry"
+        publisher = IoTPublisher(
+            endpoint=config.iot.endpoint,
+            cert_path=config.iot.cert_path,
+            private_key_path=config.iot.private_key_path,
+            ca_path=config.iot.ca_path,
+            client_id=client_id,
+            topic=topic,
+            connection_factory=broker.connection if broker is not None else None,
+        )
+        publisher.connect()
+        cars.append(SimulatedCar(config, index, publisher))
+
+    try:
+        report = CapacitySearch(
+            cars,
+            start_rate=args.start_rate,
+            step_rate=args.step_rate,
+            steps=args.steps,
+            step_duration=args.step_duration,
+            tolerance=args.tolerance,
+        ).run()
+        print(format_report(report))
+        if broker is not None and broker.deduplicator is not None:
+            print("\nRedeliveries received by the local broker:")
+            print(format_stats(broker.deduplicator.stats))
+            if broker.unchecked:
+                print(f"{broker.unchecked} messages carried no telemetry samples (not checked)")
+    finally:
+        for car in cars:
+            car.publisher.disconnect()
+        if broker is not None:
+            broker.close()
+
+
+if __name__ == "__main__":
+    main()
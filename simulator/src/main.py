@@ -14,8 +14,11 @@ import structlog
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.config.loader import load_config
+from src.config.loader import SimulatorConfig, load_config
 from src.telemetry.generator import TelemetryGenerator
+from src.telemetry.edge_filter import EdgeFilter, RcfScorer, RollingZScorer, Scorer
+from src.telemetry.scheduler import GroupBatcher, MultiRateScheduler, SensorGroup
+from src.dataset.replay import ReplayRewrite, ReplaySource, Replayer
 from src.iot.publisher import IoTPublisher
 
 # Configure structured logging
@@ -45,6 +48,29 @@ def main() -> None:
         default=None,
         help="Override session duration (seconds)",
     )
+    parser.add_argument(
+        "--replay",
+        type=str,
+        default=None,
+        help="Replay recorded Parquet/JSONL partitions from this path instead of simulating",
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Replay speed multiplier (0 = as fast as possible)",
+    )
+    parser.add_argument(
+        "--replay-vehicle",
+        action="append",
+        default=None,
+        help="Only replay this vehicle_id (repeatable)",
+    )
+    parser.add_argument(
+        "--rebase",
+        action="store_true",
+        help="Rewrite replayed timestamps to start now and use fresh session ids",
+    )
     args = parser.parse_args()
 
     try:
@@ -75,9 +101,41 @@ def main() -> None:
             topic=config.iot.topic,
         )
 
+        edge_filter = None
+        if config.edge_filter and config.edge_filter.enabled:
+            scorer: Scorer
+            if config.edge_filter.model_path:
+                scorer = RcfScorer.load(Path(config.edge_filter.model_path))
+            else:
+                scorer = RollingZScorer(
+                    window=config.edge_filter.window, warmup=config.edge_filter.warmup
+                )
+            edge_filter = EdgeFilter(
+                threshold=config.edge_filter.threshold,
+                pre_context=config.edge_filter.pre_context,
+                post_context=config.edge_filter.post_context,
+                heartbeat_hz=config.edge_filter.heartbeat_hz,
+                scorer=scorer,
+            )
+            logger.info(
+                "edge_filter_enabled",
+                threshold=config.edge_filter.threshold,
+                scorer=type(scorer).__name__,
+            )
+
         # Connect to IoT Core
         iot_publisher.connect()
 
+        if args.replay:
+            replay(args, iot_publisher)
+            return
+
+        if config.sensor_groups:
+            if edge_filter is not None:
+                logger.warning("edge_filter_ignored", reason="multi-rate sensor groups enabled")
+            run_multi_rate(config, telemetry_generator, iot_publisher)
+            return
+
         # Main telemetry loop
         start_time = time.time()
         sample_interval = 1.0 / config.vehicle.sample_rate_hz
@@ -91,8 +149,12 @@ def main() -> None:
                 current_time = time.time()
                 telemetry = telemetry_generator.generate_sample(current_time)
 
-                # Publish to IoT Core
-                iot_publisher.publish(telemetry)
+                # Publish to IoT Core (optionally through the edge pre-filter)
+                if edge_filter is None:
+                    iot_publisher.publish(telemetry)
+                else:
+                    for message in edge_filter.process(telemetry):
+                        iot_publisher.publish(message)
 
                 sample_count += 1
 
@@ -105,6 +167,8 @@ def main() -> None:
                         elapsed=f"{elapsed:.1f}s",
                         rate=f"{sample_count / elapsed:.1f} msg/s",
                     )
+                    if edge_filter is not None:
+                        logger.info("edge_filter_progress", **edge_filter.stats.as_dict())
 
                 # Sleep until next sample
                 next_sample_time = start_time + (sample_count * sample_interval)
@@ -130,11 +194,96 @@ def main() -> None:
             duration=f"{elapsed:.1f}s",
             avg_rate=f"{sample_count / elapsed:.1f} msg/s",
         )
+        if edge_filter is not None:
+            logger.info("edge_filter_summary", **edge_filter.stats.as_dict())
 
     except Exception as e:
         logger.error("simulator_failed", error=str(e), exc_info=True)
         sys.exit(1)
 
 
+def run_multi_rate(
+    config: SimulatorConfig,
+    telemetry_generator: TelemetryGenerator,
+    iot_publisher: IoTPublisher,
+) -> None:
+    """Sample each sensor group on its own cadence and publish per group."""
+    groups = [
+        SensorGroup(name, group.rate_hz, group.topic, group.batch_size)
+        for name, group in config.sensor_groups.items()
+    ]
+    batcher = GroupBatcher(groups)
+
+    start_time = time.time()
+    scheduler = MultiRateScheduler(groups, start_time)
+    counts = {group.name: 0 for group in groups}
+
+    logger.info(
+        "telemetry_started",
+        session_id=telemetry_generator.session_id,
+        groups={group.name: group.rate_hz for group in groups},
+    )
+
+    while time.time() - start_time < config.vehicle.session_duration_sec:
+        try:
+            sleep_time = scheduler.next_due() - time.time()
+            if sleep_time > 0:
+                time.sleep(sleep_time)
+
+            for group, timestamp in scheduler.pop_due(time.time()):
+                sample = telemetry_generator.generate_group_sample(group.name, timestamp)
+                message = batcher.add(group, sample)
+                if message is not None:
+                    iot_publisher.publish(message, topic=group.topic)
+                counts[group.name] += 1
+
+        except KeyboardInterrupt:
+            logger.info("simulator_interrupted")
+            break
+
+        except Exception as e:
+            logger.error("telemetry_error", error=str(e), exc_info=True)
+
+    for group, message in batcher.flush_all():
+        iot_publisher.publish(message, topic=group.topic)
+
+    iot_publisher.disconnect()
+
+    elapsed = time.time() - start_time
+    logger.info(
+        "simulator_finished",
+        samples=counts,
+        duration=f"{elapsed:.1f}s",
+        avg_rate={name: f"{count / elapsed:.1f} msg/s" for name, count in counts.items()},
+    )
+
+
+def replay(args: argparse.Namespace, iot_publisher: IoTPublisher) -> None:
+    """Replay recorded telemetry through the connected publisher."""
+    source = ReplaySource(args.replay, vehicles=args.replay_vehicle)
+    rewrite = ReplayRewrite(
+        rebase_to_ms=int(time.time() * 1000) if args.rebase else None,
+        new_session_ids=args.rebase,
+    )
+
+    logger.info("replay_started", path=args.replay, files=len(source.files), speed=args.speed)
+
+    try:
+        stats = Replayer(source, iot_publisher.publish, speed=args.speed, rewrite=rewrite).run()
+    except KeyboardInterrupt:
+        logger.info("replay_interrupted")
+        iot_publisher.disconnect()
+        return
+
+    iot_publisher.disconnect()
+    logger.info(
+        "replay_finished",
+        sent=stats.sent,
+        errors=stats.errors,
+        duration=f"{stats.elapsed_sec:.1f}s",
+        max_lag=f"{stats.max_lag_ms:.0f}ms",
+    )
+
+
 if __name__ == "__main__":
     main()
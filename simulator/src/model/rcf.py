@@ -0,0 +1,348 @@
+"""
+Random Cut Forest Model
+
+Local implementation of the Random Cut Forest used by SageMaker
+(same hyperparameter names: num_trees, num_samples_per_tree).
+
+Each tree is stored as flat node arrays (children, cut, mass, bounding box),
+and all trees of a forest are concatenated into one set of arrays. That
+makes the model a single compact binary file that loads with zero-copy
+numpy views.
+
+Scoring follows the AWS RCF anomaly score visitor: walking from the leaf
+back to the root, each node mixes in the probability that a random cut
+would have separated the query point from the node's bounding box. Scores
+are normalized by log2(1 + tree mass) and averaged over trees (nominal ≈ 1,
+anomalies are typically > mean + 3σ).
+"""
+
+import json
+import struct
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..telemetry.schema import FEATURE_COLUMNS
+
+MODEL_MAGIC = b"RCFM"
+MODEL_VERSION = 1
+
+LEAF = -1
+
+# (point, tree) pairs scored per chunk (bounds scoring memory)
+_MAX_PAIRS = 1 << 16
+
+# Flat node arrays, in file order
+_ARRAYS = ("left", "right", "cut_dim", "cut_value", "mass", "box_min", "box_max", "tree_offsets")
+
+
+@dataclass
+class TreeArrays:
+    """Flat node arrays of one tree (node 0 is the root)."""
+
+    left: np.ndarray  # int32, LEAF for leaves
+    right: np.ndarray  # int32
+    cut_dim: np.ndarray  # int16
+    cut_value: np.ndarray  # float32
+    mass: np.ndarray  # int32, points below the node
+    box_min: np.ndarray  # float32 (n_nodes, n_features)
+    box_max: np.ndarray  # float32 (n_nodes, n_features)
+
+
+def build_tree(points: np.ndarray, rng: np.random.Generator) -> TreeArrays:
+    """
+    Build one random cut tree.
+
+    The cut dimension is chosen with probability proportional to its range,
+    and the cut value uniformly within that range. Identical points collapse
+    into one leaf with mass > 1.
+
+    Args:
+        points: Sample of shape (n_points, n_features)
+        rng: Random generator
+
+    Returns:
+        TreeArrays with at most 2 * n_points - 1 nodes
+    """
+    # Build in the stored precision so scoring sees exactly the training cuts
+    points = np.asarray(points, dtype=np.float32)
+    n_points, n_features = points.shape
+    capacity = max(1, 2 * n_points - 1)
+
+    left = np.full(capacity, LEAF, dtype=np.int32)
+    right = np.full(capacity, LEAF, dtype=np.int32)
+    cut_dim = np.zeros(capacity, dtype=np.int16)
+    cut_value = np.zeros(capacity, dtype=np.float32)
+    mass = np.zeros(capacity, dtype=np.int32)
+    box_min = np.zeros((capacity, n_features), dtype=np.float32)
+    box_max = np.zeros((capacity, n_features), dtype=np.float32)
+
+    n_nodes = 1
+    stack = [(0, np.arange(n_points))]
+    while stack:
+        node, members = stack.pop()
+        subset = points[members]
+        low = subset.min(axis=0)
+        high = subset.max(axis=0)
+        box_min[node] = low
+        box_max[node] = high
+        mass[node] = len(members)
+
+        ranges = (high - low).astype(np.float64)
+        total = ranges.sum()
+        if len(members) == 1 or total <= 0:
+            continue
+
+        # Cut dimension ∝ range, value uniform in [low, high)
+        dim = int(np.searchsorted(np.cumsum(ranges), rng.uniform(0, total), side="right"))
+        dim = min(dim, n_features - 1)
+        while ranges[dim] <= 0:  # only reachable through float rounding
+            dim = (dim + 1) % n_features
+        value = np.float32(rng.uniform(low[dim], high[dim]))
+        if not low[dim] <= value < high[dim]:
+            value = low[dim]
+        goes_left = subset[:, dim] <= value
+
+        cut_dim[node] = dim
+        cut_value[node] = value
+        left[node] = n_nodes
+        right[node] = n_nodes + 1
+        stack.append((n_nodes, members[goes_left]))
+        stack.append((n_nodes + 1, members[~goes_left]))
+        n_nodes += 2
+
+    return TreeArrays(
+        left=left[:n_nodes],
+        right=right[:n_nodes],
+        cut_dim=cut_dim[:n_nodes],
+        cut_value=cut_value[:n_nodes],
+        mass=mass[:n_nodes],
+        box_min=box_min[:n_nodes],
+        box_max=box_max[:n_nodes],
+    )
+
+
+@dataclass
+class RandomCutForest:
+    """
+    A trained forest: all trees' node arrays concatenated.
+
+    Child indices are global (already offset), tree_offsets[i] is the root of tree i.
+    """
+
+    left: np.ndarray
+    right: np.ndarray
+    cut_dim: np.ndarray
+    cut_value: np.ndarray
+    mass: np.ndarray
+    box_min: np.ndarray
+    box_max: np.ndarray
+    tree_offsets: np.ndarray  # int64 (num_trees + 1,)
+    feature_names: List[str] = field(default_factory=lambda: list(FEATURE_COLUMNS))
+    hyperparameters: Dict[str, Any] = field(default_factory=dict)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def num_trees(self) -> int:
+        return len(self.tree_offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in _ARRAYS)
+
+    @classmethod
+    def from_trees(
+        cls,
+        trees: Sequence[TreeArrays],
+        feature_names: Sequence[str] = FEATURE_COLUMNS,
+        hyperparameters: Optional[Dict[str, Any]] = None,
+    ) -> "RandomCutForest":
+        """Concatenate per-tree arrays, rebasing child indices to global node ids."""
+        sizes = [len(tree.left) for tree in trees]
+        offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+
+        def children(name: str) -> np.ndarray:
+            parts = []
+            for tree, offset in zip(trees, offsets[:-1]):
+                child = getattr(tree, name)
+                parts.append(np.where(child == LEAF, LEAF, child + offset).astype(np.int32))
+            return np.concatenate(parts)
+
+        return cls(
+            left=children("left"),
+            right=children("right"),
+            cut_dim=np.concatenate([t.cut_dim for t in trees]),
+            cut_value=np.concatenate([t.cut_value for t in trees]),
+            mass=np.concatenate([t.mass for t in trees]),
+            box_min=np.concatenate([t.box_min for t in trees]),
+            box_max=np.concatenate([t.box_max for t in trees]),
+            tree_offsets=offsets,
+            feature_names=list(feature_names),
+            hyperparameters=dict(hyperparameters or {}),
+        )
+
+    def score(self, points: np.ndarray) -> np.ndarray:
+        """
+        Anomaly scores for a batch of points.
+
+        All (point, tree) pairs descend together, so the per-call overhead is
+        paid once per tree level rather than once per tree.
+
+        Args:
+            points: Array of shape (n_points, n_features)
+
+        Returns:
+            float64 scores of shape (n_points,)
+        """
+        points = np.asarray(points, dtype=np.float32)
+        if points.ndim == 1:
+            points = points[None, :]
+
+        scores = np.zeros(len(points))
+        if self.num_trees == 0:
+            return scores
+        chunk = max(1, _MAX_PAIRS // self.num_trees)
+        for begin in range(0, len(points), chunk):
+            scores[begin : begin + chunk] = self._score_chunk(points[begin : begin + chunk])
+        return scores
+
+    def _score_chunk(self, points: np.ndarray) -> np.ndarray:
+        num_trees = self.num_trees
+        roots = np.tile(self.tree_offsets[:-1], len(points))
+        owner = np.repeat(np.arange(len(points)), num_trees)  # point of each (point, tree) pair
+        pair_points = points[owner]
+
+        # Descend all pairs level by level, recording each path
+        node = roots.copy()
+        path = [node]
+        active = np.flatnonzero(self.left[node] != LEAF)
+        while len(active):
+            current = node[active]
+            goes_left = pair_points[active, self.cut_dim[current]] <= self.cut_value[current]
+            node = node.copy()
+            node[active] = np.where(goes_left, self.left[current], self.right[current])
+            path.append(node)
+            active = active[self.left[node[active]] != LEAF]
+
+        depth = np.zeros(len(node), dtype=np.int64)
+        for level in range(1, len(path)):
+            depth += path[level] != path[level - 1]
+
+        # Leaf score
+        leaf = node
+        tree_mass = self.mass[roots].astype(float)
+        leaf_mass = self.mass[leaf].astype(float)
+        seen = np.all(
+            (pair_points >= self.box_min[leaf]) & (pair_points <= self.box_max[leaf]), axis=1
+        )
+        damp = 1.0 - leaf_mass / (2.0 * tree_mass)
+        score = np.where(
+            seen,
+            damp / (depth + np.log2(leaf_mass + 1.0)),
+            1.0 / (depth + 1.0),
+        )
+
+        # Walk back up: mix in the probability of separation at each ancestor
+        for level in range(len(path) - 2, -1, -1):
+            moved = np.flatnonzero(path[level] != path[level + 1])
+            if not len(moved):
+                continue
+            depth[moved] -= 1
+            ancestors = path[level][moved]
+            x = pair_points[moved]
+            low = self.box_min[ancestors]
+            high = self.box_max[ancestors]
+            extended = np.maximum(high, x) - np.minimum(low, x)
+            span = extended.sum(axis=1)
+            extension = span - (high - low).sum(axis=1)
+            separation = np.divide(extension, span, out=np.zeros_like(span), where=span > 0)
+            score[moved] = (1 - separation) * score[moved] + separation / (depth[moved] + 1.0)
+
+        score *= np.log2(1.0 + tree_mass)
+        return score.reshape(len(points), num_trees).mean(axis=1)
+
+    def save(self, path: Path) -> int:
+        """
+        Write the forest as one versioned binary file.
+
+        Layout: magic "RCFM", uint16 version, uint32 header length, JSON header
+        (hyperparameters, metadata, array descriptors), then raw little-endian
+        arrays aligned to 8 bytes.
+
+        Args:
+            path: Output file
+
+        Returns:
+            File size in bytes
+        """
+        descriptors = []
+        offset = 0
+        blobs = []
+        for name in _ARRAYS:
+            array = np.ascontiguousarray(getattr(self, name))
+            array = array.astype(array.dtype.newbyteorder("<"), copy=False)
+            descriptors.append(
+                {
+                    "name": name,
+                    "dtype": array.dtype.str,
+                    "shape": list(array.shape),
+                    "offset": offset,
+                }
+            )
+            blob = array.tobytes()
+            blobs.append(blob + b"\0" * (-len(blob) % 8))
+            offset += len(blobs[-1])
+
+        header = json.dumps(
+            {
+                "feature_names": self.feature_names,
+                "hyperparameters": self.hyperparameters,
+                "metadata": self.metadata,
+                "arrays": descriptors,
+            }
+        ).encode("utf-8")
+        header += b" " * (-(len(header) + 10) % 8)
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(MODEL_MAGIC)
+            f.write(struct.pack("<HI", MODEL_VERSION, len(header)))
+            f.write(header)
+            for blob in blobs:
+                f.write(blob)
+        return path.stat().st_size
+
+    @classmethod
+    def load(cls, path: Path) -> "RandomCutForest":
+        """
+        Load a forest saved with save().
+
+        Raises:
+            ValueError: On bad magic or unsupported version
+        """
+        data = Path(path).read_bytes()
+        if data[:4] != MODEL_MAGIC:
+            raise ValueError(f"Not a Random Cut Forest model: {path}")
+        version, header_len = struct.unpack_from("<HI", data, 4)
+        if version > MODEL_VERSION:
+            raise ValueError(f"Unsupported model version {version} (max {MODEL_VERSION})")
+
+        header = json.loads(data[10 : 10 + header_len])
+        base = 10 + header_len
+        arrays = {}
+        for desc in header["arrays"]:
+            dtype = np.dtype(desc["dtype"])
+            count = int(np.prod(desc["shape"])) if desc["shape"] else 1
+            arrays[desc["name"]] = np.frombuffer(
+                data, dtype=dtype, count=count, offset=base + desc["offset"]
+            ).reshape(desc["shape"])
+
+        return cls(
+            **arrays,
+            feature_names=header["feature_names"],
+            hyperparameters=header["hyperparameters"],
+            metadata=header["metadata"],
+        )
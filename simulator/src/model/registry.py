@@ -0,0 +1,256 @@
+"""
+Model Registry
+
+Keeps Random Cut Forest models in memory for the local scoring service,
+keyed by model name (a vehicle_id or a version tag, one <name>.bin file per
+model under the registry root).
+
+- LRU eviction against a memory budget (model array bytes)
+- Asynchronous preloading of cold models in a thread pool; concurrent
+  requests for a model that is still loading share the same load
+- Hit/miss/eviction counters for the service's stats endpoint
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import structlog
+
+from ..dataset.partitions import PathLike
+from .rcf import RandomCutForest
+
+logger = structlog.get_logger(__name__)
+
+MODEL_SUFFIX = ".bin"
+DEFAULT_MODEL = "default"
+
+# Model names are plain file stems (no separators, no leading dot)
+MODEL_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]*")
+
+
+@dataclass
+class RegistryStats:
+    """Registry cache counters."""
+
+    hits: int = 0
+    misses: int = 0  # includes waits on an in-flight preload
+    evictions: int = 0
+    loads: int = 0
+    load_sec: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ModelRegistry:
+    """
+    LRU cache of models with a memory budget.
+
+    Usage:
+        registry = ModelRegistry("models/", memory_budget_bytes=512 << 20)
+        registry.preload(["GT3-RACER-02"])           # returns immediately
+        forest = registry.get(registry.resolve(vehicle_id="GT3-RACER-01"))
+    """
+
+    def __init__(
+        self,
+        root: PathLike,
+        memory_budget_bytes: int = 512 << 20,
+        preload_workers: int = 2,
+        loader: Callable[[Path], RandomCutForest] = RandomCutForest.load,
+    ):
+        """
+        Initialize registry.
+
+        Args:
+            root: Directory with <name>.bin model files
+            memory_budget_bytes: Maximum bytes of cached model arrays
+            preload_workers: Threads for asynchronous loads
+            loader: Model file loader
+        """
+        self.root = Path(root)
+        self.memory_budget_bytes = memory_budget_bytes
+        self.loader = loader
+        self.stats = RegistryStats()
+
+        self._models: "OrderedDict[str, RandomCutForest]" = OrderedDict()
+        self._loading: Dict[str, Future] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=preload_workers, thread_name_prefix="model-preload"
+        )
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._bytes
+
+    def path(self, name: str) -> Path:
+        """
+        Model file of a name.
+
+        Raises:
+            ValueError: If the name is not a plain file stem (e.g. contains "/" or "..")
+        """
+        if not MODEL_NAME.fullmatch(name):
+            raise ValueError(f"Invalid model name: {name!r}")
+        return self.root / f"{name}{MODEL_SUFFIX}"
+
+    def available(self) -> List[str]:
+        """Model names on disk."""
+        return sorted(p.stem for p in self.root.glob(f"*{MODEL_SUFFIX}"))
+
+    def cached(self) -> List[str]:
+        """Model names in memory, least recently used first."""
+        with self._lock:
+            return list(self._models)
+
+    def resolve(self, model: Optional[str] = None, vehicle_id: Optional[str] = None) -> str:
+        """
+        Pick the model for a request.
+
+        An explicit model name wins; otherwise the vehicle's own model, falling
+        back to the default model.
+
+        Raises:
+            KeyError: If no matching model file exists
+            ValueError: On an invalid model name
+        """
+        candidates = [model] if model else [vehicle_id, DEFAULT_MODEL]
+        for name in candidates:
+            if not name:
+                continue
+            with self._lock:
+                cached = name in self._models
+            if cached or self.path(name).exists():
+                return name
+        raise KeyError(f"No model for model={model!r} vehicle_id={vehicle_id!r}")
+
+    def get(self, name: str) -> RandomCutForest:
+        """
+        Return a model, loading it (or waiting for its preload) on a miss.
+
+        Args:
+            name: Model name
+
+        Returns:
+            The model
+        """
+        with self._lock:
+            forest = self._models.get(name)
+            if forest is not None:
+                self._models.move_to_end(name)
+                self.stats.hits += 1
+                return forest
+            self.stats.misses += 1
+            future = self._loading.get(name)
+            if future is None:
+                future = Future()
+                self._loading[name] = future
+                owner = True
+            else:
+                owner = False
+
+        if owner:
+            self._load(name, future)
+        return future.result()
+
+    def lookup(self, name: str, record: bool = True) -> Tuple[Optional[RandomCutForest], Future]:
+        """
+        Non-blocking get: the cached model, or the future of its (started) load.
+
+        Args:
+            name: Model name
+            record: Count the lookup in the hit/miss stats
+
+        Returns:
+            (model, None) on a hit, (None, load future) on a miss
+        """
+        with self._lock:
+            forest = self._models.get(name)
+            if forest is not None:
+                self._models.move_to_end(name)
+                self.stats.hits += record
+                return forest, None
+            self.stats.misses += record
+            future = self._loading.get(name)
+            start = future is None
+            if start:
+                future = Future()
+                self._loading[name] = future
+
+        if start:
+            self._executor.submit(self._load, name, future)
+        return None, future
+
+    def preload(self, names: List[str]) -> List[Future]:
+        """
+        Load models in the background (no-op for cached or loading models).
+
+        Args:
+            names: Model names
+
+        Returns:
+            Futures of the loads started by this call
+
+        Raises:
+            ValueError: On an invalid model name (nothing is started)
+        """
+        for name in names:
+            self.path(name)
+        started = []
+        for name in names:
+            with self._lock:
+                if name in self._models or name in self._loading:
+                    continue
+                future: Future = Future()
+                self._loading[name] = future
+            self._executor.submit(self._load, name, future)
+            started.append(future)
+        return started
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def _load(self, name: str, future: Future) -> None:
+        """Load a model into the cache and resolve its future."""
+        start_time = time.time()
+        try:
+            forest = self.loader(self.path(name))
+        except BaseException as e:
+            with self._lock:
+                self._loading.pop(name, None)
+            future.set_exception(e)
+            logger.warning("model_load_failed", model=name, error=str(e))
+            return
+
+        elapsed = time.time() - start_time
+        with self._lock:
+            self._loading.pop(name, None)
+            self._models[name] = forest
+            self._bytes += forest.nbytes
+            self.stats.loads += 1
+            self.stats.load_sec += elapsed
+            self._evict()
+        future.set_result(forest)
+        logger.info("model_loaded", model=name, kb=forest.nbytes // 1024, load_ms=elapsed * 1000)
+
+    def _evict(self) -> None:
+        """
+        Drop least recently used models until within budget (caller holds the lock).
+
+        The most recent model always stays, even if it alone exceeds the budget.
+        """
+        while self._bytes > self.memory_budget_bytes and len(self._models) > 1:
+            name, forest = self._models.popitem(last=False)
+            self._bytes -= forest.nbytes
+            self.stats.evictions += 1
+            logger.info("model_evicted", model=name, cached_mb=self._bytes / 1e6)
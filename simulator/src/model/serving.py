@@ -0,0 +1,460 @@
+"""
+Local Scoring Service
+
+Stands in for the SageMaker Random Cut Forest endpoint during development
+and load tests, with the same request/response format:
+
+    POST /invocations?vehicle_id=GT3-RACER-01     (or ?model=<name>)
+        application/json: {"instances": [{"features": [...]}, ...]}
+        text/csv:         one feature row per line
+    → {"scores": [{"score": 1.02, "anomaly": false}, ...], "model": "GT3-RACER-01"}
+
+- Models come from a ModelRegistry (per-vehicle or versioned models, LRU
+  with a memory budget); "anomaly" uses the model's calibrated threshold
+- Requests arriving within a short window are micro-batched into one
+  vectorized score() call per model
+- Requests for a cold model don't block the batch: the model is preloaded
+  in the background and its requests are scored once it is ready
+- Requests still queued (or waiting for a cold model) at shutdown fail
+  instead of hanging, and a request waits at most request_timeout_sec
+- GET /stats reports cache hit rate, batch sizes and p50/p99 latency
+
+Usage:
+    python -m src.model.serving ./models --port 8080 --memory-mb 512 --preload default
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import structlog
+
+from .rcf import RandomCutForest
+from .registry import ModelRegistry
+
+logger = structlog.get_logger(__name__)
+
+# Recent latencies kept for percentiles
+LATENCY_WINDOW = 10_000
+
+# Longest a request waits for its scores (covers cold model loads)
+REQUEST_TIMEOUT_SEC = 30.0
+
+
+@dataclass
+class _Request:
+    model: str
+    points: np.ndarray
+    future: Future
+    enqueued: float = field(default_factory=time.perf_counter)
+    retried: bool = False
+
+
+def _validate_points(points: np.ndarray, width: int) -> Optional[str]:
+    """Error message if points cannot be scored by a model with width features, else None."""
+    if points.ndim != 2 or len(points) == 0:
+        return "Expected at least one feature row"
+    if points.shape[1] != width:
+        return f"Expected {width} features per row, got {points.shape[1]}"
+    return None
+
+
+class MicroBatcher:
+    """
+    Collects scoring requests for up to window_ms and scores them per model in one call.
+
+    Usage:
+        batcher = MicroBatcher(registry, window_ms=2.0)
+        scores, threshold = batcher.submit("default", points).result()
+    """
+
+    def __init__(self, registry: ModelRegistry, window_ms: float = 2.0, max_batch_rows: int = 4096):
+        """
+        Initialize batcher and start its worker thread.
+
+        Args:
+            registry: Model registry
+            window_ms: How long the first request of a batch waits for company
+            max_batch_rows: Rows that close a batch early
+        """
+        self.registry = registry
+        self.window = window_ms / 1000.0
+        self.max_batch_rows = max_batch_rows
+
+        self.batches = 0
+        self.batched_requests = 0
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        # Orders close() against submit/_requeue, so nothing is queued after the final drain
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, model: str, points: np.ndarray) -> Future:
+        """
+        Queue points for scoring.
+
+        Args:
+            model: Model name (see ModelRegistry.resolve)
+            points: Array of shape (n_points, n_features)
+
+        Returns:
+            Future resolving to (scores of shape (n_points,), model threshold or None)
+        """
+        request = _Request(model, np.atleast_2d(np.asarray(points, dtype=np.float32)), Future())
+        self._enqueue([request])
+        return request.future
+
+    def latency_percentiles(self) -> Dict[str, float]:
+        """p50/p99 request latency (queueing + scoring) in milliseconds."""
+        latencies = np.array(self._latencies)
+        if len(latencies) == 0:
+            return {"p50_ms": 0.0, "p99_ms": 0.0}
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+        return {"p50_ms": float(p50), "p99_ms": float(p99)}
+
+    def close(self) -> None:
+        """Stop the worker; requests it has not scored fail with RuntimeError."""
+        with self._lock:
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join(timeout=5)
+
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if request is not None:
+                request.future.set_exception(RuntimeError("Micro-batcher is closed"))
+
+    def _enqueue(self, requests: List[_Request]) -> None:
+        """Queue requests for the worker, or fail them once the batcher is closed."""
+        with self._lock:
+            if not self._closed:
+                for request in requests:
+                    self._queue.put(request)
+                return
+        for request in requests:
+            request.future.set_exception(RuntimeError("Micro-batcher is closed"))
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            # Gather the batch: until the window closes or enough rows arrived
+            batch = [first]
+            rows = len(first.points)
+            deadline = time.perf_counter() + self.window
+            stop = False
+            while rows < self.max_batch_rows:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    stop = True
+                    break
+                batch.append(request)
+                rows += len(request.points)
+
+            self._score(batch)
+            if stop:
+                return
+
+    def _score(self, batch: List[_Request]) -> None:
+        by_model: Dict[str, List[_Request]] = {}
+        for request in batch:
+            by_model.setdefault(request.model, []).append(request)
+
+        for name, requests in by_model.items():
+            forest, loading = self.registry.lookup(name, record=not requests[0].retried)
+            if forest is None:
+                # Cold model: score these requests once the background load finishes
+                loading.add_done_callback(lambda f, pending=requests: self._requeue(f, pending))
+                continue
+
+            # A malformed request fails alone instead of failing the whole batch
+            width = forest.box_min.shape[1]
+            valid = []
+            for request in requests:
+                error = _validate_points(request.points, width)
+                if error is None:
+                    valid.append(request)
+                else:
+                    request.future.set_exception(ValueError(error))
+            if valid:
+                self._score_requests(forest, valid)
+
+    def _score_requests(self, forest: RandomCutForest, requests: List[_Request]) -> None:
+        """Score requests for one model in a single call, resolving their futures."""
+        try:
+            scores = forest.score(np.vstack([r.points for r in requests]))
+        except Exception as e:
+            if len(requests) > 1:
+                # Isolate the failure: score each request on its own
+                for request in requests:
+                    self._score_requests(forest, [request])
+                return
+            requests[0].future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.batched_requests += len(requests)
+        threshold = forest.metadata.get("threshold")
+        offset = 0
+        done = time.perf_counter()
+        for request in requests:
+            count = len(request.points)
+            request.future.set_result((scores[offset : offset + count], threshold))
+            offset += count
+            self._latencies.append(done - request.enqueued)
+
+    def _requeue(self, load: Future, requests: List[_Request]) -> None:
+        if load.exception() is not None:
+            for request in requests:
+                request.future.set_exception(load.exception())
+            return
+        for request in requests:
+            request.retried = True
+        self._enqueue(requests)
+
+
+class ScoringService:
+    """Registry + batcher behind the HTTP handler."""
+
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        batcher: MicroBatcher,
+        request_timeout_sec: float = REQUEST_TIMEOUT_SEC,
+    ):
+        self.registry = registry
+        self.batcher = batcher
+        self.request_timeout_sec = request_timeout_sec
+        self.requests = 0
+        self.errors = 0
+        # Handler threads of the ThreadingHTTPServer update the counters concurrently
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def score(
+        self, points: np.ndarray, model: Optional[str] = None, vehicle_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Score points with the resolved model.
+
+        Returns:
+            SageMaker-style response body
+
+        Raises:
+            TimeoutError: If the scores are not ready within request_timeout_sec
+        """
+        name = self.registry.resolve(model=model, vehicle_id=vehicle_id)
+        try:
+            scores, threshold = self.batcher.submit(name, points).result(
+                timeout=self.request_timeout_sec
+            )
+        except FutureTimeoutError:
+            raise TimeoutError(
+                f"Model {name!r} not scored within {self.request_timeout_sec:g}s"
+            ) from None
+
+        results = []
+        for score in scores.tolist():
+            entry: Dict[str, Any] = {"score": score}
+            if threshold is not None:
+                entry["anomaly"] = score > threshold
+            results.append(entry)
+        return {"scores": results, "model": name}
+
+    def stats(self) -> Dict[str, Any]:
+        """Service statistics."""
+        registry = self.registry.stats
+        batcher = self.batcher
+        with self._lock:
+            requests, errors = self.requests, self.errors
+        return {
+            "requests": requests,
+            "errors": errors,
+            "cache_hit_rate": registry.hit_rate,
+            "cache_hits": registry.hits,
+            "cache_misses": registry.misses,
+            "evictions": registry.evictions,
+            "model_loads": registry.loads,
+            "cached_models": self.registry.cached(),
+            "cached_mb": self.registry.memory_bytes / 1e6,
+            "batches": batcher.batches,
+            "mean_batch_requests": (
+                batcher.batched_requests / batcher.batches if batcher.batches else 0.0
+            ),
+            **batcher.latency_percentiles(),
+        }
+
+
+def parse_instances(body: bytes, content_type: str) -> np.ndarray:
+    """
+    Decode a SageMaker RCF request body.
+
+    Raises:
+        ValueError: On an unsupported content type or malformed body
+    """
+    if content_type.startswith("text/csv"):
+        points = np.loadtxt(body.decode("utf-8").splitlines(), delimiter=",", ndmin=2)
+    elif content_type.startswith("application/json"):
+        payload = json.loads(body)
+        points = np.array(
+            [instance["features"] for instance in payload["instances"]], dtype=float, ndmin=2
+        )
+    else:
+        raise ValueError(f"Unsupported content type: {content_type}")
+    if points.ndim != 2 or points.size == 0:
+        raise ValueError("Request has no instances")
+    return points
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "ScoringServer"
+
+    def do_GET(self) -> None:
+        path = urlparse(self.path).path
+        if path == "/ping":
+            self._reply(200, {"status": "ok"})
+        elif path == "/stats":
+            self._reply(200, self.server.service.stats())
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        service = self.server.service
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        if url.path.startswith("/models/") and url.path.endswith("/preload"):
+            name = url.path[len("/models/") : -len("/preload")]
+            try:
+                service.registry.preload([name])
+            except ValueError as e:
+                self._reply(400, {"error": str(e)})
+                return
+            self._reply(202, {"preloading": name})
+            return
+        if url.path != "/invocations":
+            self._reply(404, {"error": "not found"})
+            return
+
+        service.record_request()
+        try:
+            points = parse_instances(body, self.headers.get("Content-Type", "application/json"))
+            response = service.score(points, params.get("model"), params.get("vehicle_id"))
+        except KeyError as e:
+            service.record_error()
+            self._reply(404, {"error": str(e)})
+            return
+        except TimeoutError as e:
+            service.record_error()
+            self._reply(503, {"error": str(e)})
+            return
+        except Exception as e:
+            service.record_error()
+            self._reply(400, {"error": str(e)})
+            return
+        self._reply(200, response)
+
+    def _reply(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass  # structlog stats instead of per-request access logs
+
+
+class ScoringServer(ThreadingHTTPServer):
+    """Threaded HTTP server bound to a ScoringService."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple, service: ScoringService):
+        super().__init__(address, _Handler)
+        self.service = service
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Local Random Cut Forest scoring service")
+    parser.add_argument("models", type=str, help="Directory with <name>.bin models")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--memory-mb", type=float, default=512, help="Model cache budget")
+    parser.add_argument("--window-ms", type=float, default=2.0, help="Micro-batching window")
+    parser.add_argument("--max-batch-rows", type=int, default=4096)
+    parser.add_argument(
+        "--timeout-sec", type=float, default=REQUEST_TIMEOUT_SEC, help="Per-request limit"
+    )
+    parser.add_argument(
+        "--preload", action="append", default=[], help="Model to load at startup (repeatable)"
+    )
+    parser.add_argument("--stats-interval", type=float, default=30.0, help="Seconds, 0 = off")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.models, memory_budget_bytes=int(args.memory_mb * 1e6))
+    registry.preload(args.preload)
+    batcher = MicroBatcher(registry, window_ms=args.window_ms, max_batch_rows=args.max_batch_rows)
+    service = ScoringService(registry, batcher, request_timeout_sec=args.timeout_sec)
+    server = ScoringServer((args.host, args.port), service)
+
+    def report_stats() -> None:
+        while True:
+            time.sleep(args.stats_interval)
+            stats = service.stats()
+            logger.info("scoring_stats", **{k: v for k, v in stats.items() if k != "cached_models"})
+
+    if args.stats_interval > 0:
+        threading.Thread(target=report_stats, name="stats", daemon=True).start()
+
+    logger.info(
+        "scoring_service_started",
+        address=f"http://{args.host}:{args.port}",
+        models=len(registry.available()),
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("scoring_service_interrupted")
+    finally:
+        server.server_close()
+        batcher.close()
+        registry.close()
+        logger.info("scoring_service_stopped", **service.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+Parallel Random Cut Forest Trainer
+
+Trains Random Cut Forest models locally, so hyperparameter sweeps over
+num_trees and num_samples_per_tree run on a workstation instead of one
+SageMaker training job per setting.
+
+- One streaming pass over the Parquet dataset fills a reservoir sample per
+  tree (Algorithm R, vectorized across trees), in bounded memory
+- Trees are built in a process pool, each worker from its own seed
+- The forest is written as one versioned binary file (see src.model.rcf)
+- Training time, memory (sampler allocations, builder RSS) and model size
+  are reported per run
+
+Usage:
+    python -m src.model.trainer data/telemetry models/rcf.bin --workers 8
+    python -m src.model.trainer data/telemetry models/ --trees 50,100 --samples 128,256
+"""
+
+import argparse
+import itertools
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import structlog
+
+from ..dataset.partitions import PathLike, list_data_files
+from ..dataset.recordio import iter_feature_batches
+from ..telemetry.schema import FEATURE_COLUMNS
+from .rcf import RandomCutForest, TreeArrays, build_tree
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_NUM_TREES = 100
+DEFAULT_SAMPLES_PER_TREE = 256
+
+# Random draws per reservoir update chunk (bounds sampler memory)
+_MAX_DRAWS = 1 << 20
+
+
+class ReservoirSampler:
+    """
+    Independent uniform reservoir samples, one per tree.
+
+    For the i-th row seen (1-based), each tree draws j in [0, i) and replaces
+    slot j when j < sample_size, which is Algorithm R run for all trees at once.
+    """
+
+    def __init__(
+        self,
+        num_trees: int,
+        sample_size: int,
+        num_features: int,
+        rng: np.random.Generator,
+    ):
+        self.num_trees = num_trees
+        self.sample_size = sample_size
+        self.rng = rng
+        self.reservoirs = np.zeros((num_trees, sample_size, num_features), dtype=np.float32)
+        self.seen = 0
+
+    def update(self, rows: np.ndarray) -> None:
+        """
+        Offer a batch of rows to every reservoir.
+
+        Args:
+            rows: Array of shape (n_rows, num_features)
+        """
+        rows = rows.astype(np.float32, copy=False)
+
+        # Fill phase: the first sample_size rows go to every reservoir as-is
+        fill = min(max(self.sample_size - self.seen, 0), len(rows))
+        if fill:
+            self.reservoirs[:, self.seen : self.seen + fill] = rows[:fill]
+            self.seen += fill
+            rows = rows[fill:]
+        if len(rows) == 0:
+            return
+
+        # Replacement phase, in chunks bounding the (trees x rows) draw matrix.
+        # Row order within a chunk is kept, so later rows win a contested slot.
+        step = max(1, _MAX_DRAWS // self.num_trees)
+        for begin in range(0, len(rows), step):
+            chunk = rows[begin : begin + step]
+            positions = self.seen + 1 + np.arange(len(chunk))
+            slots = (self.rng.random((self.num_trees, len(chunk))) * positions).astype(np.int64)
+            tree, row = np.nonzero(slots < self.sample_size)
+            self.reservoirs[tree, slots[tree, row]] = chunk[row]
+            self.seen += len(chunk)
+
+    def samples(self, num_trees: int, sample_size: int) -> np.ndarray:
+        """
+        Per-tree samples for a smaller setting (a uniform subset of a uniform sample).
+
+        Args:
+            num_trees: Trees to return (<= self.num_trees)
+            sample_size: Points per tree (<= self.sample_size)
+
+        Returns:
+            Array of shape (num_trees, min(sample_size, seen), num_features)
+        """
+        available = min(self.sample_size, self.seen)
+        sample_size = min(sample_size, available)
+        reservoirs = self.reservoirs[:num_trees, :available]
+        if sample_size == available:
+            return reservoirs
+        picks = np.argsort(self.rng.random((num_trees, available)), axis=1)[:, :sample_size]
+        return np.take_along_axis(reservoirs, picks[:, :, None], axis=1)
+
+
+@dataclass
+class TrainingReport:
+    """Cost of one trained forest."""
+
+    num_trees: int
+    num_samples_per_tree: int
+    rows_seen: int
+    sample_sec: float  # shared reservoir pass (counted once per sweep)
+    build_sec: float
+    sampler_memory_bytes: int  # peak allocations of the reservoir pass (tracemalloc)
+    builder_rss_bytes: int  # peak RSS of the largest tree builder process
+    model_bytes: int
+    path: Optional[Path] = None
+
+    @property
+    def total_sec(self) -> float:
+        return self.sample_sec + self.build_sec
+
+
+def _peak_rss_bytes() -> int:
+    """Peak resident set size of this process (0 where unavailable)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _build_trees(samples: np.ndarray, seed: int) -> Tuple[List[TreeArrays], int]:
+    """Build a chunk of trees (runs inside a worker process)."""
+    rng = np.random.default_rng(seed)
+    trees = [build_tree(points, rng) for points in samples]
+    return trees, _peak_rss_bytes()
+
+
+def fill_reservoirs(
+    files: Sequence[PathLike],
+    num_trees: int,
+    sample_size: int,
+    seed: int = 0,
+    batch_size: int = 65536,
+) -> ReservoirSampler:
+    """
+    Stream Parquet files once into per-tree reservoir samples.
+
+    Args:
+        files: Parquet files with FEATURE_COLUMNS (multi-rate group rows are
+            re-aligned per file, see iter_feature_batches)
+        num_trees: Number of reservoirs
+        sample_size: Points per reservoir
+        seed: Random seed
+        batch_size: Rows per streamed Arrow batch
+
+    Returns:
+        Filled ReservoirSampler
+    """
+    sampler = ReservoirSampler(
+        num_trees, sample_size, len(FEATURE_COLUMNS), np.random.default_rng(seed)
+    )
+    for matrix in iter_feature_batches(files, batch_size=batch_size):
+        sampler.update(matrix)
+    return sampler
+
+
+def build_forest(
+    samples: np.ndarray,
+    workers: int = 1,
+    seed: int = 0,
+    feature_names: Sequence[str] = FEATURE_COLUMNS,
+) -> Tuple[RandomCutForest, int]:
+    """
+    Build one tree per sample across a process pool.
+
+    Args:
+        samples: Per-tree samples of shape (num_trees, sample_size, num_features)
+        workers: Number of builder processes
+        seed: Base seed (each chunk gets an independent child seed)
+        feature_names: Feature order stored with the model
+
+    Returns:
+        (forest, peak RSS of the largest builder process in bytes)
+    """
+    num_trees = len(samples)
+    workers = max(1, min(workers, num_trees))
+
+    # A few chunks per worker keeps the pool balanced when tree sizes differ
+    chunks = np.array_split(np.arange(num_trees), min(num_trees, workers * 4))
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(len(chunks))]
+    jobs = [(samples[chunk], chunk_seed) for chunk, chunk_seed in zip(chunks, seeds)]
+
+    if workers == 1:
+        results = [_build_trees(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_build_trees, *zip(*jobs)))
+
+    trees = [tree for chunk_trees, _ in results for tree in chunk_trees]
+    forest = RandomCutForest.from_trees(
+        trees,
+        feature_names=feature_names,
+        hyperparameters={
+            "num_trees": num_trees,
+            "num_samples_per_tree": int(samples.shape[1]),
+            "feature_dim": int(samples.shape[2]),
+        },
+    )
+    return forest, max((peak for _, peak in results), default=0)
+
+
+def train_sweep(
+    source: PathLike,
+    output: Optional[PathLike] = None,
+    num_trees: Sequence[int] = (DEFAULT_NUM_TREES,),
+    samples_per_tree: Sequence[int] = (DEFAULT_SAMPLES_PER_TREE,),
+    workers: int = 1,
+    seed: int = 0,
+    batch_size: int = 65536,
+) -> List[TrainingReport]:
+    """
+    Train one forest per (num_trees, num_samples_per_tree) combination.
+
+    The dataset is read once: reservoirs are sized for the largest setting and
+    smaller settings draw sub-samples from them.
+
+    Args:
+        source: Partitioned Parquet dataset root
+        output: Model file (single setting) or directory (sweep); None = don't save
+        num_trees: Tree counts to try
+        samples_per_tree: Sample sizes to try
+        workers: Builder processes
+        seed: Random seed
+        batch_size: Rows per streamed Arrow batch
+
+    Returns:
+        One TrainingReport per combination
+    """
+    files = list_data_files(source)
+    if not files:
+        logger.warning("rcf_no_input", source=str(source))
+        return []
+
+    start_time = time.time()
+    tracemalloc.start()
+    sampler = fill_reservoirs(files, max(num_trees), max(samples_per_tree), seed, batch_size)
+    _, sampler_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    sample_sec = time.time() - start_time
+
+    logger.info(
+        "rcf_sampled",
+        files=len(files),
+        rows=sampler.seen,
+        reservoir_mb=f"{sampler.reservoirs.nbytes / 1e6:.1f}",
+        elapsed=f"{sample_sec:.1f}s",
+    )
+    if sampler.seen == 0:
+        logger.warning("rcf_no_rows", source=str(source))
+        return []
+
+    combinations = list(itertools.product(num_trees, samples_per_tree))
+    reports = []
+    for trees, sample_size in combinations:
+        build_start = time.time()
+        forest, worker_peak = build_forest(sampler.samples(trees, sample_size), workers, seed)
+        forest.metadata = {"rows_seen": sampler.seen, "trained_at": int(time.time())}
+        build_sec = time.time() - build_start
+
+        path = None
+        if output is not None:
+            path = Path(output)
+            if len(combinations) > 1 or path.is_dir():
+                path = path / f"rcf-{trees}x{sample_size}.bin"
+            forest.save(path)
+
+        report = TrainingReport(
+            num_trees=trees,
+            num_samples_per_tree=sample_size,
+            rows_seen=sampler.seen,
+            sample_sec=sample_sec,
+            build_sec=build_sec,
+            sampler_memory_bytes=sampler_peak,
+            builder_rss_bytes=worker_peak,
+            model_bytes=path.stat().st_size if path else forest.nbytes,
+            path=path,
+        )
+        reports.append(report)
+        logger.info(
+            "rcf_trained",
+            num_trees=trees,
+            num_samples_per_tree=sample_size,
+            build=f"{build_sec:.2f}s",
+            sampler_mb=f"{sampler_peak / 1e6:.1f}",
+            builder_rss_mb=f"{worker_peak / 1e6:.1f}",
+            model_kb=f"{report.model_bytes / 1e3:.0f}",
+            path=str(path) if path else None,
+        )
+    return reports
+
+
+def format_reports(reports: Sequence[TrainingReport]) -> str:
+    """Render training reports as a text table."""
+    lines = [
+        f"{'trees':>6} {'samples':>8} {'build_s':>8} {'total_s':>8} "
+        f"{'sampler_mb':>10} {'builder_mb':>10} {'model_kb':>9}"
+    ]
+    for r in reports:
+        lines.append(
+            f"{r.num_trees:>6} {r.num_samples_per_tree:>8} {r.build_sec:>8.2f} "
+            f"{r.total_sec:>8.2f} {r.sampler_memory_bytes / 1e6:>10.1f} "
+            f"{r.builder_rss_bytes / 1e6:>10.1f} {r.model_bytes / 1e3:>9.0f}"
+        )
+    return "\n".join(lines)
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part]
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Train Random Cut Forest models locally")
+    parser.add_argument("source", type=str, help="Partitioned Parquet dataset root")
+    parser.add_argument("output", type=str, help="Model file, or directory for a sweep")
+    parser.add_argument("--trees", type=_int_list, default=[DEFAULT_NUM_TREES], help="e.g. 50,100")
+    parser.add_argument(
+        "--samples", type=_int_list, default=[DEFAULT_SAMPLES_PER_TREE], help="e.g. 128,256"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Tree builder processes")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    reports = train_sweep(
+        args.source,
+        args.output,
+        num_trees=args.trees,
+        samples_per_tree=args.samples,
+        workers=args.workers,
+        seed=args.seed,
+    )
+    print(format_reports(reports))
+
+
+if __name__ == "__main__":
+    main()
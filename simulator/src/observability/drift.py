@@ -0,0 +1,576 @@
+"""
+Streaming Feature Drift Monitor
+
+Keeps mergeable sketches per (vehicle_id, feature):
+- Moments: count, mean, variance (Welford/Chan), min, max
+- Quantiles: DDSketch-style log buckets with bounded relative error
+- Histogram: fixed bins over the feature's physical range (the last bin
+  includes the range maximum, e.g. 100% pad wear or full throttle)
+
+All sketches update in O(1) per sample, merge by addition, and snapshot to
+JSON, so workers or partitions can be combined into a fleet view without
+rescanning raw data. Drift against a training baseline is reported as
+PSI (histograms), KS distance (quantile sketches) and mean shift in
+baseline standard deviations.
+"""
+
+import argparse
+import json
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow.dataset as ds
+import structlog
+
+from ..dataset.partitions import PathLike, list_data_files
+from ..telemetry.schema import FEATURE_COLUMNS
+
+logger = structlog.get_logger(__name__)
+
+FLEET = "*"  # pseudo vehicle id for the merged fleet view
+
+# Physical ranges used for histogram bins (values outside go to under/overflow;
+# the range maximum itself falls in the last bin)
+FEATURE_RANGES: Dict[str, Tuple[float, float]] = {
+    "brake_disc_temp_fl": (0.0, 1200.0),
+    "brake_disc_temp_fr": (0.0, 1200.0),
+    "brake_disc_temp_rl": (0.0, 1200.0),
+    "brake_disc_temp_rr": (0.0, 1200.0),
+    "brake_fluid_pressure": (0.0, 130.0),
+    "brake_pad_wear_fl": (0.0, 100.0),
+    "brake_pad_wear_fr": (0.0, 100.0),
+    "brake_pad_wear_rl": (0.0, 100.0),
+    "brake_pad_wear_rr": (0.0, 100.0),
+    "engine_rpm": (0.0, 10000.0),
+    "engine_oil_temp": (40.0, 160.0),
+    "engine_oil_pressure": (0.0, 8.0),
+    "engine_coolant_temp": (40.0, 140.0),
+    "boost_pressure": (0.0, 2.5),
+    "fuel_consumption_rate": (0.0, 30.0),
+    "throttle_position": (0.0, 1.0),
+}
+
+HISTOGRAM_BINS = 50
+
+
+class MomentSketch:
+    """Count, mean, variance, min and max (mergeable)."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def update(self, x: float) -> None:
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    def update_batch(self, values: np.ndarray) -> None:
+        if len(values) == 0:
+            return
+        batch = MomentSketch()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        self.merge(batch)
+
+    def merge(self, other: "MomentSketch") -> None:
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "MomentSketch":
+        sketch = cls()
+        sketch.count = data["count"]
+        sketch.mean = data["mean"]
+        sketch.m2 = data["m2"]
+        sketch.min = data["min"] if data["min"] is not None else math.inf
+        sketch.max = data["max"] if data["max"] is not None else -math.inf
+        return sketch
+
+
+class QuantileSketch:
+    """
+    DDSketch-style quantile sketch.
+
+    Values map to logarithmic buckets so every quantile estimate is within
+    relative_accuracy of the true value; merging adds bucket counts.
+    """
+
+    MIN_INDEXABLE = 1e-9
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _index(self, magnitude: float) -> int:
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        return 2.0 * self.gamma**index / (self.gamma + 1)
+
+    def update(self, x: float) -> None:
+        self.count += 1
+        if x > self.MIN_INDEXABLE:
+            key = self._index(x)
+            self.positive[key] = self.positive.get(key, 0) + 1
+        elif x < -self.MIN_INDEXABLE:
+            key = self._index(-x)
+            self.negative[key] = self.negative.get(key, 0) + 1
+        else:
+            self.zero_count += 1
+
+    def update_batch(self, values: np.ndarray) -> None:
+        self.count += len(values)
+        positive = values[values > self.MIN_INDEXABLE]
+        negative = -values[values < -self.MIN_INDEXABLE]
+        self.zero_count += len(values) - len(positive) - len(negative)
+
+        for store, magnitudes in ((self.positive, positive), (self.negative, negative)):
+            if len(magnitudes) == 0:
+                continue
+            keys, counts = np.unique(
+                np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64),
+                return_counts=True,
+            )
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                store[key] = store.get(key, 0) + count
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge quantile sketches with different accuracy")
+        stores = ((self.positive, other.positive), (self.negative, other.negative))
+        for store, other_store in stores:
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def sorted_buckets(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Bucket representative values (ascending) and their counts."""
+        negative = sorted(self.negative.items(), reverse=True)
+        positive = sorted(self.positive.items())
+        values = (
+            [-self._value(k) for k, _ in negative]
+            + ([0.0] if self.zero_count else [])
+            + [self._value(k) for k, _ in positive]
+        )
+        counts = (
+            [c for _, c in negative]
+            + ([self.zero_count] if self.zero_count else [])
+            + [c for _, c in positive]
+        )
+        return np.asarray(values, dtype=float), np.asarray(counts, dtype=float)
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return math.nan
+        values, counts = self.sorted_buckets()
+        rank = q * (self.count - 1)
+        return float(values[np.searchsorted(np.cumsum(counts), rank, side="right")])
+
+    def cdf(self, x: np.ndarray) -> np.ndarray:
+        """Fraction of values <= x."""
+        values, counts = self.sorted_buckets()
+        if self.count == 0:
+            return np.zeros_like(x, dtype=float)
+        cumulative = np.concatenate([[0.0], np.cumsum(counts)]) / self.count
+        return cumulative[np.searchsorted(values, x, side="right")]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "positive": {str(k): v for k, v in self.positive.items()},
+            "negative": {str(k): v for k, v in self.negative.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"])
+        sketch.positive = {int(k): v for k, v in data["positive"].items()}
+        sketch.negative = {int(k): v for k, v in data["negative"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        return sketch
+
+
+class Histogram:
+    """Fixed-bin histogram over [low, high] with underflow/overflow bins."""
+
+    def __init__(self, low: float, high: float, bins: int = HISTOGRAM_BINS):
+        self.low = low
+        self.high = high
+        self.bins = bins
+        self._scale = bins / (high - low)
+        self.counts = np.zeros(bins + 2, dtype=np.int64)  # [underflow, bins..., overflow]
+
+    def _bin(self, x: np.ndarray) -> np.ndarray:
+        inside = np.clip(np.floor((x - self.low) * self._scale).astype(np.int64) + 1, 1, self.bins)
+        return np.where(x < self.low, 0, np.where(x > self.high, self.bins + 1, inside))
+
+    def update(self, x: float) -> None:
+        if x < self.low:
+            self.counts[0] += 1
+        elif x > self.high:
+            self.counts[-1] += 1
+        else:
+            self.counts[min(int((x - self.low) * self._scale), self.bins - 1) + 1] += 1
+
+    def update_batch(self, values: np.ndarray) -> None:
+        self.counts += np.bincount(self._bin(values), minlength=self.bins + 2)
+
+    def merge(self, other: "Histogram") -> None:
+        if (other.low, other.high, other.bins) != (self.low, self.high, self.bins):
+            raise ValueError("Cannot merge histograms with different bins")
+        self.counts += other.counts
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "low": self.low,
+            "high": self.high,
+            "bins": self.bins,
+            "counts": self.counts.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "Histogram":
+        histogram = cls(data["low"], data["high"], data["bins"])
+        histogram.counts = np.asarray(data["counts"], dtype=np.int64)
+        return histogram
+
+
+class FeatureSketch:
+    """All sketches for one feature of one vehicle."""
+
+    def __init__(self, feature: str, relative_accuracy: float = 0.01):
+        self.feature = feature
+        self.moments = MomentSketch()
+        self.quantiles = QuantileSketch(relative_accuracy)
+        low, high = FEATURE_RANGES.get(feature, (0.0, 1.0))
+        self.histogram = Histogram(low, high)
+
+    def update(self, x: float) -> None:
+        self.moments.update(x)
+        self.quantiles.update(x)
+        self.histogram.update(x)
+
+    def update_batch(self, values: np.ndarray) -> None:
+        values = values[~np.isnan(values)]
+        self.moments.update_batch(values)
+        self.quantiles.update_batch(values)
+        self.histogram.update_batch(values)
+
+    def merge(self, other: "FeatureSketch") -> None:
+        self.moments.merge(other.moments)
+        self.quantiles.merge(other.quantiles)
+        self.histogram.merge(other.histogram)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "moments": self.moments.to_dict(),
+            "quantiles": self.quantiles.to_dict(),
+            "histogram": self.histogram.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, feature: str, data: Mapping[str, Any]) -> "FeatureSketch":
+        sketch = cls(feature)
+        sketch.moments = MomentSketch.from_dict(data["moments"])
+        sketch.quantiles = QuantileSketch.from_dict(data["quantiles"])
+        sketch.histogram = Histogram.from_dict(data["histogram"])
+        return sketch
+
+
+@dataclass
+class FeatureDrift:
+    """Drift of one feature against the baseline."""
+
+    vehicle_id: str
+    feature: str
+    psi: float
+    ks: float
+    mean_shift: float  # (mean - baseline_mean) / baseline_std
+    count: int
+    drifted: bool
+
+
+class DriftMonitor:
+    """
+    Per-vehicle, per-feature sketches with snapshot and merge.
+
+    Usage:
+        monitor = DriftMonitor()
+        monitor.update(sample)
+        monitor.save("snapshots/worker-1.json")
+        report = monitor.compare(DriftMonitor.load("baseline.json"))
+    """
+
+    def __init__(
+        self,
+        features: Sequence[str] = FEATURE_COLUMNS,
+        relative_accuracy: float = 0.01,
+    ):
+        """
+        Initialize drift monitor.
+
+        Args:
+            features: Numeric features to sketch
+            relative_accuracy: Quantile sketch relative error
+        """
+        self.features = tuple(features)
+        self.relative_accuracy = relative_accuracy
+        self.sketches: Dict[str, Dict[str, FeatureSketch]] = {}
+
+    def _vehicle(self, vehicle_id: str) -> Dict[str, FeatureSketch]:
+        sketches = self.sketches.get(vehicle_id)
+        if sketches is None:
+            sketches = {f: FeatureSketch(f, self.relative_accuracy) for f in self.features}
+            self.sketches[vehicle_id] = sketches
+        return sketches
+
+    def update(self, sample: Mapping[str, Any]) -> None:
+        """
+        Fold one telemetry message into its vehicle's sketches.
+
+        Args:
+            sample: Telemetry message (must contain vehicle_id)
+        """
+        sketches = self._vehicle(sample["vehicle_id"])
+        for feature in self.features:
+            value = sample.get(feature)
+            if value is not None and not math.isnan(value):
+                sketches[feature].update(float(value))
+
+    def update_columns(self, vehicle_ids: np.ndarray, columns: Mapping[str, np.ndarray]) -> None:
+        """
+        Fold a columnar batch into the sketches (vectorized per vehicle).
+
+        Args:
+            vehicle_ids: vehicle_id per row
+            columns: Feature name → values per row
+        """
+        for vehicle_id in np.unique(vehicle_ids):
+            mask = vehicle_ids == vehicle_id
+            sketches = self._vehicle(str(vehicle_id))
+            for feature in self.features:
+                sketches[feature].update_batch(columns[feature][mask])
+
+    def update_dataset(self, root: PathLike, batch_size: int = 65536) -> None:
+        """
+        Sketch a partitioned Parquet dataset (e.g. the training set baseline).
+
+        Args:
+            root: Dataset root
+            batch_size: Rows per streamed Arrow batch
+        """
+        files = [str(f) for f in list_data_files(root)]
+        dataset = ds.dataset(files, format="parquet")
+        for batch in dataset.to_batches(
+            columns=["vehicle_id", *self.features], batch_size=batch_size
+        ):
+            vehicle_ids = batch.column("vehicle_id").to_numpy(zero_copy_only=False)
+            columns = {
+                f: batch.column(f).to_numpy(zero_copy_only=False).astype(float)
+                for f in self.features
+            }
+            self.update_columns(vehicle_ids, columns)
+
+    def merge(self, other: "DriftMonitor") -> None:
+        """Add another monitor's sketches (e.g. from another worker)."""
+        for vehicle_id, sketches in other.sketches.items():
+            own = self._vehicle(vehicle_id)
+            for feature, sketch in sketches.items():
+                if feature in own:
+                    own[feature].merge(sketch)
+
+    def fleet(self) -> Dict[str, FeatureSketch]:
+        """Sketches merged across all vehicles."""
+        merged = {f: FeatureSketch(f, self.relative_accuracy) for f in self.features}
+        for sketches in self.sketches.values():
+            for feature, sketch in sketches.items():
+                merged[feature].merge(sketch)
+        return merged
+
+    def compare(
+        self,
+        baseline: "DriftMonitor",
+        per_vehicle: bool = False,
+        psi_threshold: float = 0.2,
+        ks_threshold: float = 0.1,
+    ) -> List[FeatureDrift]:
+        """
+        Compare against a baseline (the baseline fleet view is the reference).
+
+        Args:
+            baseline: Sketches of the training set
+            per_vehicle: Report each vehicle separately instead of the fleet
+            psi_threshold: PSI at or above which a feature has drifted
+            ks_threshold: KS distance at or above which a feature has drifted
+
+        Returns:
+            One FeatureDrift per (vehicle, feature)
+        """
+        reference = baseline.fleet()
+        groups = list(self.sketches.items()) if per_vehicle else [(FLEET, self.fleet())]
+
+        results = []
+        for vehicle_id, sketches in groups:
+            for feature in self.features:
+                current = sketches[feature]
+                if current.moments.count == 0:
+                    continue
+                psi = population_stability_index(current.histogram, reference[feature].histogram)
+                ks = ks_distance(current.quantiles, reference[feature].quantiles)
+                base_std = math.sqrt(reference[feature].moments.variance)
+                mean_shift = (
+                    (current.moments.mean - reference[feature].moments.mean) / base_std
+                    if base_std > 0
+                    else 0.0
+                )
+                results.append(
+                    FeatureDrift(
+                        vehicle_id=vehicle_id,
+                        feature=feature,
+                        psi=psi,
+                        ks=ks,
+                        mean_shift=mean_shift,
+                        count=current.moments.count,
+                        drifted=psi >= psi_threshold or ks >= ks_threshold,
+                    )
+                )
+        return results
+
+    def save(self, path: PathLike) -> None:
+        """Snapshot sketches to JSON."""
+        data = {
+            "features": list(self.features),
+            "relative_accuracy": self.relative_accuracy,
+            "vehicles": {
+                vehicle_id: {f: s.to_dict() for f, s in sketches.items()}
+                for vehicle_id, sketches in self.sketches.items()
+            },
+        }
+        out = Path(path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(data))
+
+    @classmethod
+    def load(cls, path: PathLike) -> "DriftMonitor":
+        """Load a JSON snapshot."""
+        data = json.loads(Path(path).read_text())
+        monitor = cls(data["features"], data["relative_accuracy"])
+        for vehicle_id, sketches in data["vehicles"].items():
+            monitor.sketches[vehicle_id] = {
+                f: FeatureSketch.from_dict(f, s) for f, s in sketches.items()
+            }
+        return monitor
+
+    @classmethod
+    def merge_snapshots(cls, paths: Iterable[PathLike]) -> "DriftMonitor":
+        """Merge snapshots from many workers or partitions."""
+        merged: Optional[DriftMonitor] = None
+        for path in paths:
+            monitor = cls.load(path)
+            if merged is None:
+                merged = monitor
+            else:
+                merged.merge(monitor)
+        return merged if merged is not None else cls()
+
+
+def population_stability_index(
+    current: Histogram, baseline: Histogram, epsilon: float = 1e-6
+) -> float:
+    """PSI = Σ (p - q) * ln(p / q) over histogram bins."""
+    p = current.counts / max(current.counts.sum(), 1) + epsilon
+    q = baseline.counts / max(baseline.counts.sum(), 1) + epsilon
+    return float(np.sum((p - q) * np.log(p / q)))
+
+
+def ks_distance(current: QuantileSketch, baseline: QuantileSketch) -> float:
+    """Maximum CDF difference, evaluated at every bucket of both sketches."""
+    if current.count == 0 or baseline.count == 0:
+        return 0.0
+    points = np.union1d(current.sorted_buckets()[0], baseline.sorted_buckets()[0])
+    return float(np.max(np.abs(current.cdf(points) - baseline.cdf(points))))
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Telemetry feature drift sketches")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sketch_parser = subparsers.add_parser("sketch", help="Sketch a Parquet dataset")
+    sketch_parser.add_argument("dataset", type=str)
+    sketch_parser.add_argument("output", type=str)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare snapshots to a baseline")
+    compare_parser.add_argument("baseline", type=str)
+    compare_parser.add_argument("snapshots", type=str, nargs="+")
+    compare_parser.add_argument("--per-vehicle", action="store_true")
+    compare_parser.add_argument("--psi-threshold", type=float, default=0.2)
+    compare_parser.add_argument("--ks-threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.command == "sketch":
+        monitor = DriftMonitor()
+        monitor.update_dataset(args.dataset)
+        monitor.save(args.output)
+        logger.info("drift_sketch_saved", output=args.output, vehicles=len(monitor.sketches))
+        return
+
+    current = DriftMonitor.merge_snapshots(args.snapshots)
+    results = current.compare(
+        DriftMonitor.load(args.baseline),
+        per_vehicle=args.per_vehicle,
+        psi_threshold=args.psi_threshold,
+        ks_threshold=args.ks_threshold,
+    )
+    for drift in results:
+        print(
+            f"{drift.vehicle_id:20} {drift.feature:24} psi={drift.psi:7.3f} ks={drift.ks:6.3f} "
+            f"shift={drift.mean_shift:+6.2f}σ n={drift.count}{'  DRIFT' if drift.drifted else ''}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Telemetry Training Pipeline
+
+preprocess → features → train → evaluate over a local mirror of
+raw/telemetry, on top of the cached runner (src.pipeline.runner):
+
+- preprocess (per hour): drop QoS1 redeliveries (also those of samples first
+  delivered in the previous hour), re-align multi-rate group rows, drop
+  incomplete rows, sort by vehicle/session/time
+- features (per hour): key columns plus float32 RCF features
+- train (all hours): Random Cut Forest from per-tree reservoir samples, plus
+  an independent holdout reservoir whose score mean/std go in the model metadata
+- evaluate (per hour): scores and anomaly flags at mean + anomaly_sigma * std
+
+A new hour only preprocesses and featurizes that hour; changing a forest
+hyperparameter reruns train and evaluate from cached features, and changing
+anomaly_sigma reruns only evaluate.
+
+Usage:
+    python -m src.pipeline.telemetry ./data/raw/telemetry --cache .pipeline --workers 4
+"""
+
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from ..dataset import asof, dedup, partitions, recordio
+from ..dataset.asof import align_groups, has_group_rows
+from ..dataset.dedup import GROUP_COLUMN, Deduplicator, drop_sorted_duplicates
+from ..dataset.partitions import is_parquet
+from ..model import rcf, trainer
+from ..model.rcf import RandomCutForest
+from ..model.trainer import (
+    DEFAULT_NUM_TREES,
+    DEFAULT_SAMPLES_PER_TREE,
+    build_forest,
+    fill_reservoirs,
+)
+from ..telemetry import schema
+from ..telemetry.schema import FEATURE_COLUMNS, KEY_COLUMNS
+from .runner import PREVIOUS, Pipeline, PipelineResult, Stage, format_reports, read_manifest
+
+PREPROCESSED_FILE = "part.parquet"
+FEATURES_FILE = "features.parquet"
+MODEL_FILE = "model.bin"
+SCORES_FILE = "scores.parquet"
+
+DEFAULT_ANOMALY_SIGMA = 3.0  # threshold stored in the model for serving
+
+SORT_KEYS = [("vehicle_id", "ascending"), ("session_id", "ascending"), ("timestamp", "ascending")]
+
+
+def _read_raw(files: Sequence[Path], columns: Optional[Sequence[str]] = None) -> pa.Table:
+    """Parquet objects of one hour in arrival (file name) order; other formats are skipped."""
+    dataset = ds.dataset([str(f) for f in sorted(files) if is_parquet(f)], format="parquet")
+    if columns is not None:
+        columns = [name for name in columns if name in dataset.schema.names]
+    return dataset.to_table(columns=columns)
+
+
+def preprocess(inputs: Mapping[str, Any], output_dir: Path, config: Dict[str, Any]) -> Dict:
+    """Clean one hour of raw telemetry."""
+    files = inputs["source"]
+    if not any(is_parquet(f) for f in files):
+        raise ValueError("No Parquet objects in partition (enable Firehose Parquet conversion)")
+    table = _read_raw(files)
+    raw_rows = table.num_rows
+
+    # Redeliveries arrive up to a few minutes late, so a sample first delivered at
+    # the end of the previous hour can be redelivered into this one: the previous
+    # hour's keys prime the windowed filter before this hour's rows are checked
+    previous = [
+        _read_raw(earlier["source"], [*KEY_COLUMNS, GROUP_COLUMN]) for earlier in inputs[PREVIOUS]
+    ]
+    deduplicator = Deduplicator(
+        window_sec=config.get("dedup_window_sec", 600.0),
+        capacity=max(1, raw_rows + sum(t.num_rows for t in previous)),
+        fp_rate=config.get("dedup_fp_rate", 1e-4),
+    )
+    for earlier in previous:
+        if earlier.num_rows:
+            deduplicator.keep_mask(earlier)
+    redeliveries = 0
+    if raw_rows:
+        keep = deduplicator.keep_mask(table)
+        redeliveries = int((~keep).sum())
+        table = table.filter(pa.array(keep))
+
+    # Multi-rate group rows (one group's channels null) are re-aligned first
+    if has_group_rows(table):
+        table = align_groups(table, tolerance_ms=config.get("align_tolerance_ms"))
+
+    table = table.select([*KEY_COLUMNS, *FEATURE_COLUMNS]).drop_null().sort_by(SORT_KEYS)
+
+    # Exact backstop for any repeat left after alignment (sorted by key already)
+    table, repeats = drop_sorted_duplicates(table)
+    duplicates = redeliveries + repeats
+
+    pq.write_table(table, output_dir / PREPROCESSED_FILE)
+    return {
+        "raw_rows": raw_rows,
+        "rows": table.num_rows,
+        "duplicates": duplicates,
+        "duplicate_rate": duplicates / raw_rows if raw_rows else 0.0,
+        "skipped_files": sum(1 for f in files if not is_parquet(f)),
+    }
+
+
+def features(inputs: Mapping[str, Any], output_dir: Path, config: Dict[str, Any]) -> Dict:
+    """Model-ready feature columns for one hour."""
+    table = pq.read_table(inputs["preprocess"] / PREPROCESSED_FILE)
+    dtype = pa.float32() if config.get("dtype", "float32") == "float32" else pa.float64()
+    columns = [table[name] for name in KEY_COLUMNS]
+    columns += [pc.cast(table[name], dtype) for name in FEATURE_COLUMNS]
+    result = pa.table(columns, names=[*KEY_COLUMNS, *FEATURE_COLUMNS])
+    pq.write_table(result, output_dir / FEATURES_FILE)
+    return {"rows": result.num_rows}
+
+
+def train(inputs: Mapping[str, Any], output_dir: Path, config: Dict[str, Any]) -> Dict:
+    """Random Cut Forest over all hours, with holdout score statistics for thresholds."""
+    files = [path / FEATURES_FILE for _, path in sorted(inputs["features"].items())]
+    num_trees = config["num_trees"]
+    sample_size = config["num_samples_per_tree"]
+
+    # One extra reservoir is never used for trees: an independent calibration sample
+    sampler = fill_reservoirs(files, num_trees + 1, sample_size, config["seed"])
+    if sampler.seen == 0:
+        raise ValueError("No training rows (all partitions empty)")
+
+    samples = sampler.samples(num_trees + 1, sample_size)
+    forest, _ = build_forest(samples[:num_trees], config.get("workers", 1), config["seed"])
+    holdout = forest.score(samples[num_trees])
+    score_mean, score_std = float(holdout.mean()), float(holdout.std())
+    forest.metadata = {
+        "rows_seen": sampler.seen,
+        "score_mean": score_mean,
+        "score_std": score_std,
+        # Default threshold for serving; evaluate applies its own anomaly_sigma
+        "threshold": score_mean + DEFAULT_ANOMALY_SIGMA * score_std,
+    }
+    model_bytes = forest.save(output_dir / MODEL_FILE)
+    return {
+        "rows_seen": sampler.seen,
+        "score_mean": score_mean,
+        "score_std": score_std,
+        "model_bytes": model_bytes,
+    }
+
+
+def evaluate(inputs: Mapping[str, Any], output_dir: Path, config: Dict[str, Any]) -> Dict:
+    """Score one hour against the trained model."""
+    forest = RandomCutForest.load(inputs["train"] / MODEL_FILE)
+    table = pq.read_table(inputs["features"] / FEATURES_FILE)
+    sigma = config.get("anomaly_sigma", DEFAULT_ANOMALY_SIGMA)
+    threshold = forest.metadata["score_mean"] + sigma * forest.metadata["score_std"]
+
+    matrix = np.zeros((table.num_rows, len(FEATURE_COLUMNS)), dtype=np.float32)
+    for index, name in enumerate(FEATURE_COLUMNS):
+        matrix[:, index] = table[name].to_numpy(zero_copy_only=False)
+
+    batch = config.get("batch_size", 8192)
+    scores = np.zeros(len(matrix))
+    for begin in range(0, len(matrix), batch):
+        scores[begin : begin + batch] = forest.score(matrix[begin : begin + batch])
+
+    result = table.select(list(KEY_COLUMNS)).append_column("score", pa.array(scores))
+    result = result.append_column("anomaly", pa.array(scores > threshold))
+    pq.write_table(result, output_dir / SCORES_FILE)
+    return {
+        "rows": len(scores),
+        "threshold": threshold,
+        "anomalies": int((scores > threshold).sum()),
+        "score_mean": float(scores.mean()) if len(scores) else 0.0,
+        "score_max": float(scores.max()) if len(scores) else 0.0,
+    }
+
+
+def build_pipeline(
+    cache_dir: Path,
+    num_trees: int = DEFAULT_NUM_TREES,
+    num_samples_per_tree: int = DEFAULT_SAMPLES_PER_TREE,
+    anomaly_sigma: float = DEFAULT_ANOMALY_SIGMA,
+    seed: int = 0,
+    train_workers: int = 1,
+) -> Pipeline:
+    """
+    Telemetry pipeline with the given hyperparameters.
+
+    Args:
+        cache_dir: Local cache root
+        num_trees: RCF num_trees
+        num_samples_per_tree: RCF num_samples_per_tree
+        anomaly_sigma: Evaluate threshold = holdout score mean + anomaly_sigma * std
+            (evaluate config only, so changing it does not retrain)
+        seed: Random seed
+        train_workers: Tree builder processes (not part of the cache key)
+
+    Returns:
+        Pipeline ready to run
+    """
+    train_config = {
+        "num_trees": num_trees,
+        "num_samples_per_tree": num_samples_per_tree,
+        "seed": seed,
+    }
+    return Pipeline(
+        [
+            Stage(
+                "preprocess",
+                preprocess,
+                lookback=1,
+                depends=[_read_raw, asof, dedup, partitions, schema],
+            ),
+            Stage(
+                "features",
+                features,
+                inputs=["preprocess"],
+                config={"dtype": "float32"},
+                depends=[schema],
+            ),
+            Stage(
+                "train",
+                train,
+                inputs=["features"],
+                config=train_config,
+                options={"workers": train_workers},
+                partitioned=False,
+                depends=[trainer, rcf, recordio, partitions, schema],
+            ),
+            Stage(
+                "evaluate",
+                evaluate,
+                inputs=["features", "train"],
+                config={"anomaly_sigma": anomaly_sigma},
+                depends=[rcf, schema],
+            ),
+        ],
+        cache_dir,
+    )
+
+
+def summarize(result: PipelineResult) -> Dict[str, Any]:
+    """Fleet-level evaluation summary from the evaluate manifests."""
+    per_partition: List[Dict[str, Any]] = []
+    for pid, path in sorted(result.outputs.get("evaluate", {}).items()):
+        per_partition.append({"partition": pid, **read_manifest(path)["metadata"]})
+    rows = sum(p["rows"] for p in per_partition)
+    anomalies = sum(p["anomalies"] for p in per_partition)
+    duplicates = sum(
+        read_manifest(path)["metadata"].get("duplicates", 0)
+        for path in result.outputs.get("preprocess", {}).values()
+    )
+    return {
+        "partitions": len(per_partition),
+        "rows": rows,
+        "duplicates": duplicates,
+        "anomalies": anomalies,
+        "anomaly_rate": anomalies / rows if rows else 0.0,
+        "per_partition": per_partition,
+    }
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Run the cached telemetry training pipeline")
+    parser.add_argument("source", type=str, help="Local raw/telemetry mirror")
+    parser.add_argument("--cache", type=str, default=".pipeline", help="Local cache directory")
+    parser.add_argument("--workers", type=int, default=1, help="Processes for per-hour stages")
+    parser.add_argument("--trees", type=int, default=DEFAULT_NUM_TREES)
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES_PER_TREE)
+    parser.add_argument(
+        "--sigma",
+        type=float,
+        default=DEFAULT_ANOMALY_SIGMA,
+        help="Anomaly threshold in std devs (reruns only evaluate)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--target", action="append", default=None, help="Only run up to this stage (repeatable)"
+    )
+    args = parser.parse_args()
+
+    pipeline = build_pipeline(
+        Path(args.cache),
+        num_trees=args.trees,
+        num_samples_per_tree=args.samples,
+        anomaly_sigma=args.sigma,
+        seed=args.seed,
+        train_workers=args.workers,
+    )
+    result = pipeline.run(args.source, workers=args.workers, targets=args.target)
+    print(format_reports(result.reports))
+
+    if "evaluate" in result.outputs:
+        summary = summarize(result)
+        print(
+            f"\nevaluated {summary['rows']} rows in {summary['partitions']} partitions: "
+            f"{summary['anomalies']} anomalies ({summary['anomaly_rate']:.2%}), "
+            f"{summary['duplicates']} redeliveries dropped"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Edge Pre-Filter
+
+Runs between TelemetryGenerator and IoTPublisher and decides which samples
+leave the car:
+- Anomalous samples (score >= threshold) are always forwarded
+- A pre/post context window around each anomaly is forwarded with it
+- Nominal periods are downsampled to a heartbeat rate
+
+Scoring is pluggable (Scorer protocol):
+- RollingZScorer: exponentially weighted rolling z-scores per feature (O(1)
+  per sample); the sample score is the largest absolute z-score
+- RcfScorer: a trained Random Cut Forest (src.model.rcf), scored in holdout
+  standard deviations so the same threshold scale applies
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Protocol, Sequence
+
+import numpy as np
+
+from ..model.rcf import RandomCutForest
+from .schema import FEATURE_COLUMNS
+
+Sample = Dict[str, Any]
+
+
+class Scorer(Protocol):
+    """Per-sample anomaly scorer used by EdgeFilter."""
+
+    def score(self, sample: Sample) -> float:
+        """Anomaly score of a sample against what was seen before it (higher = more anomalous)."""
+        ...
+
+    def update(self, sample: Sample) -> None:
+        """Fold a scored sample into the scorer's state."""
+        ...
+
+
+class RollingZScorer:
+    """
+    Exponentially weighted mean/variance per feature.
+
+    Scores a sample against the statistics seen *before* it, then updates them.
+    """
+
+    def __init__(
+        self,
+        features: Sequence[str] = FEATURE_COLUMNS,
+        window: int = 100,
+        warmup: int = 20,
+    ):
+        """
+        Initialize scorer.
+
+        Args:
+            features: Numeric sample keys to score
+            window: Effective EWMA window in samples
+            warmup: Samples observed before scores are reported (score 0 until then)
+        """
+        self.features = tuple(features)
+        self.alpha = 2.0 / (window + 1)
+        self.warmup = warmup
+
+        self.count = 0
+        self.mean = np.zeros(len(self.features))
+        self.var = np.zeros(len(self.features))
+
+    def score(self, sample: Sample) -> float:
+        """
+        Score a sample against the current rolling statistics.
+
+        Args:
+            sample: Telemetry message
+
+        Returns:
+            Maximum absolute z-score across features
+        """
+        if self.count < max(self.warmup, 1):
+            return 0.0
+
+        diff = self._values(sample) - self.mean
+        std = np.sqrt(self.var)
+        z = np.abs(diff) / np.maximum(std, 1e-9)
+        z[std < 1e-9] = 0.0  # constant channels carry no signal yet
+        return float(z.max())
+
+    def update(self, sample: Sample) -> None:
+        """
+        Fold a sample into the rolling statistics.
+
+        Args:
+            sample: Telemetry message
+        """
+        x = self._values(sample)
+        if self.count == 0:
+            self.mean[:] = x
+            self.count = 1
+            return
+
+        # West's incremental EWMA update
+        diff = x - self.mean
+        increment = self.alpha * diff
+        self.mean += increment
+        self.var = (1 - self.alpha) * (self.var + diff * increment)
+        self.count += 1
+
+    def _values(self, sample: Sample) -> np.ndarray:
+        return np.fromiter((sample[name] for name in self.features), dtype=float)
+
+
+class RcfScorer:
+    """
+    Scores samples with a trained Random Cut Forest.
+
+    Scores are reported as (score - score_mean) / score_std using the holdout
+    statistics the training pipeline stores in the model metadata, i.e. in
+    standard deviations like RollingZScorer; models without them report raw
+    RCF scores. The forest is trained offline, so update() leaves it as is.
+    One sample costs about 4 ms with 100 trees.
+    """
+
+    def __init__(self, forest: RandomCutForest):
+        """
+        Initialize scorer.
+
+        Args:
+            forest: Trained forest; its feature_names select the sample keys
+        """
+        self.forest = forest
+        self.features = tuple(forest.feature_names)
+        self.offset = float(forest.metadata.get("score_mean", 0.0))
+        self.scale = float(forest.metadata.get("score_std", 1.0)) or 1.0
+
+    @classmethod
+    def load(cls, path: Path) -> "RcfScorer":
+        """Scorer for a model file written by RandomCutForest.save."""
+        return cls(RandomCutForest.load(path))
+
+    def score(self, sample: Sample) -> float:
+        """
+        Score a sample against the forest.
+
+        Args:
+            sample: Telemetry message
+
+        Returns:
+            Anomaly score in holdout standard deviations (raw score without metadata)
+        """
+        point = np.fromiter((sample[name] for name in self.features), dtype=np.float32)
+        raw = float(self.forest.score(point[None, :])[0])
+        return (raw - self.offset) / self.scale
+
+    def update(self, sample: Sample) -> None:
+        """No-op: the forest is not updated online."""
+
+
+@dataclass
+class EdgeFilterStats:
+    """Forwarded vs suppressed sample counts."""
+
+    seen: int = 0
+    forwarded_anomalous: int = 0
+    forwarded_context: int = 0
+    forwarded_heartbeat: int = 0
+
+    @property
+    def forwarded(self) -> int:
+        return self.forwarded_anomalous + self.forwarded_context + self.forwarded_heartbeat
+
+    @property
+    def suppressed(self) -> int:
+        return self.seen - self.forwarded
+
+    @property
+    def forward_ratio(self) -> float:
+        return self.forwarded / self.seen if self.seen else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Counters for structured logging."""
+        return {
+            "seen": self.seen,
+            "forwarded": self.forwarded,
+            "suppressed": self.suppressed,
+            "anomalous": self.forwarded_anomalous,
+            "context": self.forwarded_context,
+            "heartbeat": self.forwarded_heartbeat,
+            "forward_ratio": f"{self.forward_ratio:.3f}",
+        }
+
+
+class EdgeFilter:
+    """
+    Anomaly-triggered forwarding with context windows and heartbeats.
+
+    Usage:
+        edge_filter = EdgeFilter(threshold=4.0, pre_context=10, post_context=10)
+        for message in edge_filter.process(sample):
+            publisher.publish(message)
+    """
+
+    def __init__(
+        self,
+        threshold: float = 4.0,
+        pre_context: int = 10,
+        post_context: int = 10,
+        heartbeat_hz: float = 1.0,
+        scorer: Optional[Scorer] = None,
+    ):
+        """
+        Initialize edge filter.
+
+        Args:
+            threshold: Score at or above which a sample is anomalous
+            pre_context: Samples forwarded before each anomaly
+            post_context: Samples forwarded after each anomaly
+            heartbeat_hz: Forwarding rate for nominal periods (0 disables heartbeats)
+            scorer: Sample scorer (defaults to RollingZScorer)
+        """
+        self.threshold = threshold
+        self.post_context = post_context
+        self.heartbeat_interval_ms = 1000.0 / heartbeat_hz if heartbeat_hz > 0 else None
+        self.scorer: Scorer = scorer or RollingZScorer()
+
+        self.stats = EdgeFilterStats()
+        self._pre_buffer: Deque[Sample] = deque(maxlen=pre_context)
+        self._post_remaining = 0
+        self._last_forwarded_ms: Optional[float] = None
+
+    def process(self, sample: Sample) -> List[Sample]:
+        """
+        Feed one sample through the filter.
+
+        Args:
+            sample: Telemetry message from TelemetryGenerator
+
+        Returns:
+            Samples to publish now, oldest first (may be empty)
+        """
+        self.stats.seen += 1
+        score = self.scorer.score(sample)
+        self.scorer.update(sample)
+
+        if score >= self.threshold:
+            forwarded = list(self._pre_buffer)
+            self.stats.forwarded_context += len(forwarded)
+            self.stats.forwarded_anomalous += 1
+            self._post_remaining = self.post_context
+            forwarded.append(sample)
+            return self._mark_forwarded(forwarded)
+
+        if self._post_remaining > 0:
+            self._post_remaining -= 1
+            self.stats.forwarded_context += 1
+            return self._mark_forwarded([sample])
+
+        if self._heartbeat_due(sample["timestamp"]):
+            self.stats.forwarded_heartbeat += 1
+            return self._mark_forwarded([sample])
+
+        self._pre_buffer.append(sample)
+        return []
+
+    def _heartbeat_due(self, timestamp_ms: float) -> bool:
+        if self.heartbeat_interval_ms is None:
+            return False
+        if self._last_forwarded_ms is None:
+            return True
+        return timestamp_ms - self._last_forwarded_ms >= self.heartbeat_interval_ms
+
+    def _mark_forwarded(self, samples: List[Sample]) -> List[Sample]:
+        # Pre-context only ever holds samples newer than the last forwarded one,
+        # so the published stream stays in time order without repeats
+        self._pre_buffer.clear()
+        self._last_forwarded_ms = samples[-1]["timestamp"]
+        return samples
@@ -2,10 +2,14 @@
 
 import time
 import uuid
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from ..config.loader import SimulatorConfig
 from .sensors.brake import BrakeSensor
 from .sensors.engine import EngineSensor
+from .track import DEFAULT_SECTORS, LapDriver, TrackProfile, TrackSector
+
+# Sensor groups that can be sampled independently (see scheduler.MultiRateScheduler)
+SENSOR_GROUPS = ("brake", "engine")
 
 
 class TelemetryGenerator:
@@ -13,6 +17,9 @@ class TelemetryGenerator:
     Orchestrates sensor data generation.
 
     Combines brake and engine sensors into complete telemetry messages.
+    Sensor physics advance by the actual time between samples, so the
+    simulated dynamics do not depend on sample_rate_hz. Both sensors read
+    their driving inputs from one shared LapDriver.
     """
 
     def __init__(self, config: SimulatorConfig):
@@ -25,16 +32,34 @@ class TelemetryGenerator:
         self.config = config
         self.session_id = str(uuid.uuid4())
 
+        # Lap profile shared by all sensors
+        track = config.track
+        if track is None:
+            self.driver = LapDriver(TrackProfile())
+        else:
+            sectors = [TrackSector(**sector) for sector in track.sectors] or DEFAULT_SECTORS
+            self.driver = LapDriver(
+                TrackProfile(sectors, top_speed_kph=track.top_speed_kph),
+                pace_variation=track.pace_variation,
+                intensity_variation=track.intensity_variation,
+                pit_every_laps=track.pit_every_laps,
+                pit_stop_sec=track.pit_stop_sec,
+            )
+
         # Initialize sensors
         self.brake_sensor = BrakeSensor(
             fade_coefficient=config.brake.fade_coefficient,
             cooling_rate=config.brake.cooling_rate,
+            driver=self.driver,
         )
 
         self.engine_sensor = EngineSensor(
-            max_rpm=config.engine.max_rpm, idle_rpm=config.engine.idle_rpm
+            max_rpm=config.engine.max_rpm, idle_rpm=config.engine.idle_rpm, driver=self.driver
         )
 
+        self.nominal_dt = 1.0 / config.vehicle.sample_rate_hz
+        self._last_timestamp: Dict[str, Optional[float]] = {group: None for group in SENSOR_GROUPS}
+
     def generate_sample(self, timestamp: float) -> Dict[str, Any]:
         """
         Generate one complete telemetry sample.
@@ -46,8 +71,8 @@ class TelemetryGenerator:
             Complete telemetry message dictionary
         """
         # Sample sensors
-        brake_data = self.brake_sensor.sample(timestamp)
-        engine_data = self.engine_sensor.sample(timestamp)
+        brake_data = self.brake_sensor.sample(timestamp, self._step("brake", timestamp))
+        engine_data = self.engine_sensor.sample(timestamp, self._step("engine", timestamp))
 
         # Combine into telemetry message
         telemetry = {
@@ -59,3 +84,52 @@ class TelemetryGenerator:
         }
 
         return telemetry
+
+    def generate_group_sample(self, group: str, timestamp: float) -> Dict[str, Any]:
+        """
+        Generate a sample for one sensor group only.
+
+        Each group tracks its own time step, so groups can run at different rates.
+
+        Args:
+            group: Sensor group name ("brake" or "engine")
+            timestamp: Current timestamp (seconds since epoch)
+
+        Returns:
+            Telemetry message with the common keys and the group's channels
+        """
+        if group == "brake":
+            data = self.brake_sensor.sample(timestamp, self._step(group, timestamp))
+        elif group == "engine":
+            data = self.engine_sensor.sample(timestamp, self._step(group, timestamp))
+        else:
+            raise ValueError(f"Unknown sensor group: {group}")
+
+        return {
+            "vehicle_id": self.config.vehicle.vehicle_id,
+            "timestamp": int(timestamp * 1000),  # Milliseconds
+            "session_id": self.session_id,
+            "sensor_group": group,
+            **data,
+        }
+
+    def fast_forward(self, timestamp: float) -> None:
+        """
+        Advance sensor state to timestamp as an idle period, without sampling.
+
+        Uses the closed-form physics, so cost is O(1) regardless of the gap.
+        The car then starts a fresh lap, as if leaving the pits.
+
+        Args:
+            timestamp: Target timestamp (seconds since epoch)
+        """
+        self.brake_sensor.advance(self._step("brake", timestamp))
+        self.engine_sensor.advance(self._step("engine", timestamp))
+        self.driver.restart(timestamp)
+
+    def _step(self, group: str, timestamp: float) -> float:
+        """Seconds since the group's previous sample (nominal interval for the first one)."""
+        last = self._last_timestamp[group]
+        dt = self.nominal_dt if last is None else max(0.0, timestamp - last)
+        self._last_timestamp[group] = timestamp
+        return dt
@@ -0,0 +1,133 @@
+"""
+Multi-Rate Sensor Scheduler
+
+Advances each sensor group (brake, engine) on its own cadence within one
+process, e.g. brake at 50 Hz for fade spikes and engine at 10 Hz.
+
+Group samples carry the common keys (vehicle_id, timestamp, session_id) plus
+their group's channels, so downstream readers can as-of join the groups back
+into aligned rows (see src.dataset.asof).
+"""
+
+import heapq
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+@dataclass
+class SensorGroup:
+    """A sensor group sampled at its own rate."""
+
+    name: str
+    rate_hz: float
+    topic: Optional[str] = None  # None = publisher default topic
+    batch_size: int = 1  # samples per MQTT message
+
+    @property
+    def interval(self) -> float:
+        return 1.0 / self.rate_hz
+
+
+class MultiRateScheduler:
+    """
+    Earliest-deadline scheduler over sensor groups.
+
+    Usage:
+        scheduler = MultiRateScheduler(groups, start_time=time.time())
+        time.sleep(max(0, scheduler.next_due() - time.time()))
+        for group, timestamp in scheduler.pop_due(time.time()):
+            ...
+    """
+
+    def __init__(self, groups: Sequence[SensorGroup], start_time: float):
+        """
+        Initialize scheduler.
+
+        Args:
+            groups: Sensor groups (all due at start_time)
+            start_time: Timestamp of the first sample of every group
+        """
+        if not groups:
+            raise ValueError("At least one sensor group is required")
+
+        self.groups = list(groups)
+        self.start_time = start_time
+        self._ticks = [0] * len(self.groups)
+        self._heap: List[Tuple[float, int]] = [(start_time, i) for i in range(len(self.groups))]
+        heapq.heapify(self._heap)
+
+    def next_due(self) -> float:
+        """Timestamp of the next scheduled sample."""
+        return self._heap[0][0]
+
+    def pop_due(self, now: float) -> List[Tuple[SensorGroup, float]]:
+        """
+        Collect every sample due at or before now.
+
+        Scheduled timestamps (not now) are returned, so each group keeps an
+        exact cadence even when the loop wakes up late.
+
+        Args:
+            now: Current timestamp
+
+        Returns:
+            (group, scheduled timestamp) pairs in time order
+        """
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            timestamp, index = heapq.heappop(self._heap)
+            due.append((self.groups[index], timestamp))
+
+            # Schedule from the tick count to avoid accumulating float error
+            self._ticks[index] += 1
+            next_time = self.start_time + self._ticks[index] * self.groups[index].interval
+            heapq.heappush(self._heap, (next_time, index))
+        return due
+
+
+class GroupBatcher:
+    """
+    Accumulates group samples into batched MQTT messages.
+
+    A batch message is an envelope:
+        {"vehicle_id", "session_id", "sensor_group", "samples": [...]}
+    """
+
+    def __init__(self, groups: Sequence[SensorGroup]):
+        self.groups = {group.name: group for group in groups}
+        self._pending: Dict[str, List[Dict[str, Any]]] = {group.name: [] for group in groups}
+
+    def add(self, group: SensorGroup, sample: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Add a sample; returns the message to publish when the batch is full.
+
+        Args:
+            group: Sample's sensor group
+            sample: Group sample
+
+        Returns:
+            Sample itself (batch_size 1), a batch envelope, or None while filling
+        """
+        if group.batch_size <= 1:
+            return sample
+
+        pending = self._pending[group.name]
+        pending.append(sample)
+        if len(pending) < group.batch_size:
+            return None
+        return self._flush(group.name)
+
+    def flush_all(self) -> List[Tuple[SensorGroup, Dict[str, Any]]]:
+        """Envelopes for all partially filled batches."""
+        names = [name for name, pending in self._pending.items() if pending]
+        return [(self.groups[name], self._flush(name)) for name in names]
+
+    def _flush(self, name: str) -> Dict[str, Any]:
+        samples = self._pending[name]
+        self._pending[name] = []
+        return {
+            "vehicle_id": samples[0]["vehicle_id"],
+            "session_id": samples[0]["session_id"],
+            "sensor_group": name,
+            "samples": samples,
+        }
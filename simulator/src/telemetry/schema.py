@@ -0,0 +1,39 @@
+"""
+Telemetry Message Schema
+
+Column names shared by the simulator, the Glue table (telemetry_raw)
+and the offline ML tooling.
+"""
+
+from typing import Tuple
+
+# Identity columns (string/bigint in Glue)
+KEY_COLUMNS: Tuple[str, ...] = ("vehicle_id", "timestamp", "session_id")
+
+# Numeric sensor channels used as Random Cut Forest features, in Glue column order
+BRAKE_FEATURES: Tuple[str, ...] = (
+    "brake_disc_temp_fl",
+    "brake_disc_temp_fr",
+    "brake_disc_temp_rl",
+    "brake_disc_temp_rr",
+    "brake_fluid_pressure",
+    "brake_pad_wear_fl",
+    "brake_pad_wear_fr",
+    "brake_pad_wear_rl",
+    "brake_pad_wear_rr",
+)
+
+ENGINE_FEATURES: Tuple[str, ...] = (
+    "engine_rpm",
+    "engine_oil_temp",
+    "engine_oil_pressure",
+    "engine_coolant_temp",
+    "boost_pressure",
+    "fuel_consumption_rate",
+    "throttle_position",
+)
+
+FEATURE_COLUMNS: Tuple[str, ...] = BRAKE_FEATURES + ENGINE_FEATURES
+
+# Hive-style partition keys written by Kinesis Firehose
+PARTITION_KEYS: Tuple[str, ...] = ("year", "month", "day", "hour")
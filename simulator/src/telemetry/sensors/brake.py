@@ -2,23 +2,43 @@
 Brake Sensor Physics Model
 
 Implements realistic brake system physics including:
+- Brake pressure and speed from the lap profile (src.telemetry.track)
 - Friction heating: Q = μ * F * v
-- Heat dissipation: Newton's law of cooling
+- Heat dissipation: Newton's law of cooling (exact exponential solution)
 - Brake fade: Exponential temperature-dependent friction degradation
+- Fade anomaly: bounded temperature spike, injected at a rate per second above
+  600 °C; it decays on its own and does not feed back into the heat model
 - Pad wear: Proportional to braking force and duration
 """
 
 import random
-from typing import Dict
+from typing import Dict, Optional
 import numpy as np
 
+from ..track import LapDriver, TrackProfile
+from .physics import event_probability, exponential_approach, rate_for_step_factor
+
+# Pad wear per second at full brake force (% of pad)
+PAD_WEAR_RATE = 0.01
+
+# Heating power per km/h at μ_eff * brake force = 1 (°C/s). On the default track the
+# heaviest braking zones pass FADE_TEMP on hard laps: about one fade per lap
+HEAT_PER_KPH = 6.0
+
+# Brake fade anomaly: events per second while a disc is above FADE_TEMP and no
+# spike is active (10% per 0.1 s tick originally); spikes decay at FADE_RECOVERY_RATE
+FADE_TEMP = 600.0  # °C
+FADE_RATE = rate_for_step_factor(0.9, 0.1)  # 1/s
+FADE_RECOVERY_RATE = 0.5  # 1/s
+FADE_ACTIVE = 5.0  # °C of spike left at which a new fade may start
+
 
 class BrakeSensor:
     """
     Simulates brake system telemetry with realistic physics.
 
     Physics Models:
-    - Disc Temperature: Friction heating + Newton's cooling
+    - Disc Temperature: dT/dt = P_friction - k * (T - T_ambient), solved exactly per step
     - Brake Fade: μ_eff = μ_nom * exp(-fade_coeff * (T - T_nominal))
     - Pad Wear: Cumulative degradation from braking events
     """
@@ -29,18 +49,23 @@ class BrakeSensor:
         cooling_rate: float = 0.05,
         nominal_friction: float = 0.4,
         ambient_temp: float = 20.0,
+        driver: Optional[LapDriver] = None,
+        car: int = 0,
     ):
         """
         Initialize brake sensor.
 
         Args:
             fade_coefficient: Brake fade temperature sensitivity (higher = more fade)
-            cooling_rate: Heat dissipation rate (higher = faster cooling)
+            cooling_rate: Newton cooling rate constant k (1/s)
             nominal_friction: Nominal friction coefficient
             ambient_temp: Ambient air temperature (°C)
+            driver: Lap driver shared with the other sensors (default: own driver)
+            car: This vehicle's index in the driver
         """
         # State variables (4 wheels: FL, FR, RL, RR)
         self.disc_temp = np.array([ambient_temp] * 4, dtype=float)
+        self.fade_spike = np.zeros(4)  # °C on top of disc_temp during a fade anomaly
         self.pad_wear = np.array([100.0] * 4, dtype=float)  # % remaining
         self.fluid_pressure = 0.0  # bar
 
@@ -53,55 +78,64 @@ class BrakeSensor:
         # Braking state
         self.is_braking = False
         self.brake_force = 0.0
+        self.speed = 0.0  # km/h
+
+        # Driving inputs
+        self.driver = driver if driver is not None else LapDriver(TrackProfile())
+        self.car = car
+
+        # Injected anomalies so far
+        self.fade_events = 0
 
-    def sample(self, timestamp: float) -> Dict[str, float]:
+    def sample(self, timestamp: float, dt: float = 0.1) -> Dict[str, float]:
         """
         Generate one telemetry sample.
 
         Args:
             timestamp: Current timestamp (seconds)
+            dt: Time elapsed since the previous sample (seconds)
 
         Returns:
             Dictionary with brake sensor readings
         """
-        # Simulate braking event (30% probability)
-        self.is_braking = random.random() < 0.3
+        # Braking zones come from the lap profile
+        self.speed, _, self.brake_force, _ = self.driver.inputs_one(timestamp, self.car)
+        self.is_braking = self.brake_force > 0.0
 
         if self.is_braking:
-            # Brake force: 0.5 to 1.0 (light to hard braking)
-            self.brake_force = random.uniform(0.5, 1.0)
-
             # Fluid pressure proportional to brake force (max 120 bar)
             self.fluid_pressure = self.brake_force * 120.0
 
-            # Heat generation (simplified model)
-            # Q = μ * F * v (velocity assumed proportional to force)
-            heat_generated = self._calculate_friction_heat(self.brake_force)
-            self.disc_temp += heat_generated
+            # Heating power (°C/s), held constant over the step
+            heat_rate = self._calculate_friction_heat(self.brake_force, self.speed)
 
             # Pad wear (proportional to brake force)
-            self.pad_wear -= self.brake_force * 0.001
+            self.pad_wear -= self.brake_force * PAD_WEAR_RATE * dt
 
         else:
             self.fluid_pressure = 0.0
+            heat_rate = np.zeros(4)
 
-        # Heat dissipation (Newton's law of cooling)
-        # dT/dt = -k * (T - T_ambient)
-        self.disc_temp -= self.cooling_rate * (self.disc_temp - self.ambient_temp) * 0.1
+        self._integrate_temperature(heat_rate, dt)
 
-        # Inject brake fade anomaly (10% chance when temp > 600°C)
-        if np.any(self.disc_temp > 600) and random.random() < 0.1:
+        # Inject brake fade anomaly (FADE_RATE per second while a disc is above FADE_TEMP)
+        if (
+            self.fade_spike.max() < FADE_ACTIVE
+            and np.any(self.disc_temp > FADE_TEMP)
+            and random.random() < event_probability(FADE_RATE, dt)
+        ):
             self._inject_brake_fade()
 
         # Ensure physical constraints
         self.disc_temp = np.maximum(self.disc_temp, self.ambient_temp)
         self.pad_wear = np.clip(self.pad_wear, 0.0, 100.0)
+        reported = self.disc_temp + self.fade_spike
 
         return {
-            "brake_disc_temp_fl": float(self.disc_temp[0]),
-            "brake_disc_temp_fr": float(self.disc_temp[1]),
-            "brake_disc_temp_rl": float(self.disc_temp[2]),
-            "brake_disc_temp_rr": float(self.disc_temp[3]),
+            "brake_disc_temp_fl": float(reported[0]),
+            "brake_disc_temp_fr": float(reported[1]),
+            "brake_disc_temp_rl": float(reported[2]),
+            "brake_disc_temp_rr": float(reported[3]),
             "brake_fluid_pressure": float(self.fluid_pressure),
             "brake_pad_wear_fl": float(self.pad_wear[0]),
             "brake_pad_wear_fr": float(self.pad_wear[1]),
@@ -109,20 +143,53 @@ class BrakeSensor:
             "brake_pad_wear_rr": float(self.pad_wear[3]),
         }
 
-    def _calculate_friction_heat(self, brake_force: float) -> np.ndarray:
+    def advance(self, dt: float) -> None:
+        """
+        Fast-forward an idle period (no braking) in O(1).
+
+        Args:
+            dt: Time to advance (seconds)
+        """
+        self.is_braking = False
+        self.brake_force = 0.0
+        self.speed = 0.0
+        self.fluid_pressure = 0.0
+        self._integrate_temperature(np.zeros(4), dt)
+
+    def _integrate_temperature(self, heat_rate: np.ndarray, dt: float) -> None:
+        """
+        Advance disc temperatures under constant heating power, and decay any fade spike.
+
+        dT/dt = P - k * (T - T_ambient) relaxes toward T_ambient + P / k.
+
+        Args:
+            heat_rate: Heating power per disc (°C/s)
+            dt: Time step (seconds)
+        """
+        if self.cooling_rate > 0:
+            equilibrium = self.ambient_temp + heat_rate / self.cooling_rate
+            self.disc_temp = exponential_approach(
+                self.disc_temp, equilibrium, self.cooling_rate, dt
+            )
+        else:
+            self.disc_temp = self.disc_temp + heat_rate * dt
+        self.fade_spike = exponential_approach(self.fade_spike, 0.0, FADE_RECOVERY_RATE, dt)
+
+    def _calculate_friction_heat(self, brake_force: float, speed_kph: float) -> np.ndarray:
         """
         Calculate heat generated by friction.
 
         Heat generation is proportional to:
         - Brake force
         - Effective friction coefficient (degrades with temperature)
-        - Velocity (assumed proportional to force for simplicity)
+        - Velocity
 
         Args:
             brake_force: Normalized brake force (0.0 to 1.0)
+            speed_kph: Vehicle speed (km/h)
 
         Returns:
-            Heat added to each disc (4-element array)
+            Heating power per disc in °C/s (4-element array)
         """
         # Front-biased braking (60/40 split)
         front_bias = 0.6
@@ -134,17 +201,16 @@ class BrakeSensor:
         )
 
         # Heat generation (simplified)
-        # Q = μ * F * v (velocity factor)
-        velocity_factor = brake_force * 100  # Assumed velocity proportional to force
-        heat = effective_friction * brake_force * velocity_factor
+        # Q = μ * F * v, in °C/s
+        heat = effective_friction * brake_force * speed_kph * HEAT_PER_KPH
 
-        # Distribute heat to wheels
-        heat_distribution = np.array(
+        # Distribute heat to wheels (effective_friction is per disc)
+        heat_distribution = heat * np.array(
             [
-                heat * front_bias * 1.1,  # FL (slightly higher)
-                heat * front_bias * 1.0,  # FR
-                heat * rear_bias * 0.9,  # RL
-                heat * rear_bias * 0.9,  # RR
+                front_bias * 1.1,  # FL (slightly higher)
+                front_bias * 1.0,  # FR
+                rear_bias * 0.9,  # RL
+                rear_bias * 0.9,  # RR
             ]
         )
 
@@ -157,15 +223,19 @@ class BrakeSensor:
         Inject brake fade anomaly.
 
         Simulates rapid temperature spike when brake fade occurs:
-        - Exponential temperature rise
-        - Loss of friction coefficient
+        - Sudden temperature rise on the hottest disc, decaying over a few seconds
         - Detectable as outlier in temperature distribution
+
+        The spike is kept apart from disc_temp, so it cannot heat the disc
+        further and trigger the next fade.
         """
+        self.fade_events += 1
+
         # Find hottest disc
         fade_index = np.argmax(self.disc_temp)
 
         # Rapid temperature spike (brake fade signature)
-        self.disc_temp[fade_index] += random.uniform(100, 200)
+        self.fade_spike[fade_index] += random.uniform(100, 200)
 
         # Optional: Log event for debugging
         # print(f"BRAKE FADE at wheel {fade_index}: {self.disc_temp[fade_index]:.1f}°C")
@@ -2,25 +2,42 @@
 Engine Sensor Physics Model
 
 Implements realistic engine thermodynamics including:
-- RPM distribution by driving mode (idle/cruise/race)
-- Oil temperature: Friction heating + coolant dissipation
+- RPM and throttle from the lap profile (src.telemetry.track)
+- Oil temperature: First-order lag toward an RPM-dependent equilibrium
 - Oil pressure: RPM-dependent with temperature compensation
-- Boost pressure: Turbo wastegate model
+- Boost pressure: Turbo spool modelled as a first-order lag toward wastegate target
 - Fuel consumption: Throttle-dependent
+
+Lags use the exact exponential solution and anomalies are injected at a
+rate per second, so any dt gives the same physics.
 """
 
 import random
-from typing import Dict
+from typing import Dict, Optional
+
+from ..track import LapDriver, TrackProfile
+from .physics import event_probability, exponential_approach, rate_for_step_factor
+
+# Rate constants calibrated to the original 10 Hz per-tick model
+OIL_NOMINAL_TEMP = 90.0  # °C
+OIL_TEMP_RISE_AT_MAX_RPM = 2.5  # °C above nominal at max RPM (equilibrium)
+OIL_THERMAL_RATE = rate_for_step_factor(0.8, 0.1)  # 1/s
+BOOST_SPOOL_RATE = rate_for_step_factor(0.7, 0.1)  # 1/s
+MAX_BOOST = 1.8  # bar
+
+# Overheat anomaly: events per second (the original 2% chance per 10 Hz sample),
+# and how fast the coolant excursion recovers
+OVERHEAT_RATE = rate_for_step_factor(0.98, 0.1)  # ≈ 0.2 /s
+COOLANT_RECOVERY_RATE = 1.0  # 1/s
 
 
 class EngineSensor:
     """
     Simulates engine telemetry with realistic thermodynamics.
 
-    Driving Modes:
-    - Idle: 800 RPM, 0% throttle (10% probability)
-    - Cruise: 3500 RPM, 20-40% throttle (60% probability)
-    - Race: 7500 RPM, 70-100% throttle (30% probability)
+    Driving inputs come from a LapDriver: RPM follows the gearbox (fraction of
+    redline) and throttle follows the lap's acceleration zones, with per-lap
+    pace and intensity variation.
     """
 
     def __init__(
@@ -30,6 +47,8 @@ class EngineSensor:
         redline_rpm: int = 8500,
         oil_capacity_liters: float = 8.5,
         coolant_capacity_liters: float = 12.0,
+        driver: Optional[LapDriver] = None,
+        car: int = 0,
     ):
         """
         Initialize engine sensor.
@@ -40,14 +59,18 @@ class EngineSensor:
             redline_rpm: Redline RPM (warning threshold)
             oil_capacity_liters: Oil capacity
             coolant_capacity_liters: Coolant capacity
+            driver: Lap driver shared with the other sensors (default: own driver)
+            car: This vehicle's index in the driver
         """
         # State variables
         self.rpm = idle_rpm
         self.oil_temp = 90.0  # °C
         self.oil_pressure = 4.5  # bar
         self.coolant_temp = 85.0  # °C
+        self.coolant_excess = 0.0  # °C above oil-correlated value (overheat anomaly)
         self.boost = 0.0  # bar (turbo boost)
         self.throttle = 0.0  # 0.0 to 1.0
+        self.speed = 0.0  # km/h
         self.fuel_consumption_rate = 0.0  # L/100km
 
         # Engine parameters
@@ -57,42 +80,31 @@ class EngineSensor:
         self.oil_capacity = oil_capacity_liters
         self.coolant_capacity = coolant_capacity_liters
 
-        # Operating state
-        self.mode = "idle"
+        # Driving inputs
+        self.driver = driver if driver is not None else LapDriver(TrackProfile())
+        self.car = car
+
+        # Injected anomalies so far
+        self.overheat_events = 0
 
-    def sample(self, timestamp: float) -> Dict[str, float]:
+    def sample(self, timestamp: float, dt: float = 0.1) -> Dict[str, float]:
         """
         Generate one telemetry sample.
 
         Args:
             timestamp: Current timestamp (seconds)
+            dt: Time elapsed since the previous sample (seconds)
 
         Returns:
             Dictionary with engine sensor readings
         """
-        # Select driving mode probabilistically
-        self.mode = random.choices(
-            ["idle", "cruise", "race"], weights=[0.1, 0.6, 0.3], k=1
-        )[0]
-
-        # Update RPM and throttle based on mode
-        if self.mode == "idle":
-            self.rpm = random.gauss(self.idle_rpm, 50)
-            self.throttle = 0.0
-        elif self.mode == "cruise":
-            self.rpm = random.gauss(3500, 300)
-            self.throttle = random.uniform(0.2, 0.4)
-        else:  # race
-            self.rpm = random.gauss(7500, 500)
-            self.throttle = random.uniform(0.7, 1.0)
-
-        # Clamp RPM to valid range
-        self.rpm = max(self.idle_rpm, min(self.max_rpm, self.rpm))
+        # Driving inputs at this point of the lap
+        self.speed, self.throttle, _, rpm_fraction = self.driver.inputs_one(timestamp, self.car)
 
-        # Oil temperature (increases with RPM, cools with airflow)
-        heat_rate = (self.rpm / self.max_rpm) * 0.5
-        cooling_rate = 0.2 * (self.oil_temp - 90)
-        self.oil_temp += heat_rate - cooling_rate
+        # RPM from the gearbox, clamped to valid range
+        self.rpm = max(self.idle_rpm, min(self.max_rpm, rpm_fraction * self.redline_rpm))
+
+        self._integrate(dt)
 
         # Oil pressure (RPM-dependent, drops at high temperature)
         # P = k * RPM * (1 - temp_factor)
@@ -101,27 +113,17 @@ class EngineSensor:
         self.oil_pressure = base_pressure * (1 - temp_penalty)
         self.oil_pressure = max(1.0, self.oil_pressure)  # Minimum 1 bar
 
-        # Coolant temperature (correlated with oil temp)
-        self.coolant_temp = self.oil_temp * 0.95
-
-        # Boost pressure (only when throttle > 50%)
-        if self.throttle > 0.5:
-            # Turbo spools up proportionally
-            target_boost = (self.throttle - 0.5) * 2.0 * 1.8  # Max 1.8 bar
-            self.boost += (target_boost - self.boost) * 0.3  # Smooth ramp-up
-        else:
-            self.boost *= 0.7  # Quick spool-down
-
-        self.boost = max(0.0, self.boost)
-
         # Fuel consumption (throttle-dependent)
         # Base: 8 L/100km, Racing: 20 L/100km
         self.fuel_consumption_rate = 8.0 + self.throttle * 12.0
 
-        # Inject overheating anomaly (2% probability)
-        if random.random() < 0.02:
+        # Inject overheating anomaly (OVERHEAT_RATE per second)
+        if random.random() < event_probability(OVERHEAT_RATE, dt):
             self._inject_overheat()
 
+        # Coolant temperature (correlated with oil temp, plus any overheat excursion)
+        self.coolant_temp = self.oil_temp * 0.95 + self.coolant_excess
+
         # Ensure physical constraints
         self.oil_temp = max(60.0, min(150.0, self.oil_temp))
         self.coolant_temp = max(60.0, min(130.0, self.coolant_temp))
@@ -136,6 +138,39 @@ class EngineSensor:
             "throttle_position": float(self.throttle),
         }
 
+    def advance(self, dt: float) -> None:
+        """
+        Fast-forward an idle period in O(1).
+
+        Args:
+            dt: Time to advance (seconds)
+        """
+        self.speed = 0.0
+        self.rpm = self.idle_rpm
+        self.throttle = 0.0
+        self._integrate(dt)
+        self.coolant_temp = self.oil_temp * 0.95 + self.coolant_excess
+
+    def _integrate(self, dt: float) -> None:
+        """
+        Advance oil temperature and boost for the current RPM/throttle.
+
+        Args:
+            dt: Time step (seconds)
+        """
+        # Oil temperature (increases with RPM, cools with airflow)
+        oil_equilibrium = OIL_NOMINAL_TEMP + OIL_TEMP_RISE_AT_MAX_RPM * (self.rpm / self.max_rpm)
+        self.oil_temp = exponential_approach(self.oil_temp, oil_equilibrium, OIL_THERMAL_RATE, dt)
+
+        # Boost pressure (only when throttle > 50%, spools down otherwise)
+        target_boost = max(0.0, (self.throttle - 0.5) * 2.0 * MAX_BOOST)
+        self.boost = max(0.0, exponential_approach(self.boost, target_boost, BOOST_SPOOL_RATE, dt))
+
+        # Coolant excursion from an overheat recovers toward zero
+        self.coolant_excess = exponential_approach(
+            self.coolant_excess, 0.0, COOLANT_RECOVERY_RATE, dt
+        )
+
     def _inject_overheat(self) -> None:
         """
         Inject overheating anomaly.
@@ -145,7 +180,8 @@ class EngineSensor:
         - Secondary oil temperature increase
         - Detectable as sudden temperature spike
         """
-        self.coolant_temp += random.uniform(20, 35)
+        self.overheat_events += 1
+        self.coolant_excess += random.uniform(20, 35)
         self.oil_temp += random.uniform(10, 20)
 
         # Optional: Log event for debugging
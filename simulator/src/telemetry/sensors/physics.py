@@ -0,0 +1,68 @@
+"""
+Closed-Form Physics Helpers
+
+First-order systems dx/dt = -rate * (x - target) have the exact solution
+
+    x(t + dt) = target + (x(t) - target) * exp(-rate * dt)
+
+which is stable for any dt, so sensor state can advance an arbitrary time
+step in O(1) and results do not depend on the sample rate.
+"""
+
+from typing import TypeVar, Union
+
+import numpy as np
+
+Value = TypeVar("Value", float, np.ndarray)
+
+
+def exponential_approach(
+    value: Value, target: Union[float, np.ndarray], rate: float, dt: float
+) -> Value:
+    """
+    Advance a first-order lag toward its target.
+
+    Args:
+        value: Current state
+        target: Equilibrium the state relaxes toward
+        rate: Rate constant (1/s)
+        dt: Time step (s)
+
+    Returns:
+        State after dt
+    """
+    return target + (value - target) * np.exp(-rate * dt)  # type: ignore[return-value]
+
+
+def rate_for_step_factor(factor: float, step: float) -> float:
+    """
+    Convert a per-step retention factor into a continuous rate constant.
+
+    Example: a value that keeps 70% of its distance to target every 0.1 s
+    has rate -ln(0.7) / 0.1 ≈ 3.57 /s.
+
+    Args:
+        factor: Fraction of the distance to target kept per step (0 < factor < 1)
+        step: Step length (s)
+
+    Returns:
+        Rate constant (1/s)
+    """
+    return float(-np.log(factor) / step)
+
+
+def event_probability(rate: float, dt: float) -> float:
+    """
+    Probability that a Poisson event occurs within one step.
+
+    Injecting an event with p = 1 - exp(-rate * dt) per sample gives the same
+    events per second at any sample rate, unlike a fixed per-sample chance.
+
+    Args:
+        rate: Events per second
+        dt: Step length (s)
+
+    Returns:
+        Probability in [0, 1)
+    """
+    return float(-np.expm1(-rate * dt))
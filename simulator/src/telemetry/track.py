@@ -0,0 +1,382 @@
+"""
+Track Profile Engine
+
+Precomputes what a driver does around a lap, so the sensors read driving
+inputs from lookup tables instead of drawing a random driving mode per tick.
+
+- Sector speed limits (straights and corners) are turned into a speed trace by
+  a forward pass (drag-limited acceleration) and a backward pass (downforce-
+  dependent braking), the standard lap-time simulation
+- Throttle, brake pressure and engine speed (as a fraction of redline, through
+  a sequential gearbox) follow from the trace
+- Everything is resampled on a uniform time grid, so a lookup is one index
+  computation plus a linear interpolation
+- LapDriver tracks each car's position and draws pace and intensity once per
+  lap (per-lap variation); lookups are vectorized across cars
+- Every few laps a car stops in the pits with the engine idling
+"""
+
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Table channels, in column order
+CHANNELS = ("speed_kph", "throttle", "brake", "rpm_fraction", "distance_m")
+
+
+@dataclass
+class TrackSector:
+    """A stretch of track with a speed limit (corners) or none (straights)."""
+
+    length_m: float
+    speed_kph: Optional[float] = None  # None = straight (top speed)
+
+
+# A generic 4.3 km GT circuit
+DEFAULT_SECTORS: Tuple[TrackSector, ...] = (
+    TrackSector(850),
+    TrackSector(90, 85),
+    TrackSector(380),
+    TrackSector(110, 140),
+    TrackSector(520),
+    TrackSector(70, 65),
+    TrackSector(300),
+    TrackSector(180, 170),
+    TrackSector(640),
+    TrackSector(120, 95),
+    TrackSector(260),
+    TrackSector(160, 205),
+    TrackSector(450),
+    TrackSector(80, 75),
+    TrackSector(80),
+)
+
+
+@dataclass
+class DriverInputs:
+    """Driving inputs per car (arrays of shape (num_cars,))."""
+
+    speed_kph: np.ndarray
+    throttle: np.ndarray  # 0.0 to 1.0
+    brake: np.ndarray  # normalized brake force, 0.0 to 1.0
+    rpm_fraction: np.ndarray  # engine speed / redline
+    distance_m: np.ndarray  # distance into the lap
+    lap: np.ndarray  # completed laps
+
+
+class TrackProfile:
+    """
+    Lap lookup tables for one track.
+
+    Attributes:
+        lap_time: Reference lap time (seconds)
+        table: Array of shape (n_steps + 1, len(CHANNELS)) on a uniform time grid
+    """
+
+    def __init__(
+        self,
+        sectors: Sequence[TrackSector] = DEFAULT_SECTORS,
+        top_speed_kph: float = 285.0,
+        max_accel: float = 8.0,
+        brake_decel: float = 11.0,
+        aero_brake_decel: float = 8.0,
+        gears: int = 6,
+        resolution_m: float = 2.0,
+        time_step: float = 0.01,
+    ):
+        """
+        Build the lap tables.
+
+        Args:
+            sectors: Track layout, in driving order (the lap wraps around)
+            top_speed_kph: Top speed, where drag cancels full-throttle acceleration
+            max_accel: Full-throttle acceleration from standstill (m/s²)
+            brake_decel: Maximum mechanical braking deceleration (m/s²)
+            aero_brake_decel: Extra deceleration from downforce at top speed (m/s²)
+            gears: Number of forward gears
+            resolution_m: Distance step of the speed trace (m)
+            time_step: Time step of the lookup table (s)
+        """
+        if not sectors:
+            raise ValueError("A track needs at least one sector")
+
+        self.sectors = list(sectors)
+        self.time_step = time_step
+        v_top = top_speed_kph / 3.6
+
+        # Speed limit along the lap
+        lengths = np.array([s.length_m for s in self.sectors], dtype=float)
+        limits = np.array(
+            [v_top if s.speed_kph is None else min(s.speed_kph / 3.6, v_top) for s in sectors]
+        )
+        self.length_m = float(lengths.sum())
+        n_points = max(2, int(math.ceil(self.length_m / resolution_m)))
+        distance = np.linspace(0.0, self.length_m, n_points + 1)
+        sector_index = np.searchsorted(np.cumsum(lengths), distance[:-1], side="right")
+        v_limit = limits[np.minimum(sector_index, len(limits) - 1)]
+        ds = self.length_m / n_points
+
+        def accel(v: float) -> float:
+            return max_accel * (1.0 - (v / v_top) ** 2)
+
+        def decel(v: float) -> float:
+            return brake_decel + aero_brake_decel * (v / v_top) ** 2
+
+        # Forward (acceleration-limited) and backward (braking-limited) passes.
+        # Two laps so the wrap-around from the last sector into the first is consistent.
+        v_min_limit = float(v_limit.min())
+        forward = np.empty(n_points)
+        v = v_min_limit
+        for _ in range(2):
+            for i in range(n_points):
+                v = min(v_limit[i], math.sqrt(v * v + 2.0 * accel(v) * ds))
+                forward[i] = v
+        speed = forward.copy()
+        v = speed[0]
+        for _ in range(2):
+            for i in range(n_points - 1, -1, -1):
+                v = min(speed[i], math.sqrt(v * v + 2.0 * decel(v) * ds))
+                speed[i] = v
+
+        # Inputs from the speed trace
+        following = np.roll(speed, -1)
+        delta_v2 = (following**2 - speed**2) / (2.0 * ds)  # longitudinal acceleration (m/s²)
+        braking = delta_v2 < -1e-6
+        drag_share = (speed / v_top) ** 2
+        full_decel = brake_decel + aero_brake_decel
+        brake = np.where(braking, np.clip(-delta_v2 / full_decel, 0.0, 1.0), 0.0)
+        throttle = np.where(
+            braking,
+            0.0,
+            np.clip(drag_share + np.maximum(delta_v2, 0.0) / max_accel, 0.0, 1.0),
+        )
+
+        # Sequential gearbox: gear g tops out at v_top * (g / gears) ** 0.7 at redline
+        gear_tops = v_top * (np.arange(1, gears + 1) / gears) ** 0.7
+        gear = np.minimum(np.searchsorted(gear_tops, speed), gears - 1)
+        rpm_fraction = np.clip(speed / gear_tops[gear], 0.0, 1.0)
+
+        # Resample on a uniform time grid
+        elapsed = np.concatenate([[0.0], np.cumsum(ds / ((speed + following) / 2.0))])
+        self.lap_time = float(elapsed[-1])
+        grid = np.arange(0.0, self.lap_time + time_step, time_step)
+        columns = [
+            np.append(speed, speed[0]) * 3.6,
+            np.append(throttle, throttle[0]),
+            np.append(brake, brake[0]),
+            np.append(rpm_fraction, rpm_fraction[0]),
+            distance,
+        ]
+        self.table = np.column_stack([np.interp(grid, elapsed, col) for col in columns])
+        self._rows: List[List[float]] = self.table.tolist()
+        self._last_row = len(self._rows) - 1
+
+    def lookup(self, phase: np.ndarray) -> np.ndarray:
+        """
+        Interpolate all channels at lap phases (vectorized).
+
+        Args:
+            phase: Time into the lap at reference pace (seconds), any shape
+
+        Returns:
+            Array of shape phase.shape + (len(CHANNELS),)
+        """
+        position = np.clip(np.asarray(phase, dtype=float) / self.time_step, 0, self._last_row)
+        index = np.minimum(position.astype(np.int64), self._last_row - 1)
+        frac = (position - index)[..., None]
+        low = self.table[index]
+        return low + (self.table[index + 1] - low) * frac
+
+    def lookup_one(self, phase: float) -> Tuple[float, float, float, float]:
+        """
+        Scalar fast path of lookup() for one car, in plain Python floats.
+
+        Returns:
+            (speed_kph, throttle, brake, rpm_fraction)
+        """
+        position = phase / self.time_step
+        if position <= 0.0:
+            index, frac = 0, 0.0
+        else:
+            index = int(position)
+            if index >= self._last_row:
+                index, frac = self._last_row - 1, 1.0
+            else:
+                frac = position - index
+        s0, t0, b0, r0, _ = self._rows[index]
+        s1, t1, b1, r1, _ = self._rows[index + 1]
+        return (
+            s0 + (s1 - s0) * frac,
+            t0 + (t1 - t0) * frac,
+            b0 + (b1 - b0) * frac,
+            r0 + (r1 - r0) * frac,
+        )
+
+
+class LapDriver:
+    """
+    Drives one or more cars around a TrackProfile.
+
+    Each lap, every car draws a pace factor (lap time multiplier) and an
+    intensity factor (throttle/brake scaling), so laps differ without any
+    per-sample randomness. Cars start at random points of the lap. Every
+    pit_every_laps-th lap ends with pit_stop_sec stationary at idle.
+
+    Usage:
+        driver = LapDriver(TrackProfile(), num_cars=100)
+        inputs = driver.inputs(np.full(100, time.time()))   # all cars at once
+        speed, throttle, brake, rpm_fraction = driver.inputs_one(time.time())  # car 0
+    """
+
+    def __init__(
+        self,
+        profile: TrackProfile,
+        num_cars: int = 1,
+        pace_variation: float = 0.01,
+        intensity_variation: float = 0.05,
+        pit_every_laps: int = 10,
+        pit_stop_sec: float = 40.0,
+        seed: Optional[int] = None,
+    ):
+        """
+        Initialize driver state.
+
+        Args:
+            profile: Track lookup tables
+            num_cars: Number of cars driven
+            pace_variation: Std dev of the per-lap lap-time multiplier
+            intensity_variation: Std dev of the per-lap throttle/brake multiplier
+            pit_every_laps: Laps between pit stops (0 = never stop)
+            pit_stop_sec: Time stationary at idle per pit stop
+            seed: Random seed
+        """
+        self.profile = profile
+        self.num_cars = num_cars
+        self.pace_variation = pace_variation
+        self.intensity_variation = intensity_variation
+        self.pit_every_laps = pit_every_laps
+        self.pit_stop_sec = pit_stop_sec
+        self._rng = np.random.default_rng(seed)
+
+        self.lap = np.zeros(num_cars, dtype=np.int64)
+        self.lap_start = np.full(num_cars, np.nan)  # set on the first lookup
+        self.pace = np.ones(num_cars)
+        self.intensity = np.ones(num_cars)
+        self.stop = np.zeros(num_cars)  # stationary seconds at the end of the current lap
+        # Per-car (start, end, pace, intensity, driving time) as Python floats for inputs_one()
+        self._current_lap: List[Optional[Tuple[float, float, float, float, float]]] = [
+            None
+        ] * num_cars
+        self._draw_lap_factors(np.arange(num_cars))
+
+    def restart(
+        self, timestamp: Union[float, np.ndarray], cars: Optional[np.ndarray] = None
+    ) -> None:
+        """
+        Start a fresh lap (e.g. leaving the pits after an idle period).
+
+        Args:
+            timestamp: Lap start time(s)
+            cars: Car indices (default: all)
+        """
+        cars = np.arange(self.num_cars) if cars is None else np.asarray(cars)
+        self.lap_start[cars] = timestamp
+        self._draw_lap_factors(cars)
+
+    def inputs(self, timestamps: np.ndarray) -> DriverInputs:
+        """
+        Driving inputs of every car (vectorized).
+
+        Args:
+            timestamps: Sample time per car (seconds), shape (num_cars,)
+
+        Returns:
+            DriverInputs for all cars
+        """
+        timestamps = np.broadcast_to(np.asarray(timestamps, dtype=float), (self.num_cars,))
+        phase = self._advance_laps(timestamps, np.arange(self.num_cars))
+        values = self.profile.lookup(phase / self.pace)
+        speed, throttle, brake, rpm_fraction, distance = np.moveaxis(values, -1, 0)
+        driving = phase < self.profile.lap_time * self.pace  # else stopped in the pits
+        return DriverInputs(
+            speed_kph=np.where(driving, speed / self.pace, 0.0),
+            throttle=np.where(driving, np.minimum(throttle * self.intensity, 1.0), 0.0),
+            brake=np.where(driving, np.minimum(brake * self.intensity, 1.0), 0.0),
+            rpm_fraction=np.where(driving, rpm_fraction, 0.0),
+            distance_m=distance,
+            lap=self.lap.copy(),
+        )
+
+    def inputs_one(self, timestamp: float, car: int = 0) -> Tuple[float, float, float, float]:
+        """
+        Driving inputs of a single car (scalar fast path, no numpy per call).
+
+        Args:
+            timestamp: Sample time (seconds)
+            car: Car index
+
+        Returns:
+            (speed_kph, throttle, brake, rpm_fraction)
+        """
+        lap = self._current_lap[car]
+        if lap is None or timestamp >= lap[1]:
+            self._advance_laps(np.array([float(timestamp)]), np.array([car]))
+            driving = self.profile.lap_time * self.pace[car]
+            lap = self._current_lap[car] = (
+                float(self.lap_start[car]),
+                float(self.lap_start[car] + driving + self.stop[car]),
+                float(self.pace[car]),
+                float(self.intensity[car]),
+                float(driving),
+            )
+        start, _, pace, intensity, driving = lap
+
+        elapsed = timestamp - start
+        if elapsed >= driving:
+            return 0.0, 0.0, 0.0, 0.0  # stopped in the pits
+        speed, throttle, brake, rpm_fraction = self.profile.lookup_one(elapsed / pace)
+        return (
+            speed / pace,
+            min(throttle * intensity, 1.0),
+            min(brake * intensity, 1.0),
+            rpm_fraction,
+        )
+
+    def _advance_laps(self, timestamps: np.ndarray, cars: np.ndarray) -> np.ndarray:
+        """Roll completed laps forward and return each car's time into its lap."""
+        lap_time = self.profile.lap_time
+
+        unstarted = np.isnan(self.lap_start[cars])
+        if unstarted.any():
+            new = cars[unstarted]
+            offset = self._rng.uniform(0.0, lap_time, size=len(new)) * self.pace[new]
+            self.lap_start[new] = timestamps[unstarted] - offset
+
+        elapsed = timestamps - self.lap_start[cars]
+        duration = lap_time * self.pace[cars] + self.stop[cars]
+        done = elapsed >= duration
+        if done.any():
+            # Skip whole laps at once (long gaps), then draw the new lap's factors
+            finished = cars[done]
+            laps = np.floor(elapsed[done] / duration[done]).astype(np.int64)
+            self.lap_start[finished] += laps * duration[done]
+            self.lap[finished] += laps
+            self._draw_lap_factors(finished)
+            elapsed = timestamps - self.lap_start[cars]
+
+        return np.maximum(elapsed, 0.0)
+
+    def _draw_lap_factors(self, cars: np.ndarray) -> None:
+        for car in np.atleast_1d(cars).tolist():
+            self._current_lap[car] = None
+        self.pace[cars] = np.maximum(
+            0.9, self._rng.normal(1.0, self.pace_variation, size=len(cars))
+        )
+        self.intensity[cars] = np.clip(
+            self._rng.normal(1.0, self.intensity_variation, size=len(cars)), 0.5, 1.2
+        )
+        if self.pit_every_laps > 0:
+            pit_lap = (self.lap[cars] + 1) % self.pit_every_laps == 0
+            self.stop[cars] = np.where(pit_lap, self.pit_stop_sec, 0.0)
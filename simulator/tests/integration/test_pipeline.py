@@ -0,0 +1,115 @@
+"""Cached telemetry pipeline: what a rerun recomputes."""
+
+import importlib.util
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src.pipeline.runner import read_manifest
+from src.pipeline.telemetry import build_pipeline, summarize
+from src.telemetry.schema import FEATURE_COLUMNS
+
+
+def write_hour(root, hour, rows=400, seed=0):
+    rng = np.random.default_rng(seed + hour)
+    columns = {
+        "vehicle_id": ["GT3-RACER-01"] * rows,
+        "timestamp": pa.array(hour * 3_600_000 + np.arange(rows) * 100, type=pa.int64()),
+        "session_id": ["session-1"] * rows,
+    }
+    for name in FEATURE_COLUMNS:
+        columns[name] = rng.normal(100.0, 5.0, rows)
+    path = root / "year=2026" / "month=01" / "day=05" / f"hour={hour:02d}" / "part-0.parquet"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(pa.table(columns), path)
+
+
+def computed(result):
+    return {report.name: report.computed for report in result.reports}
+
+
+@pytest.fixture
+def source(tmp_path):
+    root = tmp_path / "raw"
+    for hour in (0, 1):
+        write_hour(root, hour)
+    return root
+
+
+def make_pipeline(cache, **overrides):
+    params = {"num_trees": 5, "num_samples_per_tree": 32, "seed": 0, **overrides}
+    return build_pipeline(cache, **params)
+
+
+def test_changing_sigma_reruns_only_evaluate(source, tmp_path):
+    cache = tmp_path / "cache"
+    first = make_pipeline(cache, anomaly_sigma=3.0).run(source)
+
+    rerun = make_pipeline(cache, anomaly_sigma=1.0).run(source)
+    assert computed(rerun) == {"preprocess": 0, "features": 0, "train": 0, "evaluate": 2}
+
+    # A lower threshold on the same model flags at least as many rows
+    assert summarize(rerun)["anomalies"] >= summarize(first)["anomalies"]
+    assert summarize(rerun)["anomalies"] > 0
+
+
+def test_rerun_hits_the_cache_and_new_hours_recompute_only_themselves(source, tmp_path):
+    cache = tmp_path / "cache"
+    first = make_pipeline(cache).run(source)
+    assert computed(first) == {"preprocess": 2, "features": 2, "train": 1, "evaluate": 2}
+
+    rerun = make_pipeline(cache).run(source)
+    assert computed(rerun) == {"preprocess": 0, "features": 0, "train": 0, "evaluate": 0}
+    assert all(report.hit_rate == 1.0 for report in rerun.reports)
+
+    # A new hour is cleaned once; the model (all hours) and therefore every score change
+    write_hour(source, 2)
+    grown = make_pipeline(cache).run(source)
+    assert computed(grown) == {"preprocess": 1, "features": 1, "train": 1, "evaluate": 3}
+
+
+def test_redeliveries_crossing_an_hour_boundary_are_dropped(tmp_path):
+    source = tmp_path / "raw"
+    write_hour(source, 0)
+    write_hour(source, 1)
+    # The last 20 samples of hour 0 were retried and landed in hour 1's partition
+    first = pq.read_table(next((source / "year=2026").rglob("hour=00/*")))
+    retried = first.slice(first.num_rows - 20)
+    hour_1 = next((source / "year=2026").rglob("hour=01")) / "part-1.parquet"
+    pq.write_table(retried, hour_1)
+    # Gzip JSON objects (Parquet conversion disabled) in the hour are skipped
+    (hour_1.parent / "part-2").write_bytes(b"\x1f\x8b\x08\x00")
+
+    result = make_pipeline(tmp_path / "cache").run(source)
+
+    manifests = {
+        pid.split("/")[-1]: read_manifest(path)["metadata"]
+        for pid, path in result.outputs["preprocess"].items()
+    }
+    assert manifests["hour=00"]["duplicates"] == 0
+    assert manifests["hour=01"]["duplicates"] == 20
+    assert manifests["hour=01"]["skipped_files"] == 1
+    assert summarize(result)["rows"] == 800
+
+
+def test_editing_a_helper_module_reruns_the_stages_that_depend_on_it(source, tmp_path):
+    helper = tmp_path / "forest_helper.py"
+    helper.write_text("LEAF_SIZE = 1\n")
+    spec = importlib.util.spec_from_file_location("forest_helper", helper)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    def run():
+        pipeline = make_pipeline(tmp_path / "cache")
+        train = pipeline.stages["train"]
+        train.depends = [*train.depends, module]
+        return pipeline.run(source)
+
+    run()
+    assert computed(run()) == {"preprocess": 0, "features": 0, "train": 0, "evaluate": 0}
+
+    # Only the helper's source changed: train and its downstream stage rerun
+    helper.write_text("LEAF_SIZE = 16\n")
+    assert computed(run()) == {"preprocess": 0, "features": 0, "train": 1, "evaluate": 2}
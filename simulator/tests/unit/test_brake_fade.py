@@ -0,0 +1,44 @@
+"""Brake fade anomalies on the default track."""
+
+import random
+from typing import Tuple
+
+import numpy as np
+import pytest
+
+from src.telemetry.sensors.brake import FADE_ACTIVE, BrakeSensor
+from src.telemetry.track import LapDriver, TrackProfile
+
+
+def run_brakes(rate_hz: float, seconds: float, seed: int) -> Tuple[BrakeSensor, float, float]:
+    """Returns (sensor, max reported disc temperature, share of samples inside a fade)."""
+    random.seed(seed)
+    np.random.seed(seed)
+    brake = BrakeSensor(driver=LapDriver(TrackProfile(), seed=seed))
+    max_reported = 0.0
+    fade_samples = 0
+    steps = int(seconds * rate_hz)
+    dt = 1.0 / rate_hz
+    for step in range(steps):
+        sample = brake.sample(1_000.0 + step * dt, dt)
+        temps = [value for name, value in sample.items() if name.startswith("brake_disc_temp")]
+        max_reported = max(max_reported, max(temps))
+        fade_samples += brake.fade_spike.max() >= FADE_ACTIVE
+    return brake, max_reported, fade_samples / steps
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_fade_events_occur_at_a_bounded_rate(seed):
+    brake, max_reported, fade_share = run_brakes(rate_hz=10, seconds=3600, seed=seed)
+    # About one fade per lap (~35/h) on the default track
+    assert 10 <= brake.fade_events <= 80
+    # Spikes decay on their own: no runaway, and fade is a small share of the time
+    assert max_reported < 1_000.0
+    assert fade_share < 0.15
+
+
+def test_fade_rate_does_not_depend_on_sample_rate():
+    slow = run_brakes(rate_hz=10, seconds=1800, seed=3)[0].fade_events
+    fast = run_brakes(rate_hz=50, seconds=1800, seed=3)[0].fade_events
+    assert 5 <= slow <= 40
+    assert 5 <= fast <= 40
@@ -0,0 +1,122 @@
+"""Time-windowed Bloom filter deduplication."""
+
+import gzip
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.dataset.dedup import Deduplicator, deduplicate_dataset
+
+DAY_MS = 86_400_000
+
+
+def record(timestamp, vehicle_id="GT3-RACER-01"):
+    return {"vehicle_id": vehicle_id, "session_id": "s1", "timestamp": timestamp}
+
+
+def batch(timestamps, vehicle_id="GT3-RACER-01"):
+    return pa.table(
+        {
+            "vehicle_id": [vehicle_id] * len(timestamps),
+            "session_id": ["s1"] * len(timestamps),
+            "timestamp": pa.array(timestamps, type=pa.int64()),
+        }
+    )
+
+
+def test_far_future_record_does_not_expire_the_window():
+    dedup = Deduplicator(window_sec=60, capacity=10_000)
+    for timestamp in range(0, 30_000, 100):
+        assert not dedup.is_duplicate(record(timestamp))
+
+    # One bad clock: passed through, window unchanged
+    assert not dedup.is_duplicate(record(DAY_MS, vehicle_id="GT3-RACER-02"))
+    assert dedup.stats.outliers == 1
+
+    # Redeliveries of recent samples are still caught
+    assert dedup.is_duplicate(record(29_900))
+    assert dedup.is_duplicate(record(1_000))
+    assert dedup.stats.late == 0
+
+
+def test_far_future_rows_in_a_batch_do_not_expire_the_window():
+    dedup = Deduplicator(window_sec=60, capacity=10_000)
+    dedup.filter_table(batch(list(range(0, 30_000, 100))))
+
+    mask = dedup.keep_mask(batch([10_000, DAY_MS, 20_000, 30_000]))
+    assert mask.tolist() == [False, True, False, True]
+    assert (dedup.stats.outliers, dedup.stats.late) == (1, 0)
+
+
+def test_sustained_jump_moves_the_window():
+    dedup = Deduplicator(window_sec=60, capacity=10_000, confirm_jump=10)
+    dedup.filter_table(batch(list(range(0, 30_000, 100))))
+
+    # A new session a day later: the first confirm_jump - 1 rows are outliers
+    later = DAY_MS + np.arange(0, 5_000, 100)
+    assert dedup.keep_mask(batch(later.tolist())).all()
+    assert dedup.stats.outliers == 9
+
+    # The window now follows the new timeline
+    assert dedup.is_duplicate(record(int(later[-1])))
+    assert not dedup.is_duplicate(record(0))
+    assert dedup.stats.late == 1
+
+
+def test_false_positive_rate_stays_near_target():
+    fp_rate = 1e-3
+    dedup = Deduplicator(window_sec=60, capacity=200_000, fp_rate=fp_rate)
+    # 200k unique samples inside one window: 20 vehicles, one sample each every 6 ms
+    timestamps = np.repeat(np.arange(10_000) * 6, 20)
+    vehicles = np.tile([f"CAR-{i:02d}" for i in range(20)], 10_000)
+    table = pa.table(
+        {
+            "vehicle_id": vehicles,
+            "session_id": ["s1"] * len(timestamps),
+            "timestamp": pa.array(timestamps, type=pa.int64()),
+        }
+    )
+    for begin in range(0, table.num_rows, 50_000):
+        dedup.keep_mask(table.slice(begin, 50_000))
+
+    # Every drop here is a false positive: no row was redelivered
+    assert dedup.stats.rows == 200_000
+    assert dedup.stats.duplicates / dedup.stats.rows < 2 * fp_rate
+
+
+def test_redeliveries_within_the_window_are_all_caught():
+    dedup = Deduplicator(window_sec=60, capacity=10_000)
+    original = list(range(0, 50_000, 100))
+    dedup.filter_table(batch(original))
+
+    # Retried publishes arrive up to ~20 s after their original timestamps
+    mask = dedup.keep_mask(batch(original[300:] + list(range(50_000, 52_000, 100))))
+    assert not mask[:200].any()
+    assert mask[200:].all()
+
+
+def test_rows_older_than_the_window_pass_through_as_late():
+    dedup = Deduplicator(window_sec=60, capacity=10_000)
+    for timestamp in range(0, 200_000, 1000):
+        dedup.is_duplicate(record(timestamp))
+
+    # 2 minutes behind the newest sample: outside the window, never reported as duplicate
+    assert not dedup.is_duplicate(record(60_000))
+    assert dedup.keep_mask(batch([60_000, 61_000])).all()
+    assert dedup.stats.late == 3
+    assert dedup.stats.duplicates == 0
+
+
+def test_deduplicate_dataset_spans_files_and_skips_json_objects(tmp_path):
+    hour_0 = tmp_path / "hour=00"
+    hour_1 = tmp_path / "hour=01"
+    hour_0.mkdir()
+    hour_1.mkdir()
+    pq.write_table(batch(list(range(0, 10_000, 100))), hour_0 / "object-a")
+    pq.write_table(batch(list(range(9_000, 12_000, 100))), hour_1 / "object-b")
+    with gzip.open(hour_1 / "object-c", "wt") as f:
+        f.write('{"vehicle_id": "GT3-RACER-01", "timestamp": 0}\n')
+
+    stats = deduplicate_dataset(tmp_path, Deduplicator(window_sec=60, capacity=10_000))
+    assert (stats.rows, stats.duplicates, stats.skipped_files) == (130, 10, 1)
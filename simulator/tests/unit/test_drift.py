@@ -0,0 +1,78 @@
+"""Mergeable drift sketches and drift reporting."""
+
+import numpy as np
+import pytest
+
+from src.observability.drift import FEATURE_RANGES, DriftMonitor, Histogram
+
+FEATURE = "brake_disc_temp_fl"
+
+
+def sketch(values, vehicle_ids=None, features=(FEATURE,)):
+    monitor = DriftMonitor(features)
+    if vehicle_ids is None:
+        vehicle_ids = np.array(["GT3-RACER-01"] * len(values))
+    monitor.update_columns(vehicle_ids, {feature: values for feature in features})
+    return monitor
+
+
+def test_merged_sketches_match_a_single_pass():
+    rng = np.random.default_rng(0)
+    values = rng.normal(600.0, 80.0, 10_000)
+    vehicle_ids = rng.choice(["CAR-1", "CAR-2"], len(values))
+
+    merged = sketch(values[:3_000], vehicle_ids[:3_000])
+    merged.merge(sketch(values[3_000:], vehicle_ids[3_000:]))
+    single = sketch(values, vehicle_ids)
+
+    for vehicle_id in ("CAR-1", "CAR-2"):
+        a, b = merged.sketches[vehicle_id][FEATURE], single.sketches[vehicle_id][FEATURE]
+        assert a.moments.count == b.moments.count
+        assert a.moments.mean == pytest.approx(b.moments.mean)
+        assert a.moments.variance == pytest.approx(b.moments.variance)
+        assert (a.moments.min, a.moments.max) == (b.moments.min, b.moments.max)
+        assert a.quantiles.to_dict() == b.quantiles.to_dict()
+        assert a.histogram.counts.tolist() == b.histogram.counts.tolist()
+
+
+def test_snapshot_round_trips_through_json(tmp_path):
+    rng = np.random.default_rng(1)
+    monitor = sketch(rng.normal(600.0, 80.0, 1_000))
+    monitor.update({"vehicle_id": "CAR-2", FEATURE: 1500.0})  # overflow bin
+    monitor.save(tmp_path / "snapshot.json")
+
+    loaded = DriftMonitor.load(tmp_path / "snapshot.json")
+    assert loaded.features == monitor.features
+    for vehicle_id, sketches in monitor.sketches.items():
+        assert loaded.sketches[vehicle_id][FEATURE].to_dict() == sketches[FEATURE].to_dict()
+    assert loaded.compare(monitor, per_vehicle=True) == monitor.compare(monitor, per_vehicle=True)
+
+
+def test_same_distribution_does_not_drift_and_a_shifted_one_does():
+    rng = np.random.default_rng(2)
+    baseline = sketch(rng.normal(600.0, 80.0, 20_000))
+
+    [same] = sketch(rng.normal(600.0, 80.0, 5_000)).compare(baseline)
+    assert not same.drifted
+    assert same.psi < 0.05 and same.ks < 0.05
+    assert abs(same.mean_shift) < 0.1
+
+    [shifted] = sketch(rng.normal(700.0, 80.0, 5_000)).compare(baseline)
+    assert shifted.drifted
+    assert shifted.psi > 0.2 and shifted.ks > 0.1
+    assert shifted.mean_shift == pytest.approx(1.25, abs=0.1)
+
+
+@pytest.mark.parametrize("feature", ["brake_pad_wear_fl", "throttle_position"])
+def test_range_maximum_falls_in_the_last_bin(feature):
+    low, high = FEATURE_RANGES[feature]
+    values = np.array([low, high, np.nextafter(high, -np.inf), high + 1e-9, low - 1e-9])
+
+    batch = Histogram(low, high)
+    batch.update_batch(values)
+    single = Histogram(low, high)
+    for value in values:
+        single.update(float(value))
+
+    for histogram in (batch, single):
+        assert histogram.counts.tolist() == [1, 1] + [0] * (histogram.bins - 2) + [2, 1]
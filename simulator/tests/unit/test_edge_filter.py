@@ -0,0 +1,89 @@
+"""Edge pre-filter and its scorers."""
+
+import numpy as np
+import pytest
+
+from src.model.rcf import RandomCutForest, build_tree
+from src.telemetry.edge_filter import EdgeFilter, RcfScorer, RollingZScorer
+from src.telemetry.schema import FEATURE_COLUMNS
+
+
+def make_sample(timestamp, values):
+    return {"timestamp": timestamp, **dict(zip(FEATURE_COLUMNS, values.tolist()))}
+
+
+@pytest.fixture
+def nominal():
+    rng = np.random.default_rng(0)
+    return rng.normal(100.0, 1.0, size=(600, len(FEATURE_COLUMNS)))
+
+
+def test_rolling_scorer_scores_without_updating(nominal):
+    scorer = RollingZScorer(window=50, warmup=10)
+    for row in nominal[:100]:
+        scorer.update(make_sample(0, row))
+
+    spike = make_sample(0, nominal[100] + 50.0)
+    assert scorer.score(spike) == scorer.score(spike) > 10.0
+    assert scorer.count == 100
+
+
+def test_rcf_scorer_flags_outliers_in_holdout_sigmas(nominal):
+    rng = np.random.default_rng(1)
+    points = nominal[:512].astype(np.float32)
+    samples = [points[rng.choice(len(points), 256, replace=False)] for _ in range(10)]
+    forest = RandomCutForest.from_trees([build_tree(sample, rng) for sample in samples])
+    holdout = forest.score(nominal[512:])
+    forest.metadata = {"score_mean": float(holdout.mean()), "score_std": float(holdout.std())}
+
+    edge_filter = EdgeFilter(
+        threshold=4.0, pre_context=3, post_context=2, heartbeat_hz=0, scorer=RcfScorer(forest)
+    )
+    forwarded = []
+    for index, row in enumerate(nominal[512:560]):
+        values = row + 40.0 if index == 30 else row
+        forwarded.extend(edge_filter.process(make_sample(index * 100, values)))
+
+    assert [sample["timestamp"] for sample in forwarded] == [2700, 2800, 2900, 3000, 3100, 3200]
+    assert edge_filter.stats.forwarded_anomalous == 1
+
+
+def test_edge_filter_accepts_any_scorer():
+    class Threshold:
+        def __init__(self):
+            self.updates = 0
+
+        def score(self, sample):
+            return sample["x"]
+
+        def update(self, sample):
+            self.updates += 1
+
+    scorer = Threshold()
+    edge_filter = EdgeFilter(threshold=1.0, pre_context=0, post_context=0, scorer=scorer)
+    forwarded = [edge_filter.process({"timestamp": t * 10, "x": t % 5 == 4}) for t in range(10)]
+
+    assert scorer.updates == 10
+    assert edge_filter.stats.forwarded_anomalous == 2
+    assert sum(map(len, forwarded)) == edge_filter.stats.forwarded
+
+
+def test_forwarded_stream_stays_in_order_across_heartbeats_and_post_context():
+    class Flags:
+        def score(self, sample):
+            return sample["x"]
+
+        def update(self, sample):
+            pass
+
+    # Heartbeats every 5 samples, one anomaly at t=7 with 3 samples of pre-context:
+    # the heartbeat at t=5 already sent 5, so pre-context must not reach back to 2-4
+    edge_filter = EdgeFilter(
+        threshold=1.0, pre_context=3, post_context=1, heartbeat_hz=2.0, scorer=Flags()
+    )
+    forwarded = []
+    for t in range(14):
+        sample = {"timestamp": t * 100, "x": float(t == 7)}
+        forwarded.extend(s["timestamp"] // 100 for s in edge_filter.process(sample))
+
+    assert forwarded == [0, 5, 6, 7, 8, 13]
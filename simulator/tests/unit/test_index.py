@@ -0,0 +1,100 @@
+"""Incremental updates of the telemetry session index."""
+
+import gzip
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.dataset.index import TelemetryIndex
+
+
+def write_partition(path, vehicle_id, session_id, timestamps):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = pa.table(
+        {
+            "vehicle_id": [vehicle_id] * len(timestamps),
+            "session_id": [session_id] * len(timestamps),
+            "timestamp": pa.array(timestamps, type=pa.int64()),
+        }
+    )
+    pq.write_table(table, path)
+
+
+def touch_later(path):
+    # Guarantee a new mtime even on coarse-grained filesystems
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_update_picks_up_added_changed_and_removed_files(tmp_path):
+    first = tmp_path / "hour=00" / "a.parquet"
+    second = tmp_path / "hour=01" / "b.parquet"
+    write_partition(first, "CAR-1", "s1", [0, 100, 200])
+    write_partition(second, "CAR-2", "s2", [1000, 1100])
+
+    index = TelemetryIndex(tmp_path)
+    result = index.update()
+    assert (result.added_files, result.removed_files, result.unchanged_files) == (2, 0, 0)
+    assert {(s.vehicle_id, s.rows) for s in index.sessions()} == {("CAR-1", 3), ("CAR-2", 2)}
+
+    # Changed: first file rewritten with more rows
+    write_partition(first, "CAR-1", "s1", [0, 100, 200, 300])
+    touch_later(first)
+    result = index.update()
+    assert (result.added_files, result.removed_files, result.unchanged_files) == (1, 0, 1)
+    assert index.sessions("CAR-1")[0].rows == 4
+
+    # Removed: second file deleted
+    second.unlink()
+    result = index.update()
+    assert (result.added_files, result.removed_files, result.unchanged_files) == (0, 1, 1)
+    assert [s.vehicle_id for s in index.sessions()] == ["CAR-1"]
+
+    # Nothing new
+    result = index.update()
+    assert (result.added_files, result.removed_files, result.unchanged_files) == (0, 0, 1)
+
+
+def test_empty_and_non_parquet_files_are_not_reindexed(tmp_path):
+    write_partition(tmp_path / "hour=00" / "a.parquet", "CAR-1", "s1", [0, 100])
+    write_partition(tmp_path / "hour=01" / "empty.parquet", "CAR-1", "s1", [])
+    (tmp_path / "hour=02").mkdir()
+    (tmp_path / "hour=02" / "export.jsonl").write_text('{"vehicle_id": "CAR-1"}\n')
+
+    index = TelemetryIndex(tmp_path)
+    result = index.update()
+    assert (result.added_files, result.skipped_files) == (2, 1)
+    index.save()
+
+    # Reloaded from disk: all three files are known and unchanged
+    reloaded = TelemetryIndex(tmp_path)
+    result = reloaded.update()
+    assert (result.added_files, result.skipped_files, result.unchanged_files) == (0, 0, 3)
+    assert reloaded.sessions()[0].rows == 2
+
+
+def test_read_window_returns_only_requested_range(tmp_path):
+    write_partition(tmp_path / "hour=00" / "a.parquet", "CAR-1", "s1", list(range(0, 1000, 100)))
+    write_partition(tmp_path / "hour=00" / "b.parquet", "CAR-2", "s2", list(range(0, 1000, 100)))
+
+    index = TelemetryIndex(tmp_path)
+    index.update()
+    window = index.read_window("CAR-1", start_ms=200, end_ms=500)
+    assert window["timestamp"].to_pylist() == [200, 300, 400, 500]
+    assert set(window["vehicle_id"].to_pylist()) == {"CAR-1"}
+
+
+def test_extensionless_firehose_objects_are_indexed(tmp_path):
+    # Firehose object names carry no file extension
+    hour = tmp_path / "year=2026" / "month=01" / "day=05" / "hour=13"
+    write_partition(hour / "redline-1-2026-01-05-13-00-00-abc", "CAR-1", "s1", [0, 100])
+    write_partition(hour / "redline-1-2026-01-05-13-15-00-def", "CAR-1", "s1", [200, 300])
+    with gzip.open(hour / "redline-1-2026-01-05-13-30-00-ghi", "wt") as f:
+        f.write('{"vehicle_id": "CAR-1", "timestamp": 400}\n')
+
+    index = TelemetryIndex(tmp_path)
+    result = index.update()
+    assert (result.added_files, result.skipped_files) == (2, 1)
+    [session] = index.sessions()
+    assert (session.rows, session.files) == (4, 2)
@@ -0,0 +1,61 @@
+"""Capacity search against the local broker."""
+
+from pathlib import Path
+
+import pytest
+
+from src.config.loader import load_config
+from src.iot.local_broker import LocalBroker
+from src.iot.publisher import IoTPublisher
+from src.loadtest import CapacitySearch, SimulatedCar, car_vehicle_id
+
+CONFIG_PATH = Path(__file__).parents[2] / "config" / "default.yml"
+
+
+@pytest.fixture
+def broker():
+    # 5 ms of broker work per message: at most 200 msg/s across all cars
+    broker = LocalBroker(latency_ms=0, jitter_ms=0, service_time_ms=5.0)
+    yield broker
+    broker.close()
+
+
+def make_cars(broker, count):
+    config = load_config(CONFIG_PATH)
+    cars = []
+    for index in range(count):
+        client_id = car_vehicle_id(config, index)
+        publisher = IoTPublisher(
+            endpoint="localhost",
+            cert_path="",
+            private_key_path="",
+            ca_path="",
+            client_id=client_id,
+            topic=f"car/{client_id}/telemetry",
+            connection_factory=broker.connection,
+        )
+        publisher.connect()
+        cars.append(SimulatedCar(config, index, publisher))
+    return cars
+
+
+def test_knee_is_found_at_the_broker_capacity(broker):
+    search = CapacitySearch(
+        make_cars(broker, 2),
+        start_rate=50,
+        step_rate=100,
+        steps=4,
+        step_duration=1.0,
+        tolerance=0.1,
+    )
+    report = search.run()
+
+    assert [step.target_rate for step in report.steps] == [50, 150, 250]
+    assert [step.saturated for step in report.steps] == [False, False, True]
+    assert report.knee is report.steps[-1]
+    assert report.knee.achieved_rate == pytest.approx(200, rel=0.15)
+    assert report.max_sustainable_rate == pytest.approx(150, rel=0.1)
+
+    # The cars wait on PUBACKs; their own generate/publish work stays small
+    assert report.knee.limiting_stage == "ack_wait"
+    assert report.knee.publish_utilization < report.knee.ack_wait_utilization
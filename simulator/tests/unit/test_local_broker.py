@@ -0,0 +1,72 @@
+"""Local broker as a deduplicating sink."""
+
+import json
+
+import pytest
+
+from src.dataset.dedup import Deduplicator
+from src.iot.local_broker import LocalBroker, telemetry_samples
+
+
+def sample(timestamp, group="brake"):
+    return {
+        "vehicle_id": "GT3-RACER-01",
+        "session_id": "s1",
+        "sensor_group": group,
+        "timestamp": timestamp,
+        "brake_disc_temp_fl": 400.0,
+    }
+
+
+@pytest.fixture
+def broker():
+    broker = LocalBroker(latency_ms=0, jitter_ms=0, deduplicator=Deduplicator(capacity=10_000))
+    yield broker
+    broker.close()
+
+
+def publish(broker, message):
+    payload = json.dumps(message).encode("utf-8")
+    return broker.connection().publish("car/GT3-RACER-01/telemetry/brake", payload, 1)[0]
+
+
+def test_envelopes_are_unpacked_into_samples(broker):
+    envelope = {
+        "vehicle_id": "GT3-RACER-01",
+        "session_id": "s1",
+        "sensor_group": "brake",
+        "samples": [sample(1000), sample(1020), sample(1040)],
+    }
+    publish(broker, envelope).result(timeout=5)
+    publish(broker, envelope).result(timeout=5)  # QoS1 redelivery of the whole batch
+    publish(broker, sample(1060)).result(timeout=5)
+
+    stats = broker.deduplicator.stats
+    assert (stats.rows, stats.duplicates) == (7, 3)
+    assert broker.unchecked == 0
+
+
+def test_non_sample_payloads_are_skipped(broker):
+    publish(broker, {"status": "online"}).result(timeout=5)
+    broker.connection().publish("car/x/control", b"not json", 1)[0].result(timeout=5)
+
+    assert broker.deduplicator.stats.rows == 0
+    assert (broker.messages, broker.unchecked) == (2, 2)
+
+
+def test_telemetry_samples_keeps_envelope_group():
+    envelope = {"sensor_group": "engine", "samples": [{"timestamp": 5, "vehicle_id": "A"}]}
+    assert telemetry_samples(json.dumps(envelope).encode()) == [
+        {"sensor_group": "engine", "timestamp": 5, "vehicle_id": "A"}
+    ]
+
+
+def test_close_fails_unacknowledged_publishes():
+    broker = LocalBroker(latency_ms=60_000, jitter_ms=0)
+    pending = publish(broker, sample(1000))
+
+    broker.close()
+    with pytest.raises(ConnectionError):
+        pending.result(timeout=1)
+    with pytest.raises(ConnectionError):
+        publish(broker, sample(1020)).result(timeout=1)
@@ -0,0 +1,41 @@
+"""Local Firehose dataset layout."""
+
+import gzip
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.dataset.partitions import is_parquet, list_data_files, parse_partition
+
+
+def test_list_data_files_skips_hidden_and_underscore_entries(tmp_path):
+    for relative in (
+        "year=2026/month=01/day=05/hour=13/redline-1-2026-01-05-13-00-00-abc",
+        "year=2026/month=01/day=05/hour=09/redline-1-2026-01-05-09-00-00-def",
+        "year=2026/month=01/day=05/hour=13/_SUCCESS",
+        "year=2026/month=01/day=05/hour=13/.part.crc",
+        "_index/segments.parquet",
+    ):
+        path = tmp_path / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x")
+
+    files = list_data_files(tmp_path)
+    assert [f.parent.name for f in files] == ["hour=09", "hour=13"]
+    assert list_data_files(files[0]) == [files[0]]
+
+
+def test_parse_partition_reads_hive_keys():
+    path = "raw/telemetry/year=2026/month=01/day=05/hour=13/object"
+    assert parse_partition(path) == {"year": 2026, "month": 1, "day": 5, "hour": 13}
+    assert parse_partition("raw/other=1/object") == {}
+
+
+def test_is_parquet_detects_format_from_magic_bytes(tmp_path):
+    pq.write_table(pa.table({"x": [1]}), tmp_path / "object-a")
+    with gzip.open(tmp_path / "object-b", "wt") as f:
+        f.write('{"x": 1}\n')
+    (tmp_path / "object-c").write_text('{"x": 1}\n')
+    (tmp_path / "object-d").write_bytes(b"")
+
+    assert [is_parquet(tmp_path / f"object-{c}") for c in "abcd"] == [True, False, False, False]
@@ -0,0 +1,80 @@
+"""Time-ordered replay of recorded telemetry."""
+
+import gzip
+import json
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.dataset.replay import ReplayRewrite, ReplaySource, Replayer
+
+
+def records(vehicle_id, timestamps, session_id="s1"):
+    return [
+        {"vehicle_id": vehicle_id, "session_id": session_id, "timestamp": t, "engine_rpm": 7000.0}
+        for t in timestamps
+    ]
+
+
+def write_parquet(path, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(pa.Table.from_pylist(rows), path)
+
+
+def write_jsonl(path, rows, compress=False):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    opener = gzip.open if compress else open
+    with opener(path, "wt") as f:
+        f.writelines(json.dumps(row) + "\n" for row in rows)
+
+
+def write_mixed(root):
+    """Interleaved time ranges across Parquet, gzip JSONL and plain JSONL objects."""
+    write_parquet(root / "hour=00" / "object-a", records("CAR-1", range(0, 3000, 300)))
+    write_jsonl(root / "hour=00" / "object-b", records("CAR-2", range(100, 3000, 300)), True)
+    write_jsonl(root / "hour=01" / "object-c.jsonl", records("CAR-1", range(2000, 4000, 250)))
+
+
+def test_merge_yields_records_in_timestamp_order_across_formats(tmp_path):
+    write_mixed(tmp_path)
+
+    source = ReplaySource(tmp_path, batch_size=2)
+    assert [first for first, _ in source.files] == [0, 100, 2000]
+
+    replayed = list(source)
+    timestamps = [r["timestamp"] for r in replayed]
+    assert len(replayed) == 10 + 10 + 8
+    assert timestamps == sorted(timestamps)
+    assert [r["vehicle_id"] for r in replayed[:4]] == ["CAR-1", "CAR-2", "CAR-1", "CAR-2"]
+
+
+def test_vehicle_and_time_filters(tmp_path):
+    write_mixed(tmp_path)
+
+    source = ReplaySource(tmp_path, vehicles=["CAR-1"], start_ms=1000, end_ms=2500)
+    replayed = [(r["vehicle_id"], r["timestamp"]) for r in source]
+    assert replayed == [("CAR-1", t) for t in (1200, 1500, 1800, 2000, 2100, 2250, 2400, 2500)]
+
+
+def test_rebase_rewrites_timestamps_and_session_ids(tmp_path):
+    write_parquet(tmp_path / "a.parquet", records("CAR-1", [5000, 5100, 5400], "lap-1"))
+    write_jsonl(tmp_path / "b.jsonl", records("CAR-1", [5200], "lap-2"))
+    sent = []
+    rewrite = ReplayRewrite(rebase_to_ms=1_000_000, new_session_ids=True)
+
+    stats = Replayer(ReplaySource(tmp_path), sent.append, speed=0, rewrite=rewrite).run()
+
+    assert stats.sent == 4
+    assert [r["timestamp"] for r in sent] == [1_000_000, 1_000_100, 1_000_200, 1_000_400]
+    sessions = [r["session_id"] for r in sent]
+    assert sessions[0] == sessions[1] == sessions[3] != sessions[2]
+    assert not {"lap-1", "lap-2"} & set(sessions)
+
+
+def test_rebased_spacing_follows_replay_speed(tmp_path):
+    write_jsonl(tmp_path / "a.jsonl", records("CAR-1", [0, 500, 1000]))
+    sent = []
+    rewrite = ReplayRewrite(rebase_to_ms=0)
+
+    Replayer(ReplaySource(tmp_path), sent.append, speed=10.0, rewrite=rewrite).run()
+    assert [r["timestamp"] for r in sent] == [0, 50, 100]
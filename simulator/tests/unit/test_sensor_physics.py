@@ -0,0 +1,111 @@
+"""Sensor physics must not depend on the sample rate."""
+
+import copy
+import random
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.config.loader import load_config
+from src.telemetry.generator import TelemetryGenerator
+from src.telemetry.sensors.brake import BrakeSensor
+from src.telemetry.sensors.engine import OVERHEAT_RATE, EngineSensor
+from src.telemetry.sensors.physics import event_probability, exponential_approach
+from src.telemetry.track import LapDriver, TrackProfile
+
+SIMULATED_SEC = 1200.0
+CONFIG_PATH = Path(__file__).parents[2] / "config" / "default.yml"
+
+
+def simulate(rate_hz: float, seconds: float = SIMULATED_SEC, seed: int = 7) -> dict:
+    """Run one car's brake and engine sensors and collect channel statistics."""
+    random.seed(seed)
+    np.random.seed(seed)
+    driver = LapDriver(TrackProfile(), seed=seed)
+    brake = BrakeSensor(driver=driver)
+    engine = EngineSensor(driver=driver)
+
+    dt = 1.0 / rate_hz
+    disc, oil, coolant = [], [], []
+    for step in range(int(seconds * rate_hz)):
+        timestamp = 1_000.0 + step * dt
+        disc.append(brake.sample(timestamp, dt)["brake_disc_temp_fl"])
+        sample = engine.sample(timestamp, dt)
+        oil.append(sample["engine_oil_temp"])
+        coolant.append(sample["engine_coolant_temp"])
+
+    return {
+        "disc": np.array(disc),
+        "oil": np.array(oil),
+        "coolant": np.array(coolant),
+        "overheats_per_sec": engine.overheat_events / seconds,
+    }
+
+
+@pytest.fixture(scope="module")
+def runs() -> dict:
+    return {rate: simulate(rate) for rate in (10, 50)}
+
+
+def test_event_probability_composes_across_steps():
+    # Ten 0.1 s steps must have the same chance of "no event" as one 1 s step
+    rate = 0.3
+    no_event_fine = (1 - event_probability(rate, 0.1)) ** 10
+    assert no_event_fine == pytest.approx(1 - event_probability(rate, 1.0))
+
+
+def test_exponential_approach_composes_across_steps():
+    value = 500.0
+    for _ in range(50):
+        value = exponential_approach(value, 20.0, 0.05, 0.02)
+    assert value == pytest.approx(exponential_approach(500.0, 20.0, 0.05, 1.0))
+
+
+def test_disc_temperature_matches_across_rates(runs):
+    low, high = runs[10]["disc"], runs[50]["disc"]
+    for percentile in (50, 90, 99):
+        assert np.percentile(high, percentile) == pytest.approx(
+            np.percentile(low, percentile), rel=0.05
+        )
+
+
+def test_engine_temperatures_match_across_rates(runs):
+    assert runs[50]["oil"].mean() == pytest.approx(runs[10]["oil"].mean(), abs=0.5)
+    # Coolant excursions last the same time, so the share of hot samples matches
+    hot_low = (runs[10]["coolant"] > 100).mean()
+    hot_high = (runs[50]["coolant"] > 100).mean()
+    assert hot_high == pytest.approx(hot_low, abs=0.02)
+
+
+def test_overheat_events_per_second_match_across_rates(runs):
+    # ~240 expected events per run: the tolerance is about 4 Poisson standard
+    # deviations, while a per-sample coin flip would give 5x more at 50 Hz
+    assert OVERHEAT_RATE == pytest.approx(0.2, rel=0.02)  # 2% per 10 Hz sample
+    for rate in (10, 50):
+        assert runs[rate]["overheats_per_sec"] == pytest.approx(OVERHEAT_RATE, rel=0.25)
+
+
+def test_fast_forward_matches_stepping_through_the_idle_period():
+    config = load_config(CONFIG_PATH)
+    generator = TelemetryGenerator(config)
+    start = 1_000.0
+    for step in range(600):  # one minute of driving heats the discs
+        generator.generate_sample(start + step * 0.1)
+    last = start + 599 * 0.1
+
+    stepped = copy.deepcopy(generator)
+    generator.fast_forward(last + 600.0)
+    for _ in range(6000):
+        stepped.brake_sensor.advance(0.1)
+        stepped.engine_sensor.advance(0.1)
+
+    np.testing.assert_allclose(generator.brake_sensor.disc_temp, stepped.brake_sensor.disc_temp)
+    assert generator.engine_sensor.oil_temp == pytest.approx(stepped.engine_sensor.oil_temp)
+    assert generator.engine_sensor.coolant_temp == pytest.approx(
+        stepped.engine_sensor.coolant_temp
+    )
+    # Ten idle minutes bring the discs back to ambient, and a fresh lap starts
+    assert generator.brake_sensor.disc_temp.max() < generator.brake_sensor.ambient_temp + 5
+    assert generator.driver.lap_start[0] == last + 600.0
+    assert generator.generate_sample(last + 600.1)["vehicle_id"] == config.vehicle.vehicle_id
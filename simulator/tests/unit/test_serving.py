@@ -0,0 +1,203 @@
+"""Local scoring service: micro-batching and request validation."""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src.model.rcf import RandomCutForest, build_tree
+from src.model.registry import ModelRegistry
+from src.model.serving import MicroBatcher, ScoringService, parse_instances
+
+NUM_FEATURES = 16
+
+
+@pytest.fixture
+def registry(tmp_path):
+    rng = np.random.default_rng(0)
+    points = rng.normal(size=(64, NUM_FEATURES))
+    forest = RandomCutForest.from_trees([build_tree(points, rng) for _ in range(5)])
+    forest.metadata = {"threshold": 3.0}
+    forest.save(tmp_path / "default.bin")
+    registry = ModelRegistry(tmp_path)
+    registry.get("default")  # warm, so requests are batched right away
+    yield registry
+    registry.close()
+
+
+@pytest.fixture
+def batcher(registry):
+    # A long window puts all requests submitted below into one batch
+    batcher = MicroBatcher(registry, window_ms=200.0)
+    yield batcher
+    batcher.close()
+
+
+def test_malformed_request_fails_alone(batcher):
+    good = batcher.submit("default", np.zeros((3, NUM_FEATURES)))
+    narrow = batcher.submit("default", np.zeros((2, NUM_FEATURES - 1)))
+    empty = batcher.submit("default", np.zeros((0, NUM_FEATURES)))
+    other = batcher.submit("default", np.ones((1, NUM_FEATURES)))
+
+    scores, threshold = good.result(timeout=5)
+    assert scores.shape == (3,)
+    assert threshold == 3.0
+    assert other.result(timeout=5)[0].shape == (1,)
+    with pytest.raises(ValueError, match="15"):
+        narrow.result(timeout=5)
+    with pytest.raises(ValueError):
+        empty.result(timeout=5)
+    assert batcher.batches == 1
+    assert batcher.batched_requests == 2
+
+
+def test_batched_scores_match_direct_scores(batcher, registry):
+    points = np.random.default_rng(1).normal(size=(4, NUM_FEATURES))
+    futures = [batcher.submit("default", row[None, :]) for row in points]
+    batched = np.concatenate([future.result(timeout=5)[0] for future in futures])
+    np.testing.assert_allclose(batched, registry.get("default").score(points))
+
+
+def test_parse_instances_rejects_empty_requests():
+    with pytest.raises(ValueError):
+        parse_instances(b'{"instances": []}', "application/json")
+    points = parse_instances(b"1,2,3\n4,5,6\n", "text/csv")
+    assert points.shape == (2, 3)
+
+
+@pytest.mark.parametrize("name", ["../secret", "..", "a/b", ".hidden", "x\\..\\y"])
+def test_registry_rejects_names_outside_root(registry, name):
+    with pytest.raises(ValueError):
+        registry.path(name)
+    with pytest.raises(ValueError):
+        registry.preload([name])
+    with pytest.raises(ValueError):
+        registry.resolve(model=name)
+
+
+def test_registry_resolves_plain_names(registry):
+    with pytest.raises(ValueError):
+        registry.path("")
+    assert registry.resolve(vehicle_id="GT3-RACER-01") == "default"
+    assert registry.path("GT3-RACER-01.v2").name == "GT3-RACER-01.v2.bin"
+
+
+def test_service_counters_are_exact_under_concurrency(registry, batcher):
+    service = ScoringService(registry, batcher)
+
+    def hammer():
+        for _ in range(10_000):
+            service.record_request()
+            service.record_error()
+
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert (service.requests, service.errors) == (80_000, 80_000)
+
+
+def save_model(root, name, seed=0):
+    rng = np.random.default_rng(seed)
+    points = rng.normal(size=(64, NUM_FEATURES))
+    forest = RandomCutForest.from_trees([build_tree(points, rng) for _ in range(5)])
+    forest.save(root / f"{name}.bin")
+    return forest
+
+
+@pytest.fixture
+def gated(tmp_path):
+    """Registry whose loads of models other than "default" wait until released."""
+    save_model(tmp_path, "default")
+    save_model(tmp_path, "cold", seed=1)
+    release = threading.Event()
+
+    def loader(path):
+        if path.stem != "default":
+            release.wait(timeout=10)
+        return RandomCutForest.load(path)
+
+    registry = ModelRegistry(tmp_path, loader=loader)
+    registry.get("default")
+    yield registry, release
+    release.set()
+    registry.close()
+
+
+def test_lru_eviction_keeps_the_cache_within_budget(tmp_path):
+    nbytes = save_model(tmp_path, "a").nbytes
+    save_model(tmp_path, "b", seed=1)
+    save_model(tmp_path, "c", seed=2)
+    registry = ModelRegistry(tmp_path, memory_budget_bytes=int(2.5 * nbytes))
+
+    registry.get("a")
+    registry.get("b")
+    registry.get("a")  # a is now the most recently used
+    registry.get("c")
+
+    assert registry.cached() == ["a", "c"]
+    assert registry.stats.evictions == 1
+    assert registry.memory_bytes <= registry.memory_budget_bytes
+    registry.get("b")  # reloaded on demand, evicting a
+    assert registry.cached() == ["c", "b"]
+    assert (registry.stats.loads, registry.stats.hits) == (4, 1)
+    registry.close()
+
+
+def test_cold_model_loads_while_warm_requests_are_scored(gated):
+    registry, release = gated
+    batcher = MicroBatcher(registry, window_ms=1.0)
+    try:
+        cold = batcher.submit("cold", np.zeros((2, NUM_FEATURES)))
+        warm = batcher.submit("default", np.zeros((1, NUM_FEATURES)))
+
+        assert warm.result(timeout=5)[0].shape == (1,)
+        assert not cold.done()
+
+        # Once loaded, the parked request is requeued and scored (one miss, no extra lookup)
+        release.set()
+        assert cold.result(timeout=5)[0].shape == (2,)
+        assert registry.stats.misses == 2  # the initial "default" load and "cold"
+    finally:
+        batcher.close()
+
+
+def test_failed_cold_load_fails_its_requests(tmp_path):
+    save_model(tmp_path, "default")
+    registry = ModelRegistry(tmp_path)
+    batcher = MicroBatcher(registry, window_ms=1.0)
+    (tmp_path / "broken.bin").write_bytes(b"not a model")
+    try:
+        with pytest.raises(ValueError, match="Not a Random Cut Forest model"):
+            batcher.submit("broken", np.zeros((1, NUM_FEATURES))).result(timeout=5)
+    finally:
+        batcher.close()
+        registry.close()
+
+
+def test_close_fails_requests_requeued_after_shutdown(gated):
+    registry, release = gated
+    batcher = MicroBatcher(registry, window_ms=1.0)
+    cold = batcher.submit("cold", np.zeros((1, NUM_FEATURES)))
+    time.sleep(0.1)  # parked on the cold load
+
+    batcher.close()
+    release.set()
+    with pytest.raises(RuntimeError, match="closed"):
+        cold.result(timeout=5)
+    with pytest.raises(RuntimeError, match="closed"):
+        batcher.submit("default", np.zeros((1, NUM_FEATURES))).result(timeout=5)
+
+
+def test_score_times_out_instead_of_blocking(gated):
+    registry, _ = gated
+    batcher = MicroBatcher(registry, window_ms=1.0)
+    service = ScoringService(registry, batcher, request_timeout_sec=0.2)
+    try:
+        with pytest.raises(TimeoutError, match="cold"):
+            service.score(np.zeros((1, NUM_FEATURES)), model="cold")
+        assert service.score(np.zeros((1, NUM_FEATURES)))["model"] == "default"
+    finally:
+        batcher.close()
@@ -0,0 +1,36 @@
+"""Lap profile driver."""
+
+import numpy as np
+
+from src.telemetry.track import LapDriver, TrackProfile
+
+
+def test_scalar_and_vectorized_inputs_agree():
+    profile = TrackProfile()
+    scalar = LapDriver(profile, num_cars=3, seed=1)
+    vector = LapDriver(profile, num_cars=3, seed=1)
+    for step in range(0, 3000):
+        timestamp = 100.0 + step * 0.5
+        inputs = vector.inputs(np.full(3, timestamp))
+        for car in range(3):
+            speed, throttle, brake, rpm = scalar.inputs_one(timestamp, car)
+            assert np.isclose(speed, inputs.speed_kph[car])
+            assert np.isclose(throttle, inputs.throttle[car])
+            assert np.isclose(brake, inputs.brake[car])
+            assert np.isclose(rpm, inputs.rpm_fraction[car])
+
+
+def test_pit_stops_idle_the_engine():
+    profile = TrackProfile()
+    driver = LapDriver(profile, pit_every_laps=5, pit_stop_sec=30.0, seed=0)
+    timestamps = np.arange(0.0, 3600.0, 0.1)
+    inputs = [driver.inputs_one(t) for t in timestamps]
+    stopped = np.array([speed == 0.0 and rpm == 0.0 for speed, _, _, rpm in inputs])
+    laps_per_stop = 5 * profile.lap_time + 30.0
+    assert abs(stopped.mean() - 30.0 / laps_per_stop) < 0.01
+
+
+def test_no_pit_stops_when_disabled():
+    driver = LapDriver(TrackProfile(), pit_every_laps=0, seed=0)
+    speeds = [driver.inputs_one(t)[0] for t in np.arange(0.0, 1800.0, 0.1)]
+    assert min(speeds) > 0.0
@@ -75,7 +75,9 @@ resource "aws_iot_policy" "vehicle_telemetry" {
           "iot:Publish"
         ]
         Resource = [
-          "arn:aws:iot:${data.aws_region.current.name}:${data.aws_caller_identity.current.account_id}:topic/car/$${iot:Connection.Thing.ThingName}/telemetry"
+          "arn:aws:iot:${data.aws_region.current.name}:${data.aws_caller_identity.current.account_id}:topic/car/$${iot:Connection.Thing.ThingName}/telemetry",
+          # Per-sensor-group topics (multi-rate sampling)
+          "arn:aws:iot:${data.aws_region.current.name}:${data.aws_caller_identity.current.account_id}:topic/car/$${iot:Connection.Thing.ThingName}/telemetry/*"
         ]
       },
       {
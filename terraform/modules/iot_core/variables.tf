@@ -24,9 +24,9 @@ variable "iot_role_arn" {
 }
 
 variable "topic_pattern" {
-  description = "MQTT topic pattern for telemetry"
+  description = "MQTT topic pattern for telemetry (car/+/telemetry/# matches car/<id>/telemetry and its per-sensor-group subtopics)"
   type        = string
-  default     = "car/+/telemetry"
+  default     = "car/+/telemetry/#"
 }
 
 variable "create_certificates" {